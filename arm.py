@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# arm.py
+"""
+无界面命令行入口：python -m arm <子命令> ...
+- 只依赖 logic 层，不导入 PyQt5 与 gui，可在无显示环境（如 cron）中运行
+- 输出为 JSON Lines（每行一个 JSON 对象），错误以 JSON 写到标准错误并返回非零退出码
+- 需要登录的子命令通过 --user/--password 或环境变量 ARM_USER/ARM_PASSWORD 认证
+
+示例：
+  python -m arm list --category 排序
+  python -m arm --user admin --password admin123 approve 3 4 5
+  python -m arm stats
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def emit(record: dict):
+    sys.stdout.write(json.dumps(record, ensure_ascii=False, default=_default) + '\n')
+
+
+def algo_record(a) -> dict:
+    return {
+        'id':         a.id,
+        'title':      a.title,
+        'owner':      a.owner.username if a.owner else None,
+        'tags':       a.tags,
+        'category':   a.category,
+        'version':    a.version,
+        'score':      a.score,
+        'status':     a.status,
+        'created_at': a.created_at,
+    }
+
+
+def _login(logic, args):
+    username = args.user or os.environ.get('ARM_USER')
+    password = args.password or os.environ.get('ARM_PASSWORD')
+    if not username or not password:
+        raise PermissionError("需要 --user/--password 或环境变量 ARM_USER/ARM_PASSWORD")
+    return logic.authenticate(username, password)
+
+
+def _login_admin(logic, args):
+    """只读的管理员命令（logic 层不检查身份）在这里检查角色"""
+    user = _login(logic, args)
+    if user.role != 'admin':
+        raise PermissionError("必须为管理员才能执行此命令")
+    return user
+
+
+# ─── 子命令 ───────────────────────────────────────────────
+
+def cmd_list(logic, args):
+    if args.sort == 'trending':
+        for e in logic.list_trending(args.query, args.tags, args.category, args.limit):
+            emit(dict(algo_record(e['algo']), trending=e['trending']))
+        return
+    for a in logic.list_algos(args.query, args.tags, args.category, args.fuzzy)[:args.limit]:
+        emit(algo_record(a))
+
+
+def cmd_search_code(logic, args):
+    if args.file == '-':
+        code = sys.stdin.read()
+    else:
+        with open(args.file, encoding='utf-8') as f:
+            code = f.read()
+    for e in logic.search_by_code(code, args.limit, args.category):
+        emit(dict(algo_record(e['algo']), similarity=round(e['similarity'], 4)))
+
+
+def _queued(logic, args, job_id: int, progress=None):
+    """输出已提交的任务 ID；指定 --wait 时轮询至任务结束并输出任务状态，失败时以非零状态退出"""
+    emit({'job': job_id})
+    if not getattr(args, 'wait', False):
+        return
+    while True:
+        job = logic.get_job(job_id)
+        if job['status'] in ('done', 'failed'):
+            break
+        if progress:
+            progress()
+        time.sleep(1)
+    emit(job)
+    if job['status'] == 'failed':
+        raise RuntimeError(job['error'])
+
+
+def cmd_rebuild_trending(logic, args):
+    admin = _login(logic, args)
+    _queued(logic, args, logic.rebuild_trending(admin))
+
+
+def cmd_rebuild_cards(logic, args):
+    admin = _login(logic, args)
+    _queued(logic, args, logic.rebuild_cards(admin))
+
+
+def cmd_jobs(logic, args):
+    _login_admin(logic, args)
+    for job in logic.list_jobs(args.limit, args.status):
+        emit(job)
+
+
+def cmd_job(logic, args):
+    _login_admin(logic, args)
+    job = logic.get_job(args.id)
+    if job is None:
+        raise ValueError(f"任务不存在：{args.id}")
+    emit(job)
+
+
+def cmd_pending(logic, args):
+    _login_admin(logic, args)
+    for a in logic.list_pending():
+        emit(algo_record(a))
+
+
+def cmd_show(logic, args):
+    for aid in args.ids:
+        a = logic.get_algo_detail(aid)
+        if a is None:
+            raise ValueError(f"算法不存在：{aid}")
+        emit(dict(algo_record(a), description=a.description, code=a.code))
+
+
+def cmd_download(logic, args):
+    user = _login(logic, args)
+    code = logic.download_algo(user, args.id)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(code)
+        emit({'id': args.id, 'output': args.output, 'bytes': len(code.encode('utf-8'))})
+    else:
+        emit({'id': args.id, 'code': code})
+
+
+def cmd_export(logic, args):
+    import export
+    user = _login(logic, args)   # 先登录再打开输出文件，失败时不留下文件
+    fmt = args.format or export.format_for(args.output)
+    if args.queue:
+        _queued(logic, args, logic.queue_export(user, os.path.abspath(args.output), fmt, args.ids,
+                                                args.query, args.tags, args.category))
+        return
+    with open(args.output, 'wb') as f:
+        manifest = logic.export_algos(user, f, fmt, args.ids, args.query, args.tags, args.category)
+    emit({'output': args.output, 'format': fmt, 'count': manifest['count']})
+
+
+def _review(action):
+    def run(logic, args):
+        admin = _login(logic, args)
+        count = logic.review_algos(admin, args.ids, action)
+        emit({'ids': args.ids, 'action': action, 'count': count})
+    return run
+
+
+def cmd_rescore(logic, args):
+    admin = _login(logic, args)
+    _queued(logic, args, logic.rescore_all(admin), progress=lambda: emit(logic.get_rescore_progress()))
+
+
+def cmd_retention(logic, args):
+    admin = _login(logic, args)
+    _queued(logic, args, logic.run_retention(admin, args.days))
+
+
+def cmd_strategy(logic, args):
+    if args.func is not None or args.comment is not None:
+        admin = _login(logic, args)
+        curr = logic.get_scoring_strategy()
+        logic.update_scoring(admin,
+                             curr['func_weight'] if args.func is None else args.func,
+                             curr['comment_weight'] if args.comment is None else args.comment,
+                             curr['row_version'])
+    emit(logic.get_scoring_strategy())
+
+
+def cmd_stats(logic, args):
+    emit(logic.get_stats())
+
+
+def cmd_export_stats(logic, args):
+    start = date.fromisoformat(args.start)
+    end = date.fromisoformat(args.end)
+    sys.stdout.write(logic.export_stats_csv(args.type, start, end))
+
+
+def cmd_benchmark(logic, args):
+    if args.queue:
+        admin = _login(logic, args)
+        _queued(logic, args, logic.queue_benchmarks(admin, args.ids, args.force))
+        return
+    for aid, result in logic.benchmark_algos(args.ids, force=args.force).items():
+        emit(dict(result, id=aid))
+
+
+def cmd_verify(logic, args):
+    for aid in args.ids:
+        emit(dict(logic.verify_algo(aid, force=args.force), id=aid))
+
+
+def cmd_leaderboard(logic, args):
+    for e in logic.get_leaderboard(args.category):
+        algo = e.pop('algo')
+        emit(dict(e, title=algo.title))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m arm', description="Algorithm Repository Manager 命令行工具")
+    parser.add_argument('--user', help="登录用户名（或环境变量 ARM_USER）")
+    parser.add_argument('--password', help="登录密码（或环境变量 ARM_PASSWORD）")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('list', help="列出已通过的算法")
+    p.add_argument('--query'); p.add_argument('--tags'); p.add_argument('--category')
+    p.add_argument('--sort', choices=['score', 'trending'], default='score')
+    p.add_argument('--fuzzy', action='store_true', help="按标题与标签容错匹配 --query（如拼写错误），按相似度排序")
+    p.add_argument('--limit', type=int)
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser('search-code', help="按代码片段检索相似的已通过算法")
+    p.add_argument('file', help="代码文件，- 表示标准输入")
+    p.add_argument('--category'); p.add_argument('--limit', type=int, default=10)
+    p.set_defaults(func=cmd_search_code)
+
+    sub.add_parser('pending', help="列出待审核算法（管理员）").set_defaults(func=cmd_pending)
+
+    p = sub.add_parser('show', help="算法详情（含源码）")
+    p.add_argument('ids', type=int, nargs='+')
+    p.set_defaults(func=cmd_show)
+
+    p = sub.add_parser('download', help="下载算法源码并记录下载日志")
+    p.add_argument('id', type=int)
+    p.add_argument('-o', '--output', help="写入文件，缺省输出到 JSON")
+    p.set_defaults(func=cmd_download)
+
+    p = sub.add_parser('export', help="把已通过算法批量导出为 zip / tar.gz 压缩包")
+    p.add_argument('-o', '--output', required=True, help="输出文件，扩展名决定格式")
+    p.add_argument('--format', choices=['zip', 'tar.gz'])
+    p.add_argument('--ids', type=int, nargs='+', help="只导出这些 ID")
+    p.add_argument('--query'); p.add_argument('--tags'); p.add_argument('--category')
+    p.add_argument('--queue', action='store_true', help="提交为后台任务，由 worker 写入该路径")
+    p.add_argument('--wait', action='store_true', help="与 --queue 同用：等待任务结束")
+    p.set_defaults(func=cmd_export)
+
+    for name, action, text in (('approve', 'approved', "通过"), ('reject', 'rejected', "驳回"),
+                               ('delete', 'delete', "删除")):
+        p = sub.add_parser(name, help=f"批量{text}算法（管理员，单个事务）")
+        p.add_argument('ids', type=int, nargs='+')
+        p.set_defaults(func=_review(action))
+
+    # 以下命令提交后台任务（由 python -m worker 执行）并输出任务 ID，--wait 时等待任务结束
+    for name, func, text in (
+            ('rebuild-trending', cmd_rebuild_trending, "从下载日志与评论重建热度（管理员）"),
+            ('rebuild-cards', cmd_rebuild_cards, "按源表重建列表页的算法卡片（管理员）"),
+            ('rescore', cmd_rescore, "按当前策略分块重算所有分数，中断后从检查点继续（管理员）"),
+            ('retention', cmd_retention, "汇总、归档并删除过期的下载日志与管理员日志（管理员）")):
+        p = sub.add_parser(name, help=text)
+        p.add_argument('--wait', action='store_true', help="等待任务结束")
+        p.set_defaults(func=func)
+    sub.choices['retention'].add_argument('--days', type=int, help="保留天数，默认见 config.RETENTION_DAYS")
+
+    p = sub.add_parser('jobs', help="最近的后台任务（管理员）")
+    p.add_argument('--status', choices=['queued', 'running', 'done', 'failed'])
+    p.add_argument('--limit', type=int, default=50)
+    p.set_defaults(func=cmd_jobs)
+
+    p = sub.add_parser('job', help="后台任务状态（管理员）")
+    p.add_argument('id', type=int)
+    p.set_defaults(func=cmd_job)
+
+    p = sub.add_parser('strategy', help="查看或修改评分策略（修改需管理员）")
+    p.add_argument('--func', type=int); p.add_argument('--comment', type=int)
+    p.set_defaults(func=cmd_strategy)
+
+    sub.add_parser('stats', help="平台统计").set_defaults(func=cmd_stats)
+
+    p = sub.add_parser('export-stats', help="导出统计 CSV 到标准输出")
+    p.add_argument('type', help="数据类型，如 算法总数")
+    p.add_argument('start', help="起始日期 YYYY-MM-DD")
+    p.add_argument('end', help="结束日期 YYYY-MM-DD")
+    p.set_defaults(func=cmd_export_stats)
+
+    for name, func, text in (('benchmark', cmd_benchmark, "执行基准测试"), ('verify', cmd_verify, "正确性验证")):
+        p = sub.add_parser(name, help=text)
+        p.add_argument('ids', type=int, nargs='+')
+        p.add_argument('--force', action='store_true', help="忽略已保存的结果重新运行")
+        p.set_defaults(func=func)
+    p = sub.choices['benchmark']
+    p.add_argument('--queue', action='store_true', help="提交为后台任务（管理员）")
+    p.add_argument('--wait', action='store_true', help="与 --queue 同用：等待任务结束")
+
+    p = sub.add_parser('leaderboard', help="分类性能排行")
+    p.add_argument('category')
+    p.set_defaults(func=cmd_leaderboard)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        import logic   # 解析参数后再导入，--help 等不需要连接数据库
+        args.func(logic, args)
+    except Exception as e:
+        sys.stderr.write(json.dumps({'error': type(e).__name__, 'message': str(e)}, ensure_ascii=False) + '\n')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
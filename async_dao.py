@@ -0,0 +1,522 @@
+# async_dao.py
+"""
+异步数据访问对象：与 dao.py 中各 DAO 同名同参、返回同样的 ORM 对象，基于 SQLAlchemy asyncio 扩展。
+- 供事件循环中的服务与批处理任务使用，数百个并发查询共享一个连接池而不必各占一个线程
+- 默认驱动为 aiomysql（连接参数与同步引擎相同），可通过 config.ASYNC_DB_URL 改用 aiosqlite 等
+- 与同步 DAO 共用 models.py 中的模型，写操作同样触发 cache.py 的精确失效
+- 会话使用 expire_on_commit=False 并预加载关联，返回的对象在会话关闭后可直接访问
+- 审核、删除与评分策略更新同样带乐观锁检查与瞬时错误重试（errors.check_version，重试为 dao.retry_transient 的异步版本）
+"""
+import asyncio
+import functools
+import json
+from datetime import datetime
+
+import bcrypt
+from sqlalchemy import func, select
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.exc import StaleDataError
+
+import cache
+import cards
+import changes
+import config
+import scoring
+import trending
+import versioning
+from errors import ConcurrencyError, check_version, is_transient, retry_delay
+from models import (
+    Base,
+    User,
+    Algorithm,
+    AlgorithmVersion,
+    AnalysisResult,
+    Comment,
+    AdminLog,
+    DownloadLog,
+    DownloadDaily,
+    ScoringStrategy,
+)
+
+_engine = None
+_sessionmaker = None
+
+
+def database_url() -> str:
+    return config.ASYNC_DB_URL or (
+        f"mysql+aiomysql://{config.APP_DB_USER}:{config.APP_DB_PWD}"
+        f"@{config.DB_HOST}/{config.DB_NAME}?charset=utf8mb4"
+    )
+
+
+def get_engine():
+    """首次使用时创建异步引擎（驱动在此时导入）"""
+    global _engine, _sessionmaker
+    if _engine is None:
+        url = database_url()
+        options = {'echo': False}
+        if not url.startswith('sqlite'):
+            options.update(pool_size=config.DB_POOL_SIZE, max_overflow=config.DB_MAX_OVERFLOW,
+                           pool_pre_ping=True, pool_recycle=3600)
+        _engine = create_async_engine(url, **options)
+        _sessionmaker = async_sessionmaker(_engine, expire_on_commit=False, autoflush=False)
+    return _engine
+
+
+def AsyncSessionLocal():
+    get_engine()
+    return _sessionmaker()
+
+
+async def init_models():
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def dispose():
+    """关闭连接池（事件循环结束前调用）"""
+    global _engine, _sessionmaker
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = _sessionmaker = None
+
+
+def _retry_transient(fn):
+    """与 dao.retry_transient 相同，退避期间让出事件循环"""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        for attempt in range(config.DB_RETRY_ATTEMPTS):
+            try:
+                return await fn(*args, **kwargs)
+            except StaleDataError as e:
+                raise ConcurrencyError("记录已被其他操作修改，请刷新后重试") from e
+            except DBAPIError as e:
+                if not is_transient(e) or attempt == config.DB_RETRY_ATTEMPTS - 1:
+                    raise
+                await asyncio.sleep(retry_delay(attempt))
+    return wrapper
+
+
+async def _strategy_weights(session) -> dict:
+    return scoring.strategy_weights(await session.get(ScoringStrategy, 1))
+
+
+async def _refresh_cards(session, algo_ids: list = None):
+    """与 dao.CardDAO.refresh 相同：在调用方事务中按源表重算卡片"""
+    await session.flush()
+    for stmt in cards.refresh(algo_ids):
+        await session.execute(stmt)
+
+
+async def _append_changes(session, entries: list):
+    """与 dao.ChangeLogDAO.append 相同：在调用方事务末尾分配序号并追加变更"""
+    await session.flush()
+    await session.execute(changes.reserve(len(entries)))
+    last = (await session.execute(changes.head())).first()[0]
+    stmt, params = changes.insert_rows(last, entries, datetime.utcnow())
+    await session.execute(stmt, params)
+
+
+async def _bump_trending(session, events: list):
+    """与 dao.TrendingDAO.bump 相同：在调用方事务中以一条 upsert 累加热度"""
+    deltas = {}
+    for algo_id, kind, when in events:
+        deltas[algo_id] = trending.logaddexp(deltas.get(algo_id), trending.event_log_weight(kind, when))
+    if deltas:
+        await session.execute(trending.upsert(session.bind.dialect.name, deltas, datetime.utcnow()))
+
+
+# 用户数据访问对象
+class AsyncUserDAO:
+    @staticmethod
+    async def create_user(username: str, password: str, role: str = 'user') -> User:
+        # bcrypt 为 CPU 密集计算，放到线程中执行以免阻塞事件循环
+        pwd_hash = (await asyncio.to_thread(bcrypt.hashpw, password.encode(), bcrypt.gensalt())).decode()
+        async with AsyncSessionLocal() as session:
+            try:
+                user = User(username=username, password_hash=pwd_hash, role=role)
+                session.add(user)
+                await session.commit()
+                await session.refresh(user)
+                return user
+            except SQLAlchemyError:
+                await session.rollback()
+                raise
+
+    @staticmethod
+    async def get_by_username(username: str) -> User:
+        async with AsyncSessionLocal() as session:
+            return (await session.execute(select(User).filter_by(username=username))).scalars().first()
+
+    @staticmethod
+    async def authenticate(username: str, password: str) -> User:
+        user = await AsyncUserDAO.get_by_username(username)
+        if user and await asyncio.to_thread(bcrypt.checkpw, password.encode(), user.password_hash.encode()):
+            return user
+        return None
+
+# 算法数据访问对象
+class AsyncAlgorithmDAO:
+    @staticmethod
+    async def upload(owner_id: int, title: str, description: str,
+                     tags: str, category: str, code_text: str) -> Algorithm:
+        async with AsyncSessionLocal() as session:
+            try:
+                score = scoring.score(code_text, await _strategy_weights(session))
+                algo = Algorithm(
+                    owner_id=owner_id,
+                    title=title,
+                    description=description,
+                    tags=tags,
+                    category=category,
+                    code=code_text,
+                    score=score,
+                    status='pending'
+                )
+                session.add(algo)
+                await session.flush()
+                await _append_changes(session, [changes.entry('algorithm', algo.id, 'upload')])
+                await session.commit()
+                await session.refresh(algo)
+                return algo
+            except SQLAlchemyError:
+                await session.rollback()
+                raise
+
+    @staticmethod
+    async def upload_version(algo_id: int, code_text: str) -> Algorithm:
+        async with AsyncSessionLocal() as session:
+            try:
+                algo = await session.get(Algorithm, algo_id)
+                if algo is None:
+                    raise ValueError(f"算法不存在：{algo_id}")
+                score = scoring.score(code_text, await _strategy_weights(session))
+                session.add(AlgorithmVersion(
+                    algorithm_id=algo.id,
+                    version=algo.version,
+                    delta=versioning.make_delta(code_text, algo.code),
+                    score=algo.score
+                ))
+                algo.code    = code_text
+                algo.version = algo.version + 1
+                algo.score   = score
+                algo.status  = 'pending'
+                await _refresh_cards(session, [algo_id])
+                await _append_changes(session, [changes.entry('algorithm', algo_id, 'new_version')])
+                await session.commit()
+                await session.refresh(algo)
+                cache.invalidate_algorithm(algo_id)
+                return algo
+            except SQLAlchemyError:
+                await session.rollback()
+                raise
+
+    @staticmethod
+    async def get_versions(algo_id: int) -> list[dict]:
+        async with AsyncSessionLocal() as session:
+            algo = await session.get(Algorithm, algo_id)
+            if algo is None:
+                return []
+            rows = (await session.execute(
+                select(
+                    AlgorithmVersion.version,
+                    AlgorithmVersion.score,
+                    AlgorithmVersion.archived_at,
+                    func.length(AlgorithmVersion.delta)
+                )
+                .filter(AlgorithmVersion.algorithm_id == algo_id)
+                .order_by(AlgorithmVersion.version.asc())
+            )).all()
+            versions = []
+            created = algo.created_at
+            for version, score, archived_at, size in rows:
+                versions.append({'version': version, 'score': score,
+                                 'created_at': created, 'delta_size': size})
+                created = archived_at
+            versions.append({'version': algo.version, 'score': algo.score,
+                             'created_at': created, 'delta_size': None})
+            return versions
+
+    @staticmethod
+    async def get_version_code(algo_id: int, version: int) -> str:
+        return (await AsyncAlgorithmDAO.get_version_codes(algo_id, [version]))[version]
+
+    @staticmethod
+    async def get_version_codes(algo_id: int, versions: list[int]) -> dict:
+        async with AsyncSessionLocal() as session:
+            algo = await session.get(Algorithm, algo_id)
+            if algo is None:
+                raise ValueError(f"算法不存在：{algo_id}")
+            wanted = set(versions)
+            result = {}
+            text = algo.code
+            if algo.version in wanted:
+                result[algo.version] = text
+            lowest = min(wanted)
+            if lowest < algo.version:
+                deltas = (await session.execute(
+                    select(AlgorithmVersion.version, AlgorithmVersion.delta)
+                    .filter(AlgorithmVersion.algorithm_id == algo_id,
+                            AlgorithmVersion.version >= lowest)
+                    .order_by(AlgorithmVersion.version.desc())
+                )).all()
+                for version, delta in deltas:
+                    text = versioning.apply_delta(text, delta)
+                    if version in wanted:
+                        result[version] = text
+            missing = wanted - result.keys()
+            if missing:
+                raise ValueError(f"版本不存在：v{min(missing)}")
+            return result
+
+    @staticmethod
+    async def get_approved(query: str = None, tags: str = None, category: str = None) -> list[Algorithm]:
+        async with AsyncSessionLocal() as session:
+            q = select(Algorithm).options(joinedload(Algorithm.owner)).filter(Algorithm.status == 'approved')
+            if query:
+                q = q.filter(Algorithm.title.ilike(f"%{query}%"))
+            if tags:
+                q = q.filter(Algorithm.tags.ilike(f"%{tags}%"))
+            if category:
+                q = q.filter(Algorithm.category == category)
+            return (await session.execute(q)).scalars().all()
+
+    @staticmethod
+    async def get_pending() -> list[Algorithm]:
+        async with AsyncSessionLocal() as session:
+            return (await session.execute(
+                select(Algorithm)
+                .options(joinedload(Algorithm.owner))
+                .filter_by(status='pending')
+            )).scalars().all()
+
+    @staticmethod
+    async def get_detail(algo_id: int) -> Algorithm:
+        async with AsyncSessionLocal() as session:
+            return await session.get(Algorithm, algo_id, options=[joinedload(Algorithm.owner)])
+
+    @staticmethod
+    @_retry_transient
+    async def review(admin_id: int, algo_id: int, action: str, row_version: int = None):
+        async with AsyncSessionLocal() as session:
+            try:
+                algo = await session.get(Algorithm, algo_id)
+                check_version(algo, row_version, f"算法 {algo_id} ")
+                algo.status = action
+                session.add(AdminLog(
+                    admin_id=admin_id,
+                    action=f"{action}",
+                    target_type='algorithm',
+                    target_id=algo_id
+                ))
+                await _refresh_cards(session, [algo_id])
+                await _append_changes(session, [changes.entry('algorithm', algo_id, action)])
+                title, tags, category = algo.title, algo.tags, algo.category
+                await session.commit()
+                cache.invalidate_algorithm(algo_id, title, tags, category)
+            except SQLAlchemyError:
+                await session.rollback()
+                raise
+
+    @staticmethod
+    @_retry_transient
+    async def delete(algo_id: int, row_version: int = None):
+        async with AsyncSessionLocal() as session:
+            try:
+                algo = await session.get(Algorithm, algo_id)
+                check_version(algo, row_version, f"算法 {algo_id} ")
+                await session.delete(algo)   # 级联删除的子对象在此处加载
+                await _append_changes(session, [changes.entry('algorithm', algo_id, 'delete')])
+                await session.commit()
+                cache.invalidate_algorithm(algo_id)
+            except SQLAlchemyError:
+                await session.rollback()
+                raise
+
+    @staticmethod
+    async def recalculate_all_scores():
+        async with AsyncSessionLocal() as session:
+            try:
+                weights = await _strategy_weights(session)
+                for algo in (await session.execute(select(Algorithm))).scalars():
+                    algo.score = scoring.score(algo.code, weights)
+                await _refresh_cards(session)
+                await _append_changes(session, [changes.entry('strategy', 1, 'rescored')])
+                await session.commit()
+                cache.invalidate_lists()
+            except:
+                await session.rollback()
+                raise
+
+# 执行分析结果数据访问对象
+class AsyncAnalysisDAO:
+    @staticmethod
+    async def save(algo_id: int, kind: str, code_hash: str, status: str,
+                   metric: float, result: dict, corpus_version: int = None) -> AnalysisResult:
+        async with AsyncSessionLocal() as session:
+            try:
+                row = (await session.execute(
+                    select(AnalysisResult).filter_by(algorithm_id=algo_id, kind=kind)
+                )).scalars().first()
+                if row is None:
+                    row = AnalysisResult(algorithm_id=algo_id, kind=kind)
+                    session.add(row)
+                row.code_hash      = code_hash
+                row.corpus_version = corpus_version
+                row.status         = status
+                row.metric         = metric
+                row.result         = json.dumps(result, ensure_ascii=False)
+                row.created_at     = datetime.utcnow()
+                await session.commit()
+                await session.refresh(row)
+                return row
+            except SQLAlchemyError:
+                await session.rollback()
+                raise
+
+    @staticmethod
+    async def get(algo_id: int, kind: str) -> AnalysisResult:
+        async with AsyncSessionLocal() as session:
+            return (await session.execute(
+                select(AnalysisResult).filter_by(algorithm_id=algo_id, kind=kind)
+            )).scalars().first()
+
+    @staticmethod
+    async def get_many(algo_ids: list[int], kind: str) -> dict:
+        if not algo_ids:
+            return {}
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(
+                select(AnalysisResult)
+                .filter(AnalysisResult.kind == kind,
+                        AnalysisResult.algorithm_id.in_(algo_ids))
+            )).scalars().all()
+            return {r.algorithm_id: r for r in rows}
+
+# 评论数据访问对象
+class AsyncCommentDAO:
+    @staticmethod
+    @_retry_transient
+    async def add(user_id: int, algo_id: int, rating: int, content: str) -> Comment:
+        async with AsyncSessionLocal() as session:
+            try:
+                c = Comment(
+                    user_id=user_id,
+                    algorithm_id=algo_id,
+                    rating=rating,
+                    content=content
+                )
+                session.add(c)
+                await _bump_trending(session, [(algo_id, 'comment', datetime.utcnow())])
+                await session.execute(cards.comment_added(algo_id, rating))
+                await session.flush()
+                await _append_changes(session, [changes.entry('comment', c.id, 'add', algo_id)])
+                await session.commit()
+                await session.refresh(c)
+                cache.invalidate_comments(algo_id)
+                return c
+            except SQLAlchemyError:
+                await session.rollback()
+                raise
+
+    @staticmethod
+    async def get_by_algo(algo_id: int) -> list[Comment]:
+        async with AsyncSessionLocal() as session:
+            return (await session.execute(
+                select(Comment)
+                .options(joinedload(Comment.user))
+                .filter_by(algorithm_id=algo_id)
+                .order_by(Comment.created_at.asc())
+            )).scalars().all()
+
+    @staticmethod
+    async def delete(comment_id: int):
+        async with AsyncSessionLocal() as session:
+            try:
+                c = await session.get(Comment, comment_id)
+                if c:
+                    algo_id = c.algorithm_id
+                    await session.delete(c)
+                    await _refresh_cards(session, [algo_id])
+                    await _append_changes(session, [changes.entry('comment', comment_id, 'delete', algo_id)])
+                    await session.commit()
+                    cache.invalidate_comments(algo_id)
+            except:
+                await session.rollback()
+                raise
+
+# 下载日志数据访问对象
+class AsyncDownloadLogDAO:
+    @staticmethod
+    @_retry_transient
+    async def record(user_id: int, algo_id: int) -> DownloadLog:
+        async with AsyncSessionLocal() as session:
+            try:
+                dl = DownloadLog(user_id=user_id, algorithm_id=algo_id)
+                session.add(dl)
+                await _bump_trending(session, [(algo_id, 'download', datetime.utcnow())])
+                await session.execute(*cards.downloaded([algo_id]))
+                await session.commit()
+                await session.refresh(dl)
+                return dl
+            except SQLAlchemyError:
+                await session.rollback()
+                raise
+
+# 平台统计数据访问对象
+class AsyncStatsDAO:
+    @staticmethod
+    async def get_stats() -> dict:
+        async with AsyncSessionLocal() as session:
+            async def count(model, *criteria):
+                return (await session.execute(select(func.count()).select_from(model).filter(*criteria))).scalar()
+            return {
+                'total_users':         await count(User),
+                'total_algorithms':    await count(Algorithm),
+                'pending_algorithms':  await count(Algorithm, Algorithm.status == 'pending'),
+                'approved_algorithms': await count(Algorithm, Algorithm.status == 'approved'),
+                'rejected_algorithms': await count(Algorithm, Algorithm.status == 'rejected'),
+                'total_comments':      await count(Comment),
+                'total_downloads':     await count(DownloadLog) + (await session.execute(
+                    select(func.coalesce(func.sum(DownloadDaily.count), 0)))).scalar(),
+            }
+
+# 评分策略数据访问对象
+class AsyncScoringStrategyDAO:
+    @staticmethod
+    async def get_strategy():
+        async with AsyncSessionLocal() as session:
+            return await session.get(ScoringStrategy, 1)
+
+    @staticmethod
+    @_retry_transient
+    async def update(admin_id: int, func_weight: int, comment_weight: int, row_version: int = None):
+        async with AsyncSessionLocal() as session:
+            try:
+                strat = await session.get(ScoringStrategy, 1)
+                check_version(strat, row_version, "评分策略")
+                strat.func_weight    = func_weight
+                strat.comment_weight = comment_weight
+                session.add(AdminLog(
+                    admin_id=admin_id,
+                    action=f"update_scoring(func={func_weight}, comment={comment_weight})",
+                    target_type='scoring_strategy',
+                    target_id=1
+                ))
+                await _append_changes(session, [changes.entry('strategy', 1, 'update')])
+                await session.commit()
+            except:
+                await session.rollback()
+                raise
+
+    @staticmethod
+    async def get_history() -> list[AdminLog]:
+        async with AsyncSessionLocal() as session:
+            return (await session.execute(
+                select(AdminLog)
+                .options(joinedload(AdminLog.admin))
+                .filter(AdminLog.target_type == 'scoring_strategy')
+                .order_by(AdminLog.timestamp.desc())
+            )).scalars().all()
@@ -0,0 +1,89 @@
+# autocomplete.py
+"""
+检索框的输入提示：已通过算法的标题与标签的内存前缀索引。
+- 索引为按键排序的 (键, 类型, 文本) 列表，键为小写后的标题、标题中每个词开头的后缀（输入 "sort" 也能提示
+  "Quick sort"）与各标签；查询以 bisect 定位前缀的起点，向后扫描至前缀不再匹配或凑满 limit 条，
+  不访问数据库，耗时与索引规模近似无关
+- 同一 (类型, 文本) 可能来自多个算法，按引用计数维护，最后一个算法移除时才从列表中删除
+- GUI 登录时从卡片表整体载入，之后按变更日志增量 add / remove（见 gui.App._poll_changes）
+"""
+import re
+from bisect import bisect_left, insort
+
+_TAG_SEP = re.compile(r'[,，]')
+
+
+def _keys(kind: str, text: str) -> set:
+    key = text.strip().casefold()
+    if not key:
+        return set()
+    keys = {key}
+    if kind == 'title':
+        keys.update(key[m.start():] for m in re.finditer(r'(?<=\s)\S', key))
+    return keys
+
+
+def _terms(title: str, tags: str) -> set:
+    terms = {('title', title.strip())} if title and title.strip() else set()
+    terms.update(('tag', t.strip()) for t in _TAG_SEP.split(tags or '') if t.strip())
+    return terms
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._entries = []   # 按键排序的 (键, 类型, 文本)
+        self._refs = {}      # (类型, 文本) -> 引用它的算法数
+        self._terms = {}     # algo_id -> {(类型, 文本)}
+
+    def __len__(self):
+        return len(self._terms)
+
+    def load(self, rows):
+        """rows 为 (algo_id, 标题, 标签) 的可迭代对象，整体重建索引"""
+        self._refs, self._terms = {}, {}
+        for algo_id, title, tags in rows:
+            terms = _terms(title, tags)
+            self._terms[algo_id] = terms
+            for term in terms:
+                self._refs[term] = self._refs.get(term, 0) + 1
+        self._entries = sorted({(key,) + term for term in self._refs for key in _keys(*term)})
+
+    def add(self, algo_id: int, title: str, tags: str):
+        """加入（或更新）一个算法"""
+        self.remove(algo_id)
+        terms = _terms(title, tags)
+        self._terms[algo_id] = terms
+        for term in terms:
+            n = self._refs.get(term, 0)
+            self._refs[term] = n + 1
+            if n == 0:
+                for key in _keys(*term):
+                    insort(self._entries, (key,) + term)
+
+    def remove(self, algo_id: int):
+        for term in self._terms.pop(algo_id, ()):
+            n = self._refs.pop(term) - 1
+            if n:
+                self._refs[term] = n
+                continue
+            for key in _keys(*term):
+                i = bisect_left(self._entries, (key,) + term)
+                if i < len(self._entries) and self._entries[i] == (key,) + term:
+                    del self._entries[i]
+
+    def suggest(self, prefix: str, limit: int = 10) -> list:
+        """以 prefix 开头（不区分大小写）的标题与标签，返回 [(类型, 文本)]，类型为 'title' 或 'tag'"""
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return []
+        result, seen = [], set()
+        i = bisect_left(self._entries, (prefix,))
+        while i < len(self._entries) and len(result) < limit:
+            key, kind, text = self._entries[i]
+            if not key.startswith(prefix):
+                break
+            if (kind, text) not in seen:
+                seen.add((kind, text))
+                result.append((kind, text))
+            i += 1
+        return result
@@ -0,0 +1,192 @@
+# benchmark.py
+"""
+执行基准测试：按算法分类生成标准输入，在隔离子进程（见 sandbox.py）中调用入口函数，
+测量每组输入的墙钟时间、CPU 时间与内存峰值（tracemalloc），以及子进程常驻内存峰值。
+"""
+import ast
+import random
+
+import config
+import sandbox
+
+# 分类 -> 入口函数名称提示、参数个数、是否需要每次调用前复制输入、每次计时的调用次数
+CATEGORY_SPECS = {
+    '排序':     {'hints': ('sort',), 'arity': 1, 'copy': True, 'loops': 1},
+    '查找':     {'hints': ('search', 'find', 'bisect'), 'arity': 2, 'copy': False, 'loops': 1000},
+    '图算法':   {'hints': ('kruskal', 'prim', 'mst', 'dijkstra', 'graph'), 'arity': 1, 'copy': True, 'loops': 1},
+    '动态规划': {'hints': ('knapsack', 'dp'), 'arity': 3, 'copy': True, 'loops': 1},
+}
+
+# 各分类的标准输入规模
+STANDARD_SIZES = {
+    '排序':     (100, 500, 2000),
+    '查找':     (1000, 100000, 1000000),
+    '图算法':   (100, 1000, 5000),
+    '动态规划': (20, 50, 100),
+}
+
+SEED = 20240601
+
+
+def _sort_input(n: int, rng: random.Random) -> tuple:
+    return ([rng.randint(0, n * 10) for _ in range(n)],)
+
+
+def _search_input(n: int, rng: random.Random) -> tuple:
+    """目标固定取 3/4 处的元素：随机位置会让线性查找在各规模上的耗时不可比（复杂度估算据此拟合）"""
+    data = sorted(rng.sample(range(n * 10), n))
+    return (data, data[3 * n // 4])
+
+
+def _graph_input(n: int, rng: random.Random) -> tuple:
+    """连通无向带权图，邻接表形式 {u: [(v, w), ...]}，与 Kruskal 示例一致；约 3n 条边"""
+    graph = {u: [] for u in range(n)}
+
+    def add(u, v):
+        w = rng.randint(1, 1000)
+        graph[u].append((v, w))
+        graph[v].append((u, w))
+
+    for v in range(1, n):
+        add(rng.randrange(v), v)   # 随机生成树保证连通
+    for _ in range(2 * n):
+        u, v = rng.randrange(n), rng.randrange(n)
+        if u != v:
+            add(u, v)
+    return (graph,)
+
+
+def _knapsack_input(n: int, rng: random.Random) -> tuple:
+    weights = [rng.randint(1, 50) for _ in range(n)]
+    values = [rng.randint(1, 100) for _ in range(n)]
+    return (weights, values, sum(weights) // 2)
+
+
+INPUT_BUILDERS = {
+    '排序':     _sort_input,
+    '查找':     _search_input,
+    '图算法':   _graph_input,
+    '动态规划': _knapsack_input,
+}
+
+
+def find_entry(code_text: str, category: str):
+    """
+    选择入口函数：优先名称包含分类提示词的顶层函数，其次参数个数匹配的顶层函数，
+    最后退化为第一个顶层函数；没有顶层函数时返回 None。
+    """
+    spec = CATEGORY_SPECS.get(category, {'hints': (), 'arity': None})
+    funcs = [n for n in ast.parse(code_text).body
+             if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+    for f in funcs:
+        if any(h in f.name.lower() for h in spec['hints']):
+            return f.name
+    for f in funcs:
+        args = f.args.posonlyargs + f.args.args
+        required = len(args) - len(f.args.defaults)
+        if spec['arity'] is not None and required <= spec['arity'] <= len(args):
+            return f.name
+    return funcs[0].name if funcs else None
+
+
+def build_cases(category: str, sizes=None) -> list:
+    """生成某分类的标准输入（固定随机种子，可复现）"""
+    builder = INPUT_BUILDERS[category]
+    loops = CATEGORY_SPECS[category]['loops']
+    rng = random.Random(SEED)
+    return [{'name': f"{category}-{n}", 'size': n, 'args': builder(n, rng), 'loops': loops}
+            for n in (sizes or STANDARD_SIZES[category])]
+
+
+def default_limits() -> sandbox.Limits:
+    return sandbox.Limits(config.BENCH_CPU_SECONDS, config.BENCH_WALL_SECONDS, config.BENCH_MEMORY_MB)
+
+
+# 空入口函数：与被测算法在同样的输入上运行，父进程测得的 CPU 时间即启动、载入与复制输入的开销
+BASELINE_CODE = "def noop(*args):\n    return None\n"
+
+
+def baseline_payload(payload: dict) -> dict:
+    return dict(payload, code=BASELINE_CODE, entry='noop')
+
+
+def understated(result: dict, baseline: dict, payload: dict):
+    """
+    子进程报告的耗时可被上传代码伪造：父进程测得的 CPU 时间扣除基线（同一输入上的空入口函数）
+    及测量误差（sandbox.CPU_TOLERANCE）后，即计时轮次至少用去的时间（payload 须关闭 trace_memory 且 repeat=1，报告的 CPU 时间才恰为计时轮次之和）。
+    报告的 CPU 时间低于它时返回问题描述，否则返回 None；无法测量时不做判断
+    """
+    if result.get('process_cpu') is None or baseline.get('status') != 'ok' or baseline.get('process_cpu') is None:
+        return None
+    ratio, slack = sandbox.CPU_TOLERANCE
+    floor = result['process_cpu'] - baseline['process_cpu'] * ratio - slack
+    claimed = sum(c['cpu'] * case.get('loops', 1) * payload.get('repeat', 1)
+                  for c, case in zip(result['cases'], payload['cases']))
+    if floor > claimed:
+        return f"报告的 CPU 时间 {claimed:.3f}s 低于父进程测得的 {floor:.3f}s（已扣除基线），结果不可信"
+    return None
+
+
+def make_payload(code_text: str, category: str, sizes=None):
+    """构造基准测试任务；分类不支持或找不到入口函数时返回 (None, 错误信息)"""
+    if category not in INPUT_BUILDERS:
+        return None, f"不支持的分类：{category}"
+    try:
+        entry = find_entry(code_text, category)
+    except SyntaxError as e:
+        return None, f"语法错误：{e}"
+    if entry is None:
+        return None, "找不到入口函数"
+    return {
+        'mode': 'benchmark',
+        'code': code_text,
+        'entry': entry,
+        'repeat': config.BENCH_REPEAT,
+        'copy_args': CATEGORY_SPECS[category]['copy'],
+        'cases': build_cases(category, sizes),
+    }, None
+
+
+def summarize(result: dict, entry: str = None) -> dict:
+    """在子进程结果上补充汇总字段：总墙钟时间、最大内存峰值"""
+    cases = result.get('cases') or []
+    result['entry'] = entry
+    result['wall_time'] = sum(c['wall'] for c in cases) if cases else None
+    result['peak_memory'] = max((c['peak_bytes'] for c in cases), default=None)
+    return result
+
+
+def run_benchmarks(items: list) -> list:
+    """
+    items 为 [(code_text, category), ...]，在子进程池中并发执行，返回对应的结果列表。
+    """
+    payloads, errors = [], []
+    for code_text, category in items:
+        payload, error = make_payload(code_text, category)
+        payloads.append(payload)
+        errors.append(error)
+    runnable = [p for p in payloads if p is not None]
+    outputs = iter(sandbox.run_many(runnable, default_limits(), config.BENCH_WORKERS))
+    results = []
+    for payload, error in zip(payloads, errors):
+        if payload is None:
+            results.append({'status': 'error', 'error': error})
+        else:
+            results.append(summarize(next(outputs), payload['entry']))
+    return results
+
+
+def run_benchmark(code_text: str, category: str) -> dict:
+    return run_benchmarks([(code_text, category)])[0]
+
+
+def format_result(result: dict) -> str:
+    """供界面展示的多行文本"""
+    if result.get('status') != 'ok':
+        return f"状态：{result.get('status')}  {result.get('error', '')}"
+    lines = [f"入口函数：{result['entry']}  总耗时：{result['wall_time'] * 1000:.2f} ms  "
+             f"进程内存峰值：{result.get('max_rss', 0) / 2**20:.1f} MB"]
+    for c in result['cases']:
+        lines.append(f"  {c['name']}: {c['wall'] * 1000:.3f} ms (CPU {c['cpu'] * 1000:.3f} ms)  "
+                     f"内存峰值 {c['peak_bytes'] / 1024:.1f} KB")
+    return '\n'.join(lines)
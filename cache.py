@@ -0,0 +1,167 @@
+# cache.py
+"""
+查询结果缓存：为 logic 层的只读接口（算法列表、算法详情、评论列表）提供有界的 LRU + TTL 缓存。
+- 键由规范化后的查询参数组成，相同语义的查询命中同一条目
+- 失效由 dao 层写路径主动触发（审核、删除、重算分数、评论增删），按算法精确失效
+- 提供命中/未命中/淘汰/失效统计
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import config
+
+
+def normalize_text(value):
+    """去除首尾空白并统一小写（检索使用 ilike，大小写不敏感）；空串视为 None"""
+    if value is None:
+        return None
+    value = value.strip().lower()
+    return value or None
+
+
+def list_key(query=None, tags=None, category=None) -> tuple:
+    """算法列表的缓存键"""
+    category = category.strip() if category else None
+    return ('list', normalize_text(query), normalize_text(tags), category or None)
+
+
+def detail_key(algo_id: int) -> tuple:
+    return ('detail', int(algo_id))
+
+
+def comments_key(algo_id: int) -> tuple:
+    return ('comments', int(algo_id))
+
+
+class TTLCache:
+    """
+    线程安全的有界 LRU 缓存，每个条目带过期时间。
+    条目可附带一组依赖的算法 ID，用于按算法精确失效。
+    每次失效递增代数 generation：加载期间发生过失效的结果可能已过时，不写入缓存。
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (expires_at, value, algo_ids)
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.generation = 0
+
+    def get(self, key):
+        """命中返回 (True, value)，否则返回 (False, None)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, key, value, algo_ids=()):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value, frozenset(algo_ids))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader, ids_of=None):
+        """
+        命中直接返回；否则调用 loader() 加载，加载期间没有发生失效时写入缓存。
+        ids_of(value) 返回该条目依赖的算法 ID 集合。
+        """
+        hit, value = self.get(key)
+        if hit:
+            return value
+        generation = self.generation
+        value = loader()
+        with self._lock:
+            if self.generation == generation:
+                self.put(key, value, ids_of(value) if ids_of else ())
+        return value
+
+    def invalidate(self, predicate):
+        """删除所有满足 predicate(key, algo_ids) 的条目，返回删除数量"""
+        with self._lock:
+            self.generation += 1
+            doomed = [k for k, (_, _, ids) in self._data.items() if predicate(k, ids)]
+            for k in doomed:
+                del self._data[k]
+            self.invalidations += len(doomed)
+            return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries':       len(self._data),
+                'max_entries':   self.max_entries,
+                'ttl':           self.ttl,
+                'hits':          self.hits,
+                'misses':        self.misses,
+                'hit_rate':      self.hits / lookups if lookups else 0.0,
+                'evictions':     self.evictions,
+                'expirations':   self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+
+# 进程内共享的目录缓存
+catalog_cache = TTLCache(config.CACHE_MAX_ENTRIES, config.CACHE_TTL_SECONDS)
+
+
+def _list_matches(key, title, tags, category) -> bool:
+    """判断某个算法是否满足列表缓存键对应的过滤条件（与 AlgorithmDAO.get_approved 一致）"""
+    _, query, tag_q, cat_q = key
+    if query and query not in (title or '').lower():
+        return False
+    if tag_q and tag_q not in (tags or '').lower():
+        return False
+    if cat_q and cat_q != category:
+        return False
+    return True
+
+
+def invalidate_algorithm(algo_id: int, title=None, tags=None, category=None):
+    """
+    某算法发生变化（状态、分数、删除）时调用：
+    - 删除该算法的详情与评论条目
+    - 删除包含该算法的列表条目
+    - 若给出了 title/tags/category，同时删除过滤条件命中该算法的列表条目（新通过的算法会出现在这些列表中）
+    """
+    def predicate(key, ids):
+        if key[0] in ('detail', 'comments'):
+            return key[1] == algo_id
+        if algo_id in ids:
+            return True
+        return title is not None and _list_matches(key, title, tags, category)
+    catalog_cache.invalidate(predicate)
+
+
+def invalidate_comments(algo_id: int):
+    """评论增删时调用，只影响该算法的评论列表"""
+    key = comments_key(algo_id)
+    catalog_cache.invalidate(lambda k, ids: k == key)
+
+
+def invalidate_lists():
+    """批量重算分数等影响所有列表的操作"""
+    catalog_cache.invalidate(lambda k, ids: k[0] in ('list', 'detail'))
@@ -0,0 +1,72 @@
+# cards.py
+"""
+算法卡片读模型（algorithm_cards）的维护语句。
+列表页只读这一张表：作者名、评论数、评分和、下载数都已预先写入，查询时不做连接或聚合。
+这里只构造 Core 语句、不持有会话，由 dao.py 与 async_dao.py 在修改源表的同一事务中执行
+（执行前须先 flush，使语句能看到本事务内的 ORM 修改）：
+- refresh(ids)：按源表重算这些算法的卡片（未通过或已删除的算法删除卡片），用于上传新版本、审核、删评论、重算分数
+- comment_added / downloaded：新评论、新下载只对计数做增量 UPDATE
+"""
+from sqlalchemy import bindparam, delete, func, insert, select, update
+
+from models import Algorithm, AlgorithmCard, Comment, DownloadDaily, DownloadLog, User
+
+_cards = AlgorithmCard.__table__
+
+COLUMNS = ('algorithm_id', 'title', 'owner_id', 'owner_name', 'tags', 'category', 'version', 'score',
+           'rating_sum', 'rating_count', 'comment_count', 'download_count', 'created_at')
+
+
+def _source(algo_ids=None):
+    """从源表计算卡片各列的 SELECT（与 COLUMNS 顺序一致）"""
+    def scalar(expr, model, where=None):
+        q = select(expr).where(model.algorithm_id == Algorithm.id)
+        if where is not None:
+            q = q.where(where)
+        return func.coalesce(q.scalar_subquery(), 0)
+
+    q = (
+        select(
+            Algorithm.id, Algorithm.title, Algorithm.owner_id, User.username,
+            Algorithm.tags, Algorithm.category, Algorithm.version, Algorithm.score,
+            scalar(func.sum(Comment.rating), Comment),
+            scalar(func.count(Comment.rating), Comment),
+            scalar(func.count(), Comment),
+            scalar(func.count(), DownloadLog) + scalar(func.sum(DownloadDaily.count), DownloadDaily),
+            Algorithm.created_at,
+        )
+        .join(User, Algorithm.owner_id == User.id)
+        .where(Algorithm.status == 'approved')
+    )
+    if algo_ids is not None:
+        q = q.where(Algorithm.id.in_(algo_ids))
+    return q
+
+
+def refresh(algo_ids=None) -> list:
+    """重算给定算法（None 为全部）卡片的语句列表：先删除，再从源表插入仍为已通过的行"""
+    drop = delete(_cards)
+    if algo_ids is not None:
+        algo_ids = list(algo_ids)
+        drop = drop.where(_cards.c.algorithm_id.in_(algo_ids))
+    return [drop, insert(_cards).from_select(COLUMNS, _source(algo_ids))]
+
+
+def comment_added(algo_id: int, rating: int):
+    values = {'comment_count': _cards.c.comment_count + 1}
+    if rating is not None:
+        values.update(rating_sum=_cards.c.rating_sum + rating, rating_count=_cards.c.rating_count + 1)
+    return update(_cards).where(_cards.c.algorithm_id == algo_id).values(values)
+
+
+def downloaded(algo_ids: list) -> tuple:
+    """返回 (语句, 参数列表)，按算法合并为每个算法一次 +n"""
+    counts = {}
+    for aid in algo_ids:
+        counts[aid] = counts.get(aid, 0) + 1
+    stmt = (
+        update(_cards)
+        .where(_cards.c.algorithm_id == bindparam('aid'))
+        .values(download_count=_cards.c.download_count + bindparam('n'))
+    )
+    return stmt, [{'aid': aid, 'n': n} for aid, n in counts.items()]
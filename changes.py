@@ -0,0 +1,66 @@
+# changes.py
+"""
+变更日志（change_log）的维护语句。上传、新版本、审核、删除、评论与评分策略的写路径在修改源表的同一事务中
+追加变更；客户端记住读到的序号，轮询 logic.get_changes(since) 只取之后的变更，就地更新已打开的列表与详情窗口。
+这里只构造 Core 语句、不持有会话，由 dao.py 与 async_dao.py 执行：
+- 序号从单行计数器 change_counter 分配。UPDATE 计数器持有行锁直到事务提交，后分配序号的事务必然后提交，
+  读方看到序号 n 时小于 n 的变更都已提交，按序号增量读取不会漏掉晚提交的事务
+- 计数器在事务末尾（ORM 修改 flush 之后、提交之前）才更新，行锁只覆盖提交本身
+- 旧变更由 retention.py 按 CHANGE_LOG_DAYS 清理，计数器的 pruned 为已清理到的序号
+"""
+from sqlalchemy import delete, func, insert, select, update
+
+from models import ChangeCounter, ChangeLog
+
+_log = ChangeLog.__table__
+_counter = ChangeCounter.__table__
+
+# 变更类型：(entity, action)
+ACTIONS = {
+    'algorithm': ('upload', 'new_version', 'approved', 'rejected', 'delete'),
+    'comment':   ('add', 'delete'),
+    'strategy':  ('update', 'rescored'),
+}
+
+
+def entry(entity: str, entity_id: int, action: str, algorithm_id: int = None) -> dict:
+    """一条变更；algorithm 实体的 algorithm_id 即自身 ID"""
+    if action not in ACTIONS.get(entity, ()):
+        raise ValueError(f"未知的变更类型：{entity}.{action}")
+    if entity == 'algorithm':
+        algorithm_id = entity_id
+    return {'entity': entity, 'entity_id': entity_id, 'algorithm_id': algorithm_id, 'action': action}
+
+
+def reserve(n: int):
+    """为 n 条变更分配序号（锁住计数器行直到提交）"""
+    return update(_counter).where(_counter.c.id == 1).values(seq=_counter.c.seq + n)
+
+
+def head():
+    """SELECT (seq, pruned)"""
+    return select(_counter.c.seq, _counter.c.pruned).where(_counter.c.id == 1)
+
+
+def insert_rows(last_seq: int, entries: list, now) -> tuple:
+    """返回 (语句, 参数列表)：entries 依次取序号 last_seq-n+1 … last_seq"""
+    first = last_seq - len(entries) + 1
+    return insert(_log), [dict(e, seq=first + i, created_at=now) for i, e in enumerate(entries)]
+
+
+def since(seq: int, upto: int, limit: int):
+    """序号在 (seq, upto] 内的变更，按序号升序"""
+    return select(_log).where(_log.c.seq > seq, _log.c.seq <= upto).order_by(_log.c.seq).limit(limit)
+
+
+def prunable(cutoff):
+    """早于 cutoff 的最大序号"""
+    return select(func.max(_log.c.seq)).where(_log.c.created_at < cutoff)
+
+
+def prune(upto: int) -> list:
+    """删除序号不超过 upto 的变更，并推进计数器的 pruned"""
+    return [
+        delete(_log).where(_log.c.seq <= upto),
+        update(_counter).where(_counter.c.id == 1, _counter.c.pruned < upto).values(pruned=upto),
+    ]
@@ -0,0 +1,345 @@
+# client.py
+"""
+HTTP API 客户端：与 logic 模块同名同参的函数，经由 server.py 提供的接口访问后端。
+config.API_BASE_URL 不为 None 时 GUI 以本模块代替 logic，客户端不再直连数据库。
+返回的算法、用户对象为 SimpleNamespace，属性与 ORM 对象一致（如 a.title、a.owner.username）。
+"""
+import json
+import shutil
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Optional
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote, urlencode
+from urllib.request import Request, urlopen
+
+import config
+from errors import ConcurrencyError
+
+TIMEOUT = 30
+ANALYSIS_TIMEOUT = 600   # 基准测试、验证、排行等接口可能运行较久
+
+_token = None
+
+# 服务端返回的异常类型名 -> 本地重新抛出的异常类型
+_ERRORS = {
+    'PermissionError': PermissionError,
+    'ValueError':      ValueError,
+    'KeyError':        ValueError,
+    'TypeError':       ValueError,
+    'LookupError':     LookupError,
+    'ConcurrencyError': ConcurrencyError,
+}
+
+
+def _request(method: str, path: str, body: dict = None, params: dict = None,
+             timeout: float = TIMEOUT, raw: bool = False, sink=None):
+    """
+    发送请求并解析 JSON 响应；raw 时返回文本；给定 sink（二进制文件对象）时把响应体分块写入 sink 并返回响应头
+    """
+    url = config.API_BASE_URL.rstrip('/') + path
+    if params:
+        url += '?' + urlencode({k: v for k, v in params.items() if v is not None})
+    data = json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else None
+    req = Request(url, data=data, method=method)
+    if data is not None:
+        req.add_header('Content-Type', 'application/json; charset=utf-8')
+    if _token:
+        req.add_header('Authorization', f'Bearer {_token}')
+    try:
+        with urlopen(req, timeout=timeout) as resp:
+            if sink is not None:
+                shutil.copyfileobj(resp, sink, 64 * 1024)
+                return resp.headers
+            text = resp.read().decode('utf-8')
+            return text if raw else json.loads(text)
+    except HTTPError as e:
+        try:
+            err = json.loads(e.read().decode('utf-8'))
+        except ValueError:
+            raise RuntimeError(f"服务端错误 {e.code}") from None
+        if e.code == 401:
+            raise PermissionError(err.get('message')) from None
+        if e.code == 404:
+            raise LookupError(err.get('message')) from None
+        raise _ERRORS.get(err.get('error'), RuntimeError)(err.get('message')) from None
+    except URLError as e:
+        raise ConnectionError(f"无法连接 API 服务 {config.API_BASE_URL}：{e.reason}") from None
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _algo(d: dict) -> SimpleNamespace:
+    d = dict(d, created_at=_parse_time(d.get('created_at')))
+    d['owner'] = SimpleNamespace(**d['owner']) if d.get('owner') else None
+    return SimpleNamespace(**d)
+
+
+# ─── 用户 ────────────────────────────────────────────────
+
+def register(username: str, password: str) -> int:
+    return _request('POST', '/api/register', {'username': username, 'password': password})['id']
+
+
+def authenticate(username: str, password: str) -> SimpleNamespace:
+    global _token
+    try:
+        data = _request('POST', '/api/login', {'username': username, 'password': password})
+    except PermissionError as e:
+        raise ValueError(str(e)) from None
+    _token = data['token']
+    return SimpleNamespace(**data['user'])
+
+
+def logout():
+    global _token
+    if _token:
+        _request('POST', '/api/logout')
+        _token = None
+
+
+# ─── 算法 ────────────────────────────────────────────────
+
+def upload_algo(user_id: int, title: str, description: str,
+                tags: str, category: str, code_text: str) -> int:
+    return _request('POST', '/api/algorithms', {
+        'title': title, 'description': description, 'tags': tags,
+        'category': category, 'code': code_text,
+    }, timeout=ANALYSIS_TIMEOUT)['id']
+
+
+def list_algos(query: str = None, tags: str = None, category: str = None, fuzzy: bool = False) -> list:
+    rows = _request('GET', '/api/algorithms', params={'query': query, 'tags': tags, 'category': category,
+                                                      'fuzzy': 1 if fuzzy else None})
+    return [_algo(r) for r in rows]
+
+
+def list_cards(query: str = None, tags: str = None, category: str = None, limit: int = None,
+               algo_ids: list = None) -> list:
+    ids = ','.join(map(str, algo_ids)) if algo_ids is not None else None
+    rows = _request('GET', '/api/cards',
+                    params={'query': query, 'tags': tags, 'category': category, 'limit': limit, 'ids': ids})
+    return [SimpleNamespace(**dict(r, created_at=_parse_time(r.get('created_at')))) for r in rows]
+
+
+def get_changes(since: int = 0, limit: int = None) -> dict:
+    feed = _request('GET', '/api/changes', params={'since': since, 'limit': limit})
+    feed['changes'] = [dict(c, created_at=_parse_time(c.get('created_at'))) for c in feed['changes']]
+    return feed
+
+
+def get_change_seq() -> int:
+    return _request('GET', '/api/changes/seq')['seq']
+
+
+def list_trending(query: str = None, tags: str = None, category: str = None, limit: int = None) -> list:
+    rows = _request('GET', '/api/trending',
+                    params={'query': query, 'tags': tags, 'category': category, 'limit': limit})
+    return [dict(e, algo=_algo(e['algo'])) for e in rows]
+
+
+def list_pending() -> list:
+    return [_algo(r) for r in _request('GET', '/api/algorithms/pending')]
+
+
+def get_algo_detail(algo_id: int) -> Optional[SimpleNamespace]:
+    try:
+        return _algo(_request('GET', f'/api/algorithms/{algo_id}'))
+    except LookupError:
+        return None
+
+
+def review_algo(admin, algo_id: int, action: str, row_version: int = None):
+    _request('POST', f'/api/algorithms/{algo_id}/review', {'action': action, 'row_version': row_version})
+
+
+def review_algos(admin, algo_ids: list, action: str) -> int:
+    return _request('POST', '/api/algorithms/review', {'ids': list(algo_ids), 'action': action})['count']
+
+
+def delete_algo(admin, algo_id: int, row_version: int = None):
+    _request('DELETE', f'/api/algorithms/{algo_id}', params={'row_version': row_version})
+
+
+def download_algo(user, algo_id: int) -> str:
+    return _request('GET', f'/api/algorithms/{algo_id}/download', raw=True)
+
+
+def export_algos(user, fileobj, fmt: str = 'zip', algo_ids: list = None,
+                 query: str = None, tags: str = None, category: str = None) -> dict:
+    """与 logic.export_algos 相同，但只返回格式与算法数量（不含完整 manifest，需要时可从压缩包中读取）"""
+    headers = _request('GET', '/api/export', params={
+        'format': fmt, 'query': query, 'tags': tags, 'category': category,
+        'ids': ','.join(map(str, algo_ids)) if algo_ids is not None else None,
+    }, timeout=ANALYSIS_TIMEOUT, sink=fileobj)
+    return {'format': fmt, 'count': int(headers.get('X-Export-Count', 0))}
+
+
+def search_by_code(code_text: str, k: int = 10, category: str = None) -> list:
+    rows = _request('POST', '/api/search/code', {'code': code_text, 'k': k, 'category': category})
+    return [dict(r, algo=_algo(r['algo'])) for r in rows]
+
+
+def get_recommendations(algo_id: int, k: int = 5) -> list:
+    rows = _request('GET', f'/api/algorithms/{algo_id}/recommendations', params={'k': k})
+    return [dict(r, algo=_algo(r['algo'])) for r in rows]
+
+
+# ─── 评论 ────────────────────────────────────────────────
+
+def get_comments(algo_id: int) -> list:
+    return [dict(c, time=_parse_time(c.get('time'))) for c in _request('GET', f'/api/algorithms/{algo_id}/comments')]
+
+
+def comment_algo(user_id: int, algo_id: int, rating: int, content: str) -> int:
+    return _request('POST', f'/api/algorithms/{algo_id}/comments', {'rating': rating, 'content': content})['id']
+
+
+def delete_comment(admin, comment_id: int):
+    _request('DELETE', f'/api/comments/{comment_id}')
+
+
+# ─── 版本 ────────────────────────────────────────────────
+
+def upload_new_version(user, algo_id: int, code_text: str) -> int:
+    return _request('POST', f'/api/algorithms/{algo_id}/versions', {'code': code_text},
+                    timeout=ANALYSIS_TIMEOUT)['version']
+
+
+def list_algo_versions(algo_id: int) -> list:
+    return [dict(v, created_at=_parse_time(v.get('created_at')))
+            for v in _request('GET', f'/api/algorithms/{algo_id}/versions')]
+
+
+def get_algo_version_code(algo_id: int, version: int) -> str:
+    return _request('GET', f'/api/algorithms/{algo_id}/versions/{version}')['code']
+
+
+def diff_algo_versions(algo_id: int, old_version: int, new_version: int) -> str:
+    return _request('GET', f'/api/algorithms/{algo_id}/diff',
+                    params={'old': old_version, 'new': new_version})['diff']
+
+
+# ─── 分析结果 ─────────────────────────────────────────────
+
+def _get_analysis(algo_id: int, kind: str) -> Optional[dict]:
+    return _request('GET', f'/api/algorithms/{algo_id}/analysis/{kind}')
+
+
+def _run_analysis(algo_id: int, kind: str, force: bool) -> dict:
+    return _request('POST', f'/api/algorithms/{algo_id}/analysis/{kind}', {'force': force},
+                    timeout=ANALYSIS_TIMEOUT)
+
+
+def get_benchmark(algo_id: int) -> Optional[dict]:
+    return _get_analysis(algo_id, 'benchmark')
+
+
+def benchmark_algo(algo_id: int, force: bool = False) -> dict:
+    return _run_analysis(algo_id, 'benchmark', force)
+
+
+def get_complexity(algo_id: int) -> Optional[dict]:
+    return _get_analysis(algo_id, 'complexity')
+
+
+def estimate_complexity(algo_id: int, force: bool = False) -> dict:
+    return _run_analysis(algo_id, 'complexity', force)
+
+
+def get_verification(algo_id: int) -> Optional[dict]:
+    return _get_analysis(algo_id, 'verify')
+
+
+def verify_algo(algo_id: int, force: bool = False) -> dict:
+    return _run_analysis(algo_id, 'verify', force)
+
+
+def get_profile(algo_id: int) -> Optional[dict]:
+    return _get_analysis(algo_id, 'profile')
+
+
+def profile_algo(algo_id: int, force: bool = False) -> dict:
+    return _run_analysis(algo_id, 'profile', force)
+
+
+def queue_analysis(user, algo_id: int, kind: str, force: bool = False) -> int:
+    return _request('POST', f'/api/algorithms/{algo_id}/analysis/{kind}/jobs', {'force': force})['job']
+
+
+def get_verifications(algos: list) -> dict:
+    if not algos:
+        return {}
+    data = _request('GET', '/api/verifications', params={'ids': ','.join(str(a.id) for a in algos)})
+    return {int(k): v for k, v in data.items()}
+
+
+def get_leaderboard(category: str, refresh: bool = True) -> list:
+    """服务端只返回已保存的排行（refresh 不起作用），刷新请用 queue_leaderboard"""
+    entries = _request('GET', f'/api/leaderboard/{quote(category)}')
+    return [dict(e, algo=_algo(e['algo'])) for e in entries]
+
+
+def queue_leaderboard(user, category: str) -> int:
+    return _request('POST', f'/api/leaderboard/{quote(category)}/jobs')['job']
+
+
+# ─── 评分策略与统计 ───────────────────────────────────────
+
+def get_scoring_strategy() -> dict:
+    return _request('GET', '/api/strategy')
+
+
+def update_scoring(admin, func_weight: int, comment_weight: int, row_version: int = None):
+    _request('PUT', '/api/strategy', {'func_weight': func_weight, 'comment_weight': comment_weight,
+                                      'row_version': row_version})
+
+
+def rescore_all(admin) -> int:
+    return _request('POST', '/api/rescore')['job']
+
+
+def _job(d: dict) -> dict:
+    return dict(d, **{k: _parse_time(d.get(k)) for k in ('created_at', 'started_at', 'finished_at')})
+
+
+def get_job(job_id: int):
+    try:
+        return _job(_request('GET', f'/api/jobs/{job_id}'))
+    except LookupError:
+        return None
+
+
+def list_jobs(limit: int = 50, status: str = None) -> list:
+    return [_job(j) for j in _request('GET', '/api/jobs', params={'limit': limit, 'status': status})]
+
+
+def get_my_job(user, job_id: int):
+    return get_job(job_id)
+
+
+def get_rescore_progress():
+    p = _request('GET', '/api/rescore')
+    if p is not None:
+        p.update(started_at=_parse_time(p.get('started_at')), finished_at=_parse_time(p.get('finished_at')))
+    return p
+
+
+def get_strategy_history() -> list:
+    return _request('GET', '/api/strategy/history')
+
+
+def get_stats() -> dict:
+    return _request('GET', '/api/stats')
+
+
+def get_stats_data(dtype: str, start, end):
+    return _request('GET', '/api/stats/data',
+                    params={'type': dtype, 'start': start.isoformat(), 'end': end.isoformat()})['value']
+
+
+def export_stats_csv(dtype: str, start, end) -> str:
+    return _request('GET', '/api/stats/export',
+                    params={'type': dtype, 'start': start.isoformat(), 'end': end.isoformat()}, raw=True)
@@ -0,0 +1,220 @@
+# codesearch.py
+"""
+按代码检索：给定一段代码，找出目录中做同样事情的算法。
+- 以 tokenize 切分 Python 源码并归一化：关键字、内置名、属性/方法名（如 .append）与运算符保留原样，
+  其余标识符统一为 ID，字符串为 STR，数字为 NUM，缩进变化与语句结束也作为记号，因此变量改名不影响匹配
+- 取长度 1..CODE_SEARCH_NGRAM 的记号 n-gram 作为词项，按 (1 + log tf)·idf 加权并做 L2 归一化
+- 查询向量与全部文档一次稀疏矩阵-向量乘法得到余弦相似度
+每个算法的词频按 (ID, 版本号) 保存；上传、新版本、删除时增量更新，仅 idf 与归一化在下次查询时
+对整个稀疏矩阵向量化重算，不需重新切分源码。索引持久化到 CODE_SEARCH_INDEX_PATH，
+载入后及每隔 CODE_SEARCH_SYNC_SECONDS 秒与数据库核对版本号，补上其它进程的修改。
+"""
+import builtins
+import io
+import keyword
+import math
+import os
+import pickle
+import textwrap
+import threading
+import time
+import tokenize
+from collections import Counter
+
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+
+import config
+from dao import AlgorithmDAO
+
+INDEX_FORMAT = 1
+
+_KEEP = frozenset(keyword.kwlist) | frozenset(dir(builtins))
+
+_SKIP = {tokenize.COMMENT, tokenize.NL, tokenize.ENCODING, tokenize.ENDMARKER}
+
+
+def tokens(code: str) -> list:
+    """切分并归一化源码；片段不完整（括号未闭合等）时保留已切分的部分"""
+    result, after_dot = [], False
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(textwrap.dedent(code)).readline):
+            if tok.type in _SKIP:
+                continue
+            if tok.type == tokenize.NAME:
+                result.append(tok.string if after_dot or tok.string in _KEEP else 'ID')
+            elif tok.type == tokenize.STRING:
+                result.append('STR')
+            elif tok.type == tokenize.NUMBER:
+                result.append('NUM')
+            elif tok.type == tokenize.NEWLINE:
+                result.append('<NL>')
+            elif tok.type == tokenize.INDENT:
+                result.append('<IN>')
+            elif tok.type == tokenize.DEDENT:
+                result.append('<DE>')
+            else:
+                result.append(tok.string)
+            after_dot = tok.string == '.'
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        pass
+    return result
+
+
+def terms(code: str, n: int = None) -> Counter:
+    """源码的 n-gram 词频"""
+    n = n or config.CODE_SEARCH_NGRAM
+    toks = tokens(code)
+    counts = Counter()
+    for size in range(1, n + 1):
+        counts.update(' '.join(toks[i:i + size]) for i in range(len(toks) - size + 1))
+    return counts
+
+
+class CodeIndex:
+    def __init__(self, path: str = None):
+        self.path = path or config.CODE_SEARCH_INDEX_PATH
+        if not os.path.isabs(self.path):
+            self.path = os.path.join(os.path.dirname(os.path.abspath(__file__)), self.path)
+        self._lock = threading.RLock()
+        self._reset()
+        self.loaded = False
+        self._synced_at = 0.0
+
+    def _reset(self):
+        self.vocab = {}          # 词项 -> 列号
+        self.df = Counter()      # 列号 -> 文档频数
+        self.docs = {}           # 算法 ID -> (版本号, {列号: 词频})
+        self._matrix = None      # (算法 ID 数组, 归一化后的 tf-idf 稀疏矩阵, idf 数组)，增删后置空
+
+    # ─── 增量维护 ────────────────────────────────────────
+
+    def _add(self, algo_id: int, version: int, code: str):
+        self._remove(algo_id)
+        counts = {}
+        for term, tf in terms(code).items():
+            col = self.vocab.setdefault(term, len(self.vocab))
+            counts[col] = tf
+        self.df.update(counts.keys())
+        self.docs[algo_id] = (version, counts)
+        self._matrix = None
+
+    def _remove(self, algo_id: int) -> bool:
+        entry = self.docs.pop(algo_id, None)
+        if entry is None:
+            return False
+        self.df.subtract(entry[1].keys())
+        self._matrix = None
+        return True
+
+    def add(self, algo_id: int, version: int, code: str):
+        """上传或新版本后调用；本进程尚未载入索引时忽略（载入时会与数据库核对）"""
+        with self._lock:
+            if self.loaded:
+                self._add(algo_id, version, code)
+                self.save()
+
+    def remove(self, algo_ids: list):
+        with self._lock:
+            if self.loaded and sum(self._remove(aid) for aid in algo_ids):
+                self.save()
+
+    # ─── 持久化与核对 ────────────────────────────────────
+
+    def save(self):
+        """先写本进程独有的临时文件再原子替换（GUI、服务与 worker 可能同时保存，同 corpus._write_atomic）"""
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                pickle.dump({'format': INDEX_FORMAT, 'ngram': config.CODE_SEARCH_NGRAM,
+                             'vocab': self.vocab, 'docs': self.docs}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _load_file(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return
+        if data.get('format') != INDEX_FORMAT or data.get('ngram') != config.CODE_SEARCH_NGRAM:
+            return
+        self.vocab, self.docs = data['vocab'], data['docs']
+        for _, counts in self.docs.values():
+            self.df.update(counts.keys())
+
+    def sync(self, force: bool = False):
+        """首次调用时从磁盘载入；之后按间隔与数据库核对版本号，只重新切分新增或已修改的算法"""
+        with self._lock:
+            if not force and self.loaded and time.monotonic() - self._synced_at < config.CODE_SEARCH_SYNC_SECONDS:
+                return
+            if not self.loaded:
+                self._load_file()
+                self.loaded = True
+            current = AlgorithmDAO.get_code_versions()
+            gone = [aid for aid in self.docs if aid not in current]
+            stale = [aid for aid, v in current.items() if self.docs.get(aid, (None,))[0] != v]
+            for aid in gone:
+                self._remove(aid)
+            if stale:
+                # 首次构建时全部过期，直接顺序读取整表，不拼接超长的 IN 列表
+                rows = AlgorithmDAO.iter_code(None if len(stale) == len(current) else stale)
+                for aid, version, code in rows:
+                    self._add(aid, version, code)
+            if gone or stale:
+                self.save()
+            self._synced_at = time.monotonic()
+
+    # ─── 查询 ──────────────────────────────────────────
+
+    def _build_matrix(self):
+        ids = np.fromiter(self.docs.keys(), dtype=np.int64, count=len(self.docs))
+        indptr, indices, data = [0], [], []
+        for _, counts in self.docs.values():
+            indices.extend(counts.keys())
+            data.extend(counts.values())
+            indptr.append(len(indices))
+        n_terms = len(self.vocab)
+        tf = csr_matrix((np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), indptr),
+                        shape=(len(ids), n_terms))
+        tf.data = 1.0 + np.log(tf.data)
+        df = np.zeros(n_terms)
+        if self.df:
+            cols, counts = zip(*self.df.items())
+            df[list(cols)] = counts
+        idf = np.log((1.0 + len(ids)) / (1.0 + df)) + 1.0
+        m = tf @ diags(idf)
+        norms = np.sqrt(np.asarray(m.multiply(m).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        self._matrix = (ids, (diags(1.0 / norms) @ m).tocsr(), idf)
+
+    def search(self, code: str, min_similarity: float = 0.0):
+        """
+        逐个产出 (算法 ID, 余弦相似度)，按相似度降序；只含相似度大于 min_similarity 的算法。
+        """
+        self.sync()
+        with self._lock:
+            if self._matrix is None:
+                self._build_matrix()
+            ids, m, idf = self._matrix
+            cols, weights = [], []
+            for term, tf in terms(code).items():
+                col = self.vocab.get(term)
+                if col is not None and col < len(idf):
+                    cols.append(col)
+                    weights.append((1.0 + math.log(tf)) * idf[col])
+        if not cols or not len(ids):
+            return
+        q = np.zeros(m.shape[1])
+        q[cols] = weights
+        q /= np.linalg.norm(q)
+        scores = m @ q
+        hits = np.flatnonzero(scores > min_similarity)
+        for i in hits[np.argsort(-scores[hits], kind='stable')]:
+            yield int(ids[i]), float(scores[i])
+
+
+index = CodeIndex()
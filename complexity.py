@@ -0,0 +1,155 @@
+# complexity.py
+"""
+经验复杂度估算：在几何增长的输入规模上运行算法（隔离子进程，见 sandbox.py / benchmark.py），
+用 NumPy 最小二乘把耗时拟合到候选增长模型 t(n) ≈ a + b·f(n)，取相对残差最小者作为复杂度类别。
+"""
+import numpy as np
+
+import benchmark
+import config
+import sandbox
+
+# 候选增长模型，按增长速度从慢到快排列
+MODELS = (
+    ('O(1)',       lambda n: np.ones_like(n)),
+    ('O(log n)',   lambda n: np.log2(n)),
+    ('O(n)',       lambda n: n),
+    ('O(n log n)', lambda n: n * np.log2(n)),
+    ('O(n^2)',     lambda n: n ** 2),
+    ('O(n^3)',     lambda n: n ** 3),
+)
+MODEL_RANK = {name: i for i, (name, _) in enumerate(MODELS)}
+
+# 各分类的规模扫描：起始规模、倍率、点数
+SWEEPS = {
+    '排序':     (128, 2, 6),
+    '查找':     (256, 4, 6),
+    '图算法':   (128, 2, 6),
+    '动态规划': (8, 2, 6),
+}
+
+# 各分类通用实现应达到的复杂度；估算结果更差时给出提示
+EXPECTED = {
+    '排序':     'O(n log n)',
+    '查找':     'O(log n)',
+    '图算法':   'O(n log n)',
+    '动态规划': 'O(n^2)',
+}
+
+# 相对残差相差不超过该比例时优先选择更简单的模型
+SIMPLER_TOLERANCE = 1.1
+
+
+# 至少有这么多个规模在资源上限内完成才拟合
+MIN_POINTS = 3
+
+
+def sweep_sizes(category: str) -> list:
+    start, factor, points = SWEEPS[category]
+    return [start * factor ** i for i in range(points)]
+
+
+# 每个规模的调用次数：最小规模上重复 SWEEP_LOOPS 次（查找按分类设定的次数），随规模反比缩小，
+# 查找不少于 32 次、其余分类不少于 1 次。单次调用很快的小规模被放大到可计时，
+# O(n) 的查找在最大规模上也不会重复上千次而超过 CPU 时间上限
+SWEEP_LOOPS = 32
+
+
+def sweep_loops(category: str, size: int) -> int:
+    spec_loops = benchmark.CATEGORY_SPECS[category]['loops']
+    start = SWEEPS[category][0]
+    if spec_loops > 1:
+        return max(32, spec_loops * start // size)
+    return max(1, SWEEP_LOOPS * start // size)
+
+
+def fit(sizes, times) -> dict:
+    """
+    对每个候选模型求 min Σ((a + b·f(n) − t) / t)²（相对误差，避免大规模点主导），
+    b 必须为正（O(1) 模型除外）。返回最佳模型、常数及各模型残差。
+    """
+    n = np.asarray(sizes, dtype=float)
+    t = np.asarray(times, dtype=float)
+    fits = {}
+    for name, f in MODELS:
+        if name == 'O(1)':
+            design = np.ones((len(n), 1))
+        else:
+            design = np.column_stack([np.ones_like(n), f(n)])
+        weighted = design / t[:, None]
+        coef, *_ = np.linalg.lstsq(weighted, np.ones_like(t), rcond=None)
+        if name != 'O(1)' and coef[1] <= 0:
+            continue
+        residual = float(np.sqrt(np.mean((weighted @ coef - 1.0) ** 2)))
+        fits[name] = {'a': float(coef[0]), 'b': float(coef[1]) if len(coef) > 1 else 0.0,
+                      'residual': residual}
+
+    best = min(fits, key=lambda k: fits[k]['residual'])
+    for name, _ in MODELS:   # 残差相近时取更简单的模型
+        if name in fits and fits[name]['residual'] <= fits[best]['residual'] * SIMPLER_TOLERANCE:
+            best = name
+            break
+    slope = float(np.polyfit(np.log(n), np.log(t), 1)[0])
+    return {'complexity': best, 'a': fits[best]['a'], 'b': fits[best]['b'],
+            'loglog_slope': slope, 'fits': fits}
+
+
+def estimate(code_text: str, category: str) -> dict:
+    """
+    在 SWEEPS 规定的规模序列上运行算法并拟合复杂度。
+    每个规模单独一个子进程，并以空入口函数在同一输入上运行一次作为基线：子进程报告的耗时可被上传代码伪造，
+    任一规模报告的耗时低于父进程测得的 CPU 时间（扣除基线，见 benchmark.understated）即判为 error。
+    某个规模超出资源上限时，用更小的已完成规模拟合（至少 MIN_POINTS 个），skipped 记录起始的规模与原因。
+    返回 dict：status、complexity、a、b、loglog_slope、fits、sizes、times、skipped、expected、warning
+    """
+    payload, error = benchmark.make_payload(code_text, category, sweep_sizes(category))
+    if payload is None:
+        return {'status': 'error', 'error': error}
+    payload.update(trace_memory=False, repeat=1)   # 子进程 CPU 时间恰为计时轮次，用于核对报告的耗时
+    per_size = [dict(payload, cases=[dict(case, loops=sweep_loops(category, case['size']))])
+                for case in payload['cases']]
+    outputs = sandbox.run_many(per_size + [benchmark.baseline_payload(p) for p in per_size], sandbox.Limits(
+        config.BENCH_CPU_SECONDS, config.COMPLEXITY_WALL_SECONDS, config.BENCH_MEMORY_MB), config.BENCH_WORKERS)
+    results, baselines = outputs[:len(per_size)], outputs[len(per_size):]
+
+    sizes, times, skipped = [], [], None
+    for p, result, baseline in zip(per_size, results, baselines):
+        if result.get('status') in ('timeout', 'cpu_limit', 'memory_limit'):
+            # 超出资源上限：更大的规模同样无法完成，用已完成的规模拟合
+            skipped = {'size': p['cases'][0]['size'], 'status': result['status']}
+            break
+        if result.get('status') != 'ok':
+            return {'status': result.get('status'), 'error': result.get('error')}
+        problem = benchmark.understated(result, baseline, p)
+        if problem:
+            return {'status': 'error', 'error': f"规模 {p['cases'][0]['size']}：{problem}"}
+        sizes.append(p['cases'][0]['size'])
+        times.append(max(result['cases'][0]['wall'], 1e-9))
+    if len(sizes) < MIN_POINTS:
+        return {'status': skipped['status'], 'error': f"规模 {skipped['size']} 超出资源上限，完成的规模不足 {MIN_POINTS} 个"}
+    out = fit(sizes, times)
+    expected = EXPECTED.get(category)
+    worse = expected and MODEL_RANK[out['complexity']] > MODEL_RANK[expected]
+    out.update({
+        'status': 'ok',
+        'entry': payload['entry'],
+        'sizes': sizes,
+        'times': times,
+        'skipped': skipped,   # 从该规模起超出资源上限而未参与拟合，全部完成时为 None
+        'expected': expected,
+        'warning': f"实测 {out['complexity']} 劣于{category}通用实现的 {expected}，不宜用于大规模数据" if worse else None,
+    })
+    return out
+
+
+def format_result(result: dict) -> str:
+    """供界面展示的文本"""
+    if result.get('status') != 'ok':
+        return f"复杂度估算失败：{result.get('status')}  {result.get('error', '')}"
+    text = (f"估算复杂度：{result['complexity']}  t(n) ≈ {result['a']:.3g} + {result['b']:.3g}·f(n) 秒  "
+            f"(log-log 斜率 {result['loglog_slope']:.2f})")
+    if result.get('skipped'):
+        text += f"\n规模 {result['skipped']['size']} 起超出资源上限（{result['skipped']['status']}），按较小规模拟合"
+    if result.get('warning'):
+        text += f"\n⚠️ {result['warning']}"
+    return text
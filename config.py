@@ -22,3 +22,106 @@ DEFAULT_ADMIN = {
 # 默认评分策略权重
 SCORING_DEFAULT_FUNC_WEIGHT    = 10  # 每个函数定义分值
 SCORING_DEFAULT_COMMENT_WEIGHT =  1  # 每个注释符号分值
+
+# 查询结果缓存（算法列表 / 详情 / 评论）
+CACHE_MAX_ENTRIES = 512   # 最多缓存的条目数，超出后按 LRU 淘汰
+CACHE_TTL_SECONDS = 300   # 条目存活秒数
+
+# 静态评分引擎：按源码哈希缓存的分析结果条目数
+SCORING_MEMO_SIZE = 4096
+
+# 执行基准测试：子进程资源上限与并发度
+BENCH_CPU_SECONDS  = 10    # 单个子进程 CPU 时间上限（秒）
+BENCH_WALL_SECONDS = 30    # 单个子进程墙钟时间上限（秒）
+BENCH_MEMORY_MB    = 1024  # 单个子进程地址空间上限（MB）
+BENCH_WORKERS      = 4     # 同时运行的子进程数
+BENCH_REPEAT       = 3     # 每组输入重复计时次数（取最优）
+COMPLEXITY_WALL_SECONDS = 120  # 复杂度估算（多规模扫描）子进程墙钟时间上限（秒）
+
+# 基准语料库目录（相对路径相对于项目根目录），按语料版本分子目录存放 .npy 文件
+CORPUS_DIR = 'corpus_data'
+
+# 差分正确性验证：每个算法的随机输入数量与每个子进程处理的输入数
+ORACLE_CASES = 2000
+ORACLE_CHUNK = 500
+
+# 热点剖析：摘要保留的函数/行数与行级采样间隔（秒）
+PROFILE_TOP_N           = 8
+PROFILE_SAMPLE_INTERVAL = 0.001
+
+# 数据库连接池（同一进程内的 GUI、命令行或 HTTP 服务共享）
+DB_POOL_SIZE    = 10
+DB_MAX_OVERFLOW = 20
+
+# 死锁、锁等待超时等瞬时错误：整个事务（新会话）最多执行 DB_RETRY_ATTEMPTS 次，
+# 第 n 次（从 0 起）重做前等待 min(DB_RETRY_MAX_DELAY, DB_RETRY_BASE_DELAY·2^n) 秒（含随机抖动）
+DB_RETRY_ATTEMPTS   = 4
+DB_RETRY_BASE_DELAY = 0.05
+DB_RETRY_MAX_DELAY  = 1.0
+
+# HTTP API 服务（server.py）
+API_HOST              = '127.0.0.1'
+API_PORT              = 8765
+API_WORKERS           = 24              # 执行数据库操作的线程数，应不超过连接池容量
+API_TOKEN_TTL_SECONDS = 12 * 3600       # 登录令牌有效期（秒）
+API_MAX_BODY_BYTES    = 4 * 1024 * 1024 # 请求体上限
+API_IDLE_TIMEOUT      = 60              # 长连接空闲超时（秒）
+
+# GUI 后端：为 None 时直接连接数据库；设为如 'http://127.0.0.1:8765' 时经由 HTTP API 服务访问
+API_BASE_URL = None
+
+# 异步数据访问层（async_dao.py）的连接地址：为 None 时使用 aiomysql 连接上面的应用数据库，
+# 也可设为如 'sqlite+aiosqlite:///algodb.sqlite3'
+ASYNC_DB_URL = None
+
+# 日志保留：超过 RETENTION_DAYS 天的下载日志与管理员日志汇总为按天统计，
+# 原始行以 gzip 压缩的 NDJSON 归档到 ARCHIVE_DIR 后分批删除
+RETENTION_DAYS       = 90
+RETENTION_BATCH_SIZE = 1000   # 每个事务处理的行数，保持锁持有时间短
+ARCHIVE_DIR          = 'log_archive'
+
+# 热度排序：下载与评论的指数衰减半衰期（小时）及一条评论相当于多少次下载
+TRENDING_HALF_LIFE_HOURS = 72
+TRENDING_COMMENT_WEIGHT  = 3.0
+
+# “下载了它的用户也下载了”推荐：相似度（'jaccard' 或 'cosine'）、每个算法保留的近邻数、
+# 以及从 download_logs 增量追加新下载的最短间隔（秒）与每次回读高水位以下的 ID 数
+# （自增 ID 按插入而非提交顺序分配，回读窗口覆盖晚提交的事务）
+RECOMMEND_METRIC          = 'jaccard'
+RECOMMEND_TOP_K           = 10
+RECOMMEND_REFRESH_SECONDS = 30
+RECOMMEND_REREAD_WINDOW   = 5000
+
+# 按代码检索：token n-gram 的最大长度、索引文件路径（相对路径相对于项目根目录），
+# 以及与数据库核对新增/修改/删除算法的最短间隔（秒）
+CODE_SEARCH_NGRAM         = 3
+CODE_SEARCH_INDEX_PATH    = 'code_index.pkl'
+CODE_SEARCH_SYNC_SECONDS  = 60
+
+# 后台重算分数：每块（一个短事务）的算法数与解析源码的子进程数（<= 1 时在当前进程中解析）
+RESCORE_BATCH_SIZE = 500
+RESCORE_WORKERS    = 4
+
+# 后台任务队列（worker.py）：并发子进程数、空闲时轮询间隔、租约时长（worker 定期续约，崩溃后过期可被重新领取）、
+# 默认最多尝试次数与重试退避基数（第 n 次失败后等待 基数·2^(n-1) 秒）
+JOB_WORKERS             = 4
+JOB_POLL_SECONDS        = 1.0
+JOB_LEASE_SECONDS       = 60
+JOB_MAX_ATTEMPTS        = 3
+JOB_RETRY_DELAY_SECONDS = 30
+
+# 变更日志（change_log）：GUI 轮询新变更的间隔（秒）、每次最多读取的条数、保留天数（由日志保留任务清理；
+# 客户端离线超过保留期后需整页重载）
+CHANGE_POLL_SECONDS = 3
+CHANGE_FEED_LIMIT   = 500
+CHANGE_LOG_DAYS     = 7
+
+# 检索框输入提示：停止输入多少毫秒后查询内存前缀索引，以及最多提示的条数
+AUTOCOMPLETE_DEBOUNCE_MS = 150
+AUTOCOMPLETE_LIMIT       = 10
+
+# 容错检索（三元组索引）：最低相似度（查询三元组被命中的比例）、每次查询最多校验的候选数，
+# 以及按变更日志同步索引的最短间隔（秒）
+FUZZY_MIN_SIMILARITY = 0.5
+FUZZY_MAX_CANDIDATES = 5000
+FUZZY_SYNC_SECONDS   = 2
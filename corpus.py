@@ -0,0 +1,200 @@
+# corpus.py
+"""
+基准语料库：按固定种子生成大规模输入，一次性写入版本化的 .npy 文件，之后各基准子进程以
+内存映射（np.load(mmap_mode='r')）方式读取，多个并发子进程共享同一份页缓存而不必各自生成或经管道复制；
+只读的输入以 memoryview 直接传给入口函数，会被原地修改的排序输入与图的邻接表仍在子进程内各自构造（见 sandbox._corpus_calls）。
+目录结构：<CORPUS_DIR>/v<CORPUS_VERSION>/<数据集>.<数组名>.npy 以及 manifest.json。
+语料内容、规模或生成方式变化时必须递增 CORPUS_VERSION，已保存的排行结果随之失效。
+"""
+import functools
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+import numpy as np
+
+import benchmark
+import config
+
+CORPUS_VERSION = 4
+
+SEED = 20240615
+
+# 数据集定义：kind 决定子进程如何把数组还原为算法入口函数的参数（见 sandbox._corpus_calls）
+DATASETS = {
+    'sort-random':   {'category': '排序', 'kind': 'array', 'n': 10**6},
+    'sort-sorted':   {'category': '排序', 'kind': 'array', 'n': 10**6},
+    'sort-reversed': {'category': '排序', 'kind': 'array', 'n': 10**6},
+    'sort-dups':     {'category': '排序', 'kind': 'array', 'n': 10**6},
+    'search':        {'category': '查找', 'kind': 'search', 'n': 10**6, 'queries': 1024},
+    'graph':         {'category': '图算法', 'kind': 'graph', 'm': 10**5},
+    'knapsack':      {'category': '动态规划', 'kind': 'knapsack', 'n': 200},
+}
+
+# 分类 -> 吞吐量单位
+UNITS = {
+    '排序':     '元素/秒',
+    '查找':     '次查询/秒',
+    '图算法':   '边/秒',
+    '动态规划': '单元格/秒',
+}
+
+_lock = threading.Lock()
+
+
+def corpus_dir(version: int = CORPUS_VERSION) -> str:
+    base = config.CORPUS_DIR
+    if not os.path.isabs(base):
+        base = os.path.join(os.path.dirname(os.path.abspath(__file__)), base)
+    return os.path.join(base, f"v{version}")
+
+
+def _rng(name: str) -> np.random.Generator:
+    return np.random.default_rng([SEED, zlib.crc32(name.encode())])
+
+
+def _generate(name: str, spec: dict) -> tuple:
+    """生成数据集，返回 ({数组名: ndarray}, 元信息)"""
+    rng = _rng(name)
+    if spec['kind'] == 'array':
+        n = spec['n']
+        if name == 'sort-dups':
+            data = rng.integers(0, 100, n, dtype=np.int64)
+        else:
+            data = rng.integers(0, n * 10, n, dtype=np.int64)
+            if name == 'sort-sorted':
+                data.sort()
+            elif name == 'sort-reversed':
+                data = np.sort(data)[::-1].copy()
+        return {'data': data}, {'n': n, 'work': n}
+    if spec['kind'] == 'search':
+        n = spec['n']
+        data = np.sort(rng.choice(n * 10, n, replace=False)).astype(np.int64)
+        queries = data[rng.integers(0, n, spec['queries'])]
+        return {'data': data, 'queries': queries}, {'n': n, 'work': len(queries)}
+    if spec['kind'] == 'graph':
+        # 随机生成树保证连通，再补足随机边，共约 m 条无向边；邻接表形式与 Kruskal 示例一致
+        n = spec['m'] // 3
+        child = np.arange(1, n)
+        parent = (rng.random(n - 1) * child).astype(np.int64)
+        extra = rng.integers(0, n, (spec['m'] - (n - 1), 2))
+        extra = extra[extra[:, 0] != extra[:, 1]]
+        uv = np.vstack([np.column_stack([parent, child]), extra])
+        w = rng.integers(1, 1001, len(uv))
+        edges = np.column_stack([uv, w]).astype(np.int64)
+        return {'edges': edges}, {'n': n, 'm': len(edges), 'work': len(edges)}
+    if spec['kind'] == 'knapsack':
+        n = spec['n']
+        weights = rng.integers(1, 51, n, dtype=np.int64)
+        values = rng.integers(1, 101, n, dtype=np.int64)
+        capacity = int(weights.sum() // 2)
+        return ({'weights': weights, 'values': values},
+                {'n': n, 'capacity': capacity, 'work': n * (capacity + 1)})
+    raise ValueError(f"未知的数据集类型：{spec['kind']}")
+
+
+def _write_atomic(path: str, array: np.ndarray):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def ensure(names=None) -> dict:
+    """
+    确保指定数据集（默认全部）已写入当前版本目录，缺失的才生成；返回 manifest。
+    """
+    root = corpus_dir()
+    manifest_path = os.path.join(root, 'manifest.json')
+    with _lock:
+        os.makedirs(root, exist_ok=True)
+        manifest = {'version': CORPUS_VERSION, 'datasets': {}}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        changed = False
+        for name in names or DATASETS:
+            entry = manifest['datasets'].get(name)
+            if entry and all(os.path.exists(os.path.join(root, fn)) for fn in entry['files'].values()):
+                continue
+            arrays, meta = _generate(name, DATASETS[name])
+            files = {}
+            for key, array in arrays.items():
+                files[key] = f"{name}.{key}.npy"
+                _write_atomic(os.path.join(root, files[key]), array)
+            manifest['datasets'][name] = dict(DATASETS[name], files=files, meta=meta)
+            changed = True
+        if changed:
+            tmp = f"{manifest_path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, manifest_path)
+    return manifest
+
+
+def dataset_spec(name: str) -> dict:
+    """子进程使用的数据集描述：kind、各数组文件的绝对路径、元信息"""
+    entry = ensure([name])['datasets'][name]
+    root = corpus_dir()
+    return {
+        'name': name,
+        'kind': entry['kind'],
+        'files': {k: os.path.join(root, fn) for k, fn in entry['files'].items()},
+        'meta': entry['meta'],
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _reference(name: str) -> bytes:
+    """数据集上正确输出的字节串（与 sandbox._answer 的摘要内容一致）：排序结果、各查询的下标或总权重/总价值"""
+    arrays = {k: np.load(path, mmap_mode='r') for k, path in dataset_spec(name)['files'].items()}
+    kind = DATASETS[name]['kind']
+    if kind == 'array':
+        return np.sort(arrays['data']).astype(np.int64).tobytes()
+    if kind == 'search':
+        return np.searchsorted(arrays['data'], arrays['queries']).astype(np.int64).tobytes()
+    if kind == 'graph':
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import minimum_spanning_tree
+        edges = np.asarray(arrays['edges'])
+        n = int(edges[:, :2].max()) + 1
+        u, v = edges[:, :2].min(axis=1), edges[:, :2].max(axis=1)
+        order = np.lexsort((edges[:, 2], v, u))   # 重边只保留最小权重
+        u, v, w = u[order], v[order], edges[order, 2]
+        first = np.ones(len(u), dtype=bool)
+        first[1:] = (u[1:] != u[:-1]) | (v[1:] != v[:-1])
+        mst = minimum_spanning_tree(coo_matrix((w[first], (u[first], v[first])), shape=(n, n)).tocsr())
+        return str(int(mst.sum())).encode()
+    if kind == 'knapsack':
+        capacity = dataset_spec(name)['meta']['capacity']
+        dp = np.zeros(capacity + 1, dtype=np.int64)
+        for w, v in zip(arrays['weights'].tolist(), arrays['values'].tolist()):
+            dp[w:] = np.maximum(dp[w:], dp[:-w] + v)   # 右侧先整体求值，即 0/1 背包
+        return str(int(dp[capacity])).encode()
+    raise ValueError(f"未知的数据集类型：{kind}")
+
+
+def answer(name: str, salt: str) -> str:
+    """数据集正确输出的加盐摘要，排行任务以此核对子进程报告的输出摘要"""
+    return hashlib.sha256(salt.encode() + _reference(name)).hexdigest()
+
+
+def cases(category: str) -> list:
+    """某分类在语料库中的全部基准 case（子进程按 corpus 字段内存映射读取输入）"""
+    names = [n for n, spec in DATASETS.items() if spec['category'] == category]
+    if not names:
+        raise ValueError(f"不支持的分类：{category}")
+    loops = benchmark.CATEGORY_SPECS[category]['loops']
+    result = []
+    for name in names:
+        spec = dataset_spec(name)
+        result.append({
+            'name': f"{name}-v{CORPUS_VERSION}",
+            'size': spec['meta']['n'],
+            'corpus': spec,
+            'loops': 1 if spec['kind'] == 'search' else loops,   # 查找语料一轮已含全部查询
+            'work': spec['meta']['work'],
+        })
+    return result
@@ -2,20 +2,42 @@
 """
 数据访问对象 (DAO)：对 ORM 模型进行增删改查，包含事务回滚逻辑，预加载关联以避免 DetachedInstance 错误。
 """
-from sqlalchemy.exc import SQLAlchemyError
+from collections import Counter
+from sqlalchemy import and_, bindparam, func, insert, or_, update
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
 from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.exc import StaleDataError
 import bcrypt
-import ast
-
+import functools
+import json
+import time
+from datetime import datetime, timedelta
 
+import cache
+import cards
+import changes
+import config
+import scoring
+import trending
+import versioning
+from errors import ConcurrencyError, check_version, is_transient, retry_delay
 
 from models import (
     SessionLocal,
     User,
     Algorithm,
+    AlgorithmVersion,
+    AnalysisResult,
+    AlgorithmTrending,
+    AlgorithmCard,
     Comment,
     AdminLog,
+    AdminLogDaily,
     DownloadLog,
+    DownloadDaily,
+    DownloadPair,
+    Job,
+    RescoreRun,
     ScoringStrategy,
     init_models
 )
@@ -23,6 +45,26 @@ from models import (
 # 确保模型已初始化（创建表）
 init_models()
 
+
+def retry_transient(fn):
+    """
+    写事务的重试：死锁、锁等待超时时整个调用（新会话）按指数退避重做，至多执行 DB_RETRY_ATTEMPTS 次；
+    乐观锁冲突（StaleDataError）转为 ConcurrencyError 交给调用方刷新后决定，不自动重试
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        for attempt in range(config.DB_RETRY_ATTEMPTS):
+            try:
+                return fn(*args, **kwargs)
+            except StaleDataError as e:
+                raise ConcurrencyError("记录已被其他操作修改，请刷新后重试") from e
+            except DBAPIError as e:
+                if not is_transient(e) or attempt == config.DB_RETRY_ATTEMPTS - 1:
+                    raise
+                time.sleep(retry_delay(attempt))
+    return wrapper
+
+
 # 用户数据访问对象
 class UserDAO:
     @staticmethod
@@ -49,6 +91,14 @@ class UserDAO:
         finally:
             session.close()
 
+    @staticmethod
+    def get_by_id(user_id: int) -> User:
+        session = SessionLocal()
+        try:
+            return session.query(User).get(user_id)
+        finally:
+            session.close()
+
     @staticmethod
     def authenticate(username: str, password: str) -> User:
         user = UserDAO.get_by_username(username)
@@ -64,10 +114,7 @@ class AlgorithmDAO:
         session = SessionLocal()
         try:
             strat = session.query(ScoringStrategy).get(1)
-            tree = ast.parse(code_text)
-            func_cnt = sum(isinstance(n, ast.FunctionDef) for n in ast.walk(tree))
-            comment_cnt = code_text.count('#')
-            score = func_cnt * strat.func_weight + comment_cnt * strat.comment_weight
+            score = scoring.score(code_text, scoring.strategy_weights(strat))
             algo = Algorithm(
                 owner_id=owner_id,
                 title=title,
@@ -79,8 +126,45 @@ class AlgorithmDAO:
                 status='pending'
             )
             session.add(algo)
+            session.flush()
+            ChangeLogDAO.append(session, [changes.entry('algorithm', algo.id, 'upload')])
+            session.commit()
+            session.refresh(algo)
+            return algo
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def upload_version(algo_id: int, code_text: str) -> Algorithm:
+        """
+        上传新版本：当前源码压缩为相对新源码的反向增量存入 algorithm_versions，
+        algorithms.code 替换为新源码，version 加一，重新评分并回到待审核状态。
+        """
+        session = SessionLocal()
+        try:
+            algo = session.query(Algorithm).get(algo_id)
+            if algo is None:
+                raise ValueError(f"算法不存在：{algo_id}")
+            strat = session.query(ScoringStrategy).get(1)
+            score = scoring.score(code_text, scoring.strategy_weights(strat))
+            session.add(AlgorithmVersion(
+                algorithm_id=algo.id,
+                version=algo.version,
+                delta=versioning.make_delta(code_text, algo.code),
+                score=algo.score
+            ))
+            algo.code    = code_text
+            algo.version = algo.version + 1
+            algo.score   = score
+            algo.status  = 'pending'
+            CardDAO.refresh(session, [algo_id])
+            ChangeLogDAO.append(session, [changes.entry('algorithm', algo_id, 'new_version')])
             session.commit()
             session.refresh(algo)
+            cache.invalidate_algorithm(algo_id)
             return algo
         except SQLAlchemyError:
             session.rollback()
@@ -88,6 +172,80 @@ class AlgorithmDAO:
         finally:
             session.close()
 
+    @staticmethod
+    def get_versions(algo_id: int) -> list[dict]:
+        """
+        列出算法的所有版本（按版本号升序），不还原源码。
+        每个版本的创建时间即上一版本被取代的时间，第一版为算法创建时间。
+        """
+        session = SessionLocal()
+        try:
+            algo = session.query(Algorithm).get(algo_id)
+            if algo is None:
+                return []
+            rows = (
+                session.query(
+                    AlgorithmVersion.version,
+                    AlgorithmVersion.score,
+                    AlgorithmVersion.archived_at,
+                    func.length(AlgorithmVersion.delta)
+                )
+                .filter(AlgorithmVersion.algorithm_id == algo_id)
+                .order_by(AlgorithmVersion.version.asc())
+                .all()
+            )
+            versions = []
+            created = algo.created_at
+            for version, score, archived_at, size in rows:
+                versions.append({'version': version, 'score': score,
+                                 'created_at': created, 'delta_size': size})
+                created = archived_at
+            versions.append({'version': algo.version, 'score': algo.score,
+                             'created_at': created, 'delta_size': None})
+            return versions
+        finally:
+            session.close()
+
+    @staticmethod
+    def get_version_code(algo_id: int, version: int) -> str:
+        return AlgorithmDAO.get_version_codes(algo_id, [version])[version]
+
+    @staticmethod
+    def get_version_codes(algo_id: int, versions: list[int]) -> dict:
+        """
+        还原若干版本的源码，返回 {version: code}。
+        只加载版本号 >= 最小目标版本的增量，从最新源码沿增量链回退一次即可得到全部目标版本。
+        """
+        session = SessionLocal()
+        try:
+            algo = session.query(Algorithm).get(algo_id)
+            if algo is None:
+                raise ValueError(f"算法不存在：{algo_id}")
+            wanted = set(versions)
+            result = {}
+            text = algo.code
+            if algo.version in wanted:
+                result[algo.version] = text
+            lowest = min(wanted)
+            if lowest < algo.version:
+                deltas = (
+                    session.query(AlgorithmVersion.version, AlgorithmVersion.delta)
+                    .filter(AlgorithmVersion.algorithm_id == algo_id,
+                            AlgorithmVersion.version >= lowest)
+                    .order_by(AlgorithmVersion.version.desc())
+                    .all()
+                )
+                for version, delta in deltas:
+                    text = versioning.apply_delta(text, delta)
+                    if version in wanted:
+                        result[version] = text
+            missing = wanted - result.keys()
+            if missing:
+                raise ValueError(f"版本不存在：v{min(missing)}")
+            return result
+        finally:
+            session.close()
+
     @staticmethod
     def get_approved(query: str = None, tags: str = None, category: str = None) -> list[Algorithm]:
         session = SessionLocal()
@@ -129,10 +287,68 @@ class AlgorithmDAO:
             session.close()
 
     @staticmethod
-    def review(admin_id: int, algo_id: int, action: str):
+    def iter_export(algo_ids: list[int] = None, query: str = None, tags: str = None,
+                    category: str = None, batch_size: int = 100):
+        """
+        逐行产出待导出的已通过算法（dict，含作者名与源码），只查询需要的列、不构造 ORM 对象；
+        以服务端游标按 batch_size 分批拉取，内存占用与结果总数无关。
+        """
+        session = SessionLocal()
+        try:
+            q = (
+                session.query(
+                    Algorithm.id, Algorithm.title, User.username.label('owner'),
+                    Algorithm.tags, Algorithm.category, Algorithm.version,
+                    Algorithm.score, Algorithm.status, Algorithm.created_at, Algorithm.code
+                )
+                .join(User, Algorithm.owner_id == User.id)
+                .filter(Algorithm.status == 'approved')
+            )
+            if algo_ids is not None:
+                q = q.filter(Algorithm.id.in_(algo_ids))
+            if query:
+                q = q.filter(Algorithm.title.ilike(f"%{query}%"))
+            if tags:
+                q = q.filter(Algorithm.tags.ilike(f"%{tags}%"))
+            if category:
+                q = q.filter(Algorithm.category == category)
+            q = q.order_by(Algorithm.id).execution_options(stream_results=True).yield_per(batch_size)
+            for row in q:
+                yield row._asdict()
+        finally:
+            session.close()
+
+    @staticmethod
+    def get_code_versions() -> dict[int, int]:
+        """所有算法的 {ID: 版本号}，用于核对代码检索索引是否过期"""
+        session = SessionLocal()
+        try:
+            return dict(session.query(Algorithm.id, Algorithm.version).all())
+        finally:
+            session.close()
+
+    @staticmethod
+    def iter_code(algo_ids: list[int] = None, batch_size: int = 100):
+        """逐行产出 (ID, 版本号, 源码)，algo_ids 为 None 时为全部算法；按 batch_size 分批拉取"""
+        session = SessionLocal()
+        try:
+            q = session.query(Algorithm.id, Algorithm.version, Algorithm.code)
+            if algo_ids is not None:
+                q = q.filter(Algorithm.id.in_(algo_ids))
+            q = q.order_by(Algorithm.id).execution_options(stream_results=True).yield_per(batch_size)
+            for row in q:
+                yield tuple(row)
+        finally:
+            session.close()
+
+    @staticmethod
+    @retry_transient
+    def review(admin_id: int, algo_id: int, action: str, row_version: int = None):
+        """row_version 为审核者读到的版本，算法在此之后被修改（如上传了新版本）或删除时抛出 ConcurrencyError"""
         session = SessionLocal()
         try:
             algo = session.query(Algorithm).get(algo_id)
+            check_version(algo, row_version, f"算法 {algo_id} ")
             algo.status = action
             log = AdminLog(
                 admin_id=admin_id,
@@ -141,7 +357,11 @@ class AlgorithmDAO:
                 target_id=algo_id
             )
             session.add(log)
+            CardDAO.refresh(session, [algo_id])
+            ChangeLogDAO.append(session, [changes.entry('algorithm', algo_id, action)])
+            title, tags, category = algo.title, algo.tags, algo.category
             session.commit()
+            cache.invalidate_algorithm(algo_id, title, tags, category)
         except SQLAlchemyError:
             session.rollback()
             raise
@@ -149,12 +369,72 @@ class AlgorithmDAO:
             session.close()
 
     @staticmethod
-    def delete(algo_id: int):
+    @retry_transient
+    def review_many(admin_id: int, algo_ids: list[int], action: str) -> int:
+        """
+        批量审核：action 为 approved / rejected / delete。
+        一个事务内执行一条集合式 UPDATE（或按表的集合式 DELETE）并批量插入 admin_logs，
+        返回实际处理的算法数（不存在的 ID 被忽略）。
+        通过与驳回只处理仍为 pending 的算法（选中行加锁，UPDATE 同样带状态条件），
+        不会覆盖其他管理员已作出的审核结果；删除不限状态。
+        """
+        if action not in ('approved', 'rejected', 'delete'):
+            raise ValueError(f"未知的审核操作：{action}")
+        if not algo_ids:
+            return 0
+        session = SessionLocal()
+        try:
+            q = (
+                session.query(Algorithm.id, Algorithm.title, Algorithm.tags, Algorithm.category)
+                .filter(Algorithm.id.in_(set(algo_ids)))
+            )
+            if action != 'delete':
+                q = q.filter(Algorithm.status == 'pending')
+            rows = q.with_for_update().all()
+            ids = [r.id for r in rows]
+            if not ids:
+                return 0
+            if action == 'delete':
+                # 不经 ORM 级联：先按表删除子记录，再删除算法本身
+                for child in (Comment, DownloadLog, DownloadDaily, AlgorithmVersion, AnalysisResult,
+                              AlgorithmTrending, AlgorithmCard):
+                    session.query(child).filter(child.algorithm_id.in_(ids)).delete(synchronize_session=False)
+                session.query(Algorithm).filter(Algorithm.id.in_(ids)).delete(synchronize_session=False)
+            else:
+                updated = session.query(Algorithm).filter(
+                    Algorithm.id.in_(ids), Algorithm.status == 'pending'
+                ).update({Algorithm.status: action, Algorithm.row_version: Algorithm.row_version + 1},
+                         synchronize_session=False)
+                if updated != len(ids):   # 行已加锁，只有不支持行锁的数据库（SQLite）上才可能发生
+                    raise ConcurrencyError("部分算法已被其他管理员审核，请刷新后重试")
+                CardDAO.refresh(session, ids)
+            session.execute(insert(AdminLog), [
+                {'admin_id': admin_id, 'action': action, 'target_type': 'algorithm', 'target_id': aid}
+                for aid in ids
+            ])
+            ChangeLogDAO.append(session, [changes.entry('algorithm', aid, action) for aid in ids])
+            session.commit()
+            for r in rows:
+                cache.invalidate_algorithm(r.id, r.title, r.tags, r.category)
+            return len(ids)
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    @retry_transient
+    def delete(algo_id: int, row_version: int = None):
+        """row_version 同 review"""
         session = SessionLocal()
         try:
             algo = session.query(Algorithm).get(algo_id)
+            check_version(algo, row_version, f"算法 {algo_id} ")
             session.delete(algo)
+            ChangeLogDAO.append(session, [changes.entry('algorithm', algo_id, 'delete')])
             session.commit()
+            cache.invalidate_algorithm(algo_id)
         except SQLAlchemyError:
             session.rollback()
             raise
@@ -169,22 +449,88 @@ class AlgorithmDAO:
         session = SessionLocal()
         try:
             strat = session.query(ScoringStrategy).get(1)
+            weights = scoring.strategy_weights(strat)
             all_algos = session.query(Algorithm).all()
             for algo in all_algos:
-                tree = ast.parse(algo.code)
-                func_cnt = sum(isinstance(n, ast.FunctionDef) for n in ast.walk(tree))
-                comment_cnt = algo.code.count('#')
-                algo.score = func_cnt * strat.func_weight + comment_cnt * strat.comment_weight
+                algo.score = scoring.score(algo.code, weights)
+            CardDAO.refresh(session)
+            ChangeLogDAO.append(session, [changes.entry('strategy', 1, 'rescored')])
             session.commit()
+            cache.invalidate_lists()
         except:
             session.rollback()
             raise
         finally:
             session.close()
 
+# 执行分析结果数据访问对象
+class AnalysisDAO:
+    @staticmethod
+    def save(algo_id: int, kind: str, code_hash: str, status: str,
+             metric: float, result: dict, corpus_version: int = None) -> AnalysisResult:
+        """
+        保存某算法某类分析结果，已存在则覆盖
+        """
+        session = SessionLocal()
+        try:
+            row = (
+                session.query(AnalysisResult)
+                .filter_by(algorithm_id=algo_id, kind=kind)
+                .first()
+            )
+            if row is None:
+                row = AnalysisResult(algorithm_id=algo_id, kind=kind)
+                session.add(row)
+            row.code_hash      = code_hash
+            row.corpus_version = corpus_version
+            row.status         = status
+            row.metric         = metric
+            row.result         = json.dumps(result, ensure_ascii=False)
+            row.created_at     = datetime.utcnow()
+            session.commit()
+            session.refresh(row)
+            return row
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def get(algo_id: int, kind: str) -> AnalysisResult:
+        session = SessionLocal()
+        try:
+            return (
+                session.query(AnalysisResult)
+                .filter_by(algorithm_id=algo_id, kind=kind)
+                .first()
+            )
+        finally:
+            session.close()
+
+    @staticmethod
+    def get_many(algo_ids: list[int], kind: str) -> dict:
+        """
+        批量读取多个算法的某类结果，返回 {algorithm_id: AnalysisResult}
+        """
+        if not algo_ids:
+            return {}
+        session = SessionLocal()
+        try:
+            rows = (
+                session.query(AnalysisResult)
+                .filter(AnalysisResult.kind == kind,
+                        AnalysisResult.algorithm_id.in_(algo_ids))
+                .all()
+            )
+            return {r.algorithm_id: r for r in rows}
+        finally:
+            session.close()
+
 # 评论数据访问对象
 class CommentDAO:
     @staticmethod
+    @retry_transient
     def add(user_id: int, algo_id: int, rating: int, content: str) -> Comment:
         session = SessionLocal()
         try:
@@ -195,8 +541,13 @@ class CommentDAO:
                 content=content
             )
             session.add(c)
+            TrendingDAO.bump(session, [(algo_id, 'comment', datetime.utcnow())])
+            CardDAO.comment_added(session, algo_id, rating)
+            session.flush()
+            ChangeLogDAO.append(session, [changes.entry('comment', c.id, 'add', algo_id)])
             session.commit()
             session.refresh(c)
+            cache.invalidate_comments(algo_id)
             return c
         except SQLAlchemyError:
             session.rollback()
@@ -230,8 +581,12 @@ class CommentDAO:
         try:
             c = session.query(Comment).get(comment_id)
             if c:
+                algo_id = c.algorithm_id
                 session.delete(c)
+                CardDAO.refresh(session, [algo_id])
+                ChangeLogDAO.append(session, [changes.entry('comment', comment_id, 'delete', algo_id)])
                 session.commit()
+                cache.invalidate_comments(algo_id)
         except:
             session.rollback()
             raise
@@ -241,11 +596,14 @@ class CommentDAO:
 # 下载日志数据访问对象
 class DownloadLogDAO:
     @staticmethod
+    @retry_transient
     def record(user_id: int, algo_id: int) -> DownloadLog:
         session = SessionLocal()
         try:
             dl = DownloadLog(user_id=user_id, algorithm_id=algo_id)
             session.add(dl)
+            TrendingDAO.bump(session, [(algo_id, 'download', datetime.utcnow())])
+            CardDAO.downloaded(session, [algo_id])
             session.commit()
             session.refresh(dl)
             return dl
@@ -255,7 +613,277 @@ class DownloadLogDAO:
         finally:
             session.close()
 
+    @staticmethod
+    def iter_pairs(after_id: int = 0, batch_size: int = 5000):
+        """
+        按主键顺序逐行产出 id > after_id 的 (id, user_id, algorithm_id)，跳过匿名下载（user_id 为 0）
+        """
+        session = SessionLocal()
+        try:
+            q = (
+                session.query(DownloadLog.id, DownloadLog.user_id, DownloadLog.algorithm_id)
+                .filter(DownloadLog.id > after_id, DownloadLog.user_id != 0)
+                .order_by(DownloadLog.id)
+                .execution_options(stream_results=True)
+                .yield_per(batch_size)
+            )
+            for row in q:
+                yield tuple(row)
+        finally:
+            session.close()
+
+    @staticmethod
+    def iter_kept_pairs(batch_size: int = 5000):
+        """
+        逐行产出 retention.py 删除原始日志前保留下来的 (user_id, algorithm_id)
+        """
+        session = SessionLocal()
+        try:
+            q = (
+                session.query(DownloadPair.user_id, DownloadPair.algorithm_id)
+                .order_by(DownloadPair.id)
+                .execution_options(stream_results=True)
+                .yield_per(batch_size)
+            )
+            for row in q:
+                yield tuple(row)
+        finally:
+            session.close()
+
+    @staticmethod
+    @retry_transient
+    def record_many(user_id: int, algo_ids: list[int]):
+        """
+        批量记录下载日志：一条多行 INSERT，一次提交
+        """
+        if not algo_ids:
+            return
+        session = SessionLocal()
+        try:
+            session.execute(
+                insert(DownloadLog),
+                [{'user_id': user_id, 'algorithm_id': aid} for aid in algo_ids]
+            )
+            now = datetime.utcnow()
+            TrendingDAO.bump(session, [(aid, 'download', now) for aid in algo_ids])
+            CardDAO.downloaded(session, algo_ids)
+            session.commit()
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+
+# 热度数据访问对象
+class TrendingDAO:
+    @staticmethod
+    def bump(session, events: list):
+        """
+        在调用方的事务中累加热度，events 为 [(algo_id, 事件类型, 时间), ...]。
+        同一算法的多个事件先合并，再以一条 upsert（trending.upsert）在数据库中累加，由调用方提交。
+        """
+        deltas = {}
+        for algo_id, kind, when in events:
+            deltas[algo_id] = trending.logaddexp(deltas.get(algo_id), trending.event_log_weight(kind, when))
+        if deltas:
+            session.execute(trending.upsert(session.get_bind().dialect.name, deltas, datetime.utcnow()))
+
+    @staticmethod
+    def get_trending(query: str = None, tags: str = None, category: str = None,
+                     limit: int = None) -> list[tuple]:
+        """
+        按热度降序返回已通过算法 [(Algorithm, log_score)]，无下载与评论的排在最后；
+        按 algorithm_trending.log_score 索引排序，不做聚合
+        """
+        session = SessionLocal()
+        try:
+            q = (
+                session.query(Algorithm, AlgorithmTrending.log_score)
+                .options(joinedload(Algorithm.owner))
+                .outerjoin(AlgorithmTrending, AlgorithmTrending.algorithm_id == Algorithm.id)
+                .filter(Algorithm.status == 'approved')
+            )
+            if query:
+                q = q.filter(Algorithm.title.ilike(f"%{query}%"))
+            if tags:
+                q = q.filter(Algorithm.tags.ilike(f"%{tags}%"))
+            if category:
+                q = q.filter(Algorithm.category == category)
+            q = q.order_by(AlgorithmTrending.log_score.is_(None), AlgorithmTrending.log_score.desc(),
+                           Algorithm.id)
+            if limit:
+                q = q.limit(limit)
+            return [tuple(r) for r in q.all()]
+        finally:
+            session.close()
+
+    @staticmethod
+    def rebuild(batch_size: int = 1000) -> int:
+        """
+        从现有下载日志与评论重建全部热度（仅在首次启用或数据修复时使用）
+        """
+        session = SessionLocal()
+        try:
+            scores = {}
+            for model, time_col, kind in ((DownloadLog, DownloadLog.downloaded_at, 'download'),
+                                          (Comment, Comment.created_at, 'comment')):
+                q = session.query(model.algorithm_id, time_col).yield_per(batch_size)
+                for algo_id, when in q:
+                    scores[algo_id] = trending.logaddexp(scores.get(algo_id),
+                                                         trending.event_log_weight(kind, when))
+            # 已滚动汇总的历史下载按其日期中午计
+            for algo_id, day, count in session.query(DownloadDaily.algorithm_id, DownloadDaily.day,
+                                                     DownloadDaily.count):
+                when = datetime(day.year, day.month, day.day, 12)
+                scores[algo_id] = trending.logaddexp(scores.get(algo_id),
+                                                     trending.event_log_weight('download', when, count))
+            session.query(AlgorithmTrending).delete(synchronize_session=False)
+            now = datetime.utcnow()
+            if scores:
+                session.execute(insert(AlgorithmTrending), [
+                    {'algorithm_id': aid, 'log_score': score, 'updated_at': now} for aid, score in scores.items()
+                ])
+            session.commit()
+            return len(scores)
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+# 算法卡片读模型数据访问对象
+class CardDAO:
+    @staticmethod
+    def refresh(session, algo_ids: list = None):
+        """在调用方的事务中按源表重算卡片（None 为全部），由调用方提交"""
+        session.flush()
+        for stmt in cards.refresh(algo_ids):
+            session.execute(stmt)
+
+    @staticmethod
+    def comment_added(session, algo_id: int, rating: int):
+        session.execute(cards.comment_added(algo_id, rating))
+
+    @staticmethod
+    def downloaded(session, algo_ids: list):
+        stmt, params = cards.downloaded(algo_ids)
+        session.execute(stmt, params)
+
+    @staticmethod
+    def get_terms(algo_ids: list = None) -> list[tuple]:
+        """
+        已通过算法的 (ID, 标题, 标签, 分类)，供内存检索索引（fuzzy.py）载入与增量更新
+        """
+        session = SessionLocal()
+        try:
+            q = session.query(AlgorithmCard.algorithm_id, AlgorithmCard.title, AlgorithmCard.tags,
+                              AlgorithmCard.category)
+            if algo_ids is not None:
+                q = q.filter(AlgorithmCard.algorithm_id.in_(algo_ids))
+            return [tuple(r) for r in q]
+        finally:
+            session.close()
+
+    @staticmethod
+    def list(query: str = None, tags: str = None, category: str = None, limit: int = None,
+             algo_ids: list = None) -> list[AlgorithmCard]:
+        """
+        列表页：按评分降序返回已通过算法的卡片，单表查询，分类过滤与排序走 (category, score) 索引；
+        给定 algo_ids 时只取这些算法（客户端按变更日志就地更新列表时使用）
+        """
+        session = SessionLocal()
+        try:
+            q = session.query(AlgorithmCard)
+            if algo_ids is not None:
+                q = q.filter(AlgorithmCard.algorithm_id.in_(algo_ids))
+            if query:
+                q = q.filter(AlgorithmCard.title.ilike(f"%{query}%"))
+            if tags:
+                q = q.filter(AlgorithmCard.tags.ilike(f"%{tags}%"))
+            if category:
+                q = q.filter(AlgorithmCard.category == category)
+            q = q.order_by(AlgorithmCard.score.desc(), AlgorithmCard.algorithm_id)
+            if limit:
+                q = q.limit(limit)
+            return q.all()
+        finally:
+            session.close()
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+        按源表重建全部卡片（仅在首次启用或数据修复时使用），返回卡片数
+        """
+        session = SessionLocal()
+        try:
+            CardDAO.refresh(session)
+            session.commit()
+            return session.query(func.count(AlgorithmCard.algorithm_id)).scalar()
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+class ChangeLogDAO:
+    @staticmethod
+    def append(session, entries: list):
+        """
+        在调用方的事务末尾追加变更（entries 为 changes.entry 的列表），由调用方随即提交：
+        先 flush 本事务的 ORM 修改，再锁计数器分配序号，缩短计数器行锁的持有时间
+        """
+        if not entries:
+            return
+        session.flush()
+        session.execute(changes.reserve(len(entries)))
+        last = session.execute(changes.head()).first()[0]
+        stmt, params = changes.insert_rows(last, entries, datetime.utcnow())
+        session.execute(stmt, params)
+
+    @staticmethod
+    def head() -> int:
+        session = SessionLocal()
+        try:
+            return session.execute(changes.head()).first()[0]
+        finally:
+            session.close()
+
+    @staticmethod
+    def since(seq: int, limit: int) -> tuple:
+        """
+        返回 (当前最大序号, 已清理到的序号, 序号大于 seq 的前 limit 条变更)；
+        变更只取到先读出的最大序号为止，这些序号的事务都已提交
+        """
+        session = SessionLocal()
+        try:
+            head, pruned = session.execute(changes.head()).first()
+            rows = session.execute(changes.since(seq, head, limit)).all()
+            return head, pruned, rows
+        finally:
+            session.close()
 
+    @staticmethod
+    def prune(cutoff: datetime, batch_size: int) -> int:
+        """按序号分批删除早于 cutoff 的变更，每批一个短事务，返回删除行数"""
+        session = SessionLocal()
+        try:
+            upto = session.execute(changes.prunable(cutoff)).scalar()
+            pruned = session.execute(changes.head()).first()[1]
+            total = 0
+            while upto is not None and pruned < upto:
+                pruned = min(upto, pruned + batch_size)
+                drop, advance = changes.prune(pruned)
+                total += session.execute(drop).rowcount
+                session.execute(advance)
+                session.commit()
+            return total
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
 
 # 平台统计数据访问对象
 class StatsDAO:
@@ -270,7 +898,9 @@ class StatsDAO:
                 'approved_algorithms': session.query(Algorithm).filter(Algorithm.status=='approved').count(),
                 'rejected_algorithms': session.query(Algorithm).filter(Algorithm.status=='rejected').count(),
                 'total_comments': session.query(Comment).count(),
+                # 已滚动汇总的历史下载 + 保留期内的原始下载日志
                 'total_downloads': session.query(DownloadLog).count()
+                                   + session.query(func.coalesce(func.sum(DownloadDaily.count), 0)).scalar()
             }
             return stats
         finally:
@@ -292,13 +922,16 @@ class ScoringStrategyDAO:
             session.close()
 
     @staticmethod
-    def update(admin_id: int, func_weight: int, comment_weight: int):
+    @retry_transient
+    def update(admin_id: int, func_weight: int, comment_weight: int, row_version: int = None):
         """
-        更新评分策略，并在 admin_logs 中记录这次操作
+        更新评分策略，并在 admin_logs 中记录这次操作；
+        row_version 为调用方读到的策略版本，期间策略已被其他管理员修改时抛出 ConcurrencyError
         """
         session = SessionLocal()
         try:
             strat = session.query(ScoringStrategy).get(1)
+            check_version(strat, row_version, "评分策略")
             strat.func_weight    = func_weight
             strat.comment_weight = comment_weight
             log = AdminLog(
@@ -308,6 +941,7 @@ class ScoringStrategyDAO:
                 target_id=1
             )
             session.add(log)
+            ChangeLogDAO.append(session, [changes.entry('strategy', 1, 'update')])
             session.commit()
         except:
             session.rollback()
@@ -315,6 +949,23 @@ class ScoringStrategyDAO:
         finally:
             session.close()
 
+    @staticmethod
+    def get_history_rollups() -> list[AdminLogDaily]:
+        """
+        已滚动汇总的评分策略操作（按天），按日期倒序，并预加载 admin 关系
+        """
+        session = SessionLocal()
+        try:
+            return (
+                session.query(AdminLogDaily)
+                .options(joinedload(AdminLogDaily.admin))
+                .filter(AdminLogDaily.target_type == 'scoring_strategy')
+                .order_by(AdminLogDaily.day.desc())
+                .all()
+            )
+        finally:
+            session.close()
+
     @staticmethod
     def get_history() -> list[AdminLog]:
         """
@@ -331,3 +982,353 @@ class ScoringStrategyDAO:
             )
         finally:
             session.close()
+
+
+# 日志保留数据访问对象
+class RetentionDAO:
+    @staticmethod
+    def _rollup_batch(log_model, time_field: str, daily_model, key_fields: tuple,
+                      cutoff: datetime, batch_size: int, archive, keep=None) -> int:
+        """
+        取早于 cutoff 的最旧 batch_size 行原始日志：先交给 archive(rows) 归档，
+        再按 (日期, *key_fields) 累加到汇总表，keep(session, rows) 保存其余需要长期保留的信息，
+        最后按主键删除这些行，在一个短事务内完成。
+        返回本批处理的行数（0 表示已无过期日志）。
+        """
+        session = SessionLocal()
+        try:
+            time_col = getattr(log_model, time_field)
+            rows = [
+                r._asdict() for r in
+                session.query(*log_model.__table__.columns)
+                .filter(time_col < cutoff)
+                .order_by(log_model.id)
+                .limit(batch_size)
+            ]
+            if not rows:
+                return 0
+            archive(rows)
+            counts = Counter((r[time_field].date(),) + tuple(r[f] for f in key_fields) for r in rows)
+            first = getattr(daily_model, key_fields[0])
+            existing = (
+                session.query(daily_model)
+                .filter(daily_model.day.in_({k[0] for k in counts}),
+                        first.in_({k[1] for k in counts}))
+                .all()
+            )
+            by_key = {(d.day,) + tuple(getattr(d, f) for f in key_fields): d for d in existing}
+            for key, n in counts.items():
+                if key in by_key:
+                    by_key[key].count += n
+                else:
+                    session.add(daily_model(day=key[0], count=n, **dict(zip(key_fields, key[1:]))))
+            if keep:
+                keep(session, rows)
+            session.query(log_model).filter(log_model.id.in_([r['id'] for r in rows])) \
+                .delete(synchronize_session=False)
+            session.commit()
+            return len(rows)
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def _keep_pairs(session, rows: list):
+        """把本批下载中尚未保存的 (用户, 算法) 对写入 download_pairs（跳过匿名下载），共现推荐重建时仍能读到"""
+        pairs = {(r['user_id'], r['algorithm_id']) for r in rows if r['user_id'] != 0}
+        if not pairs:
+            return
+        existing = set(
+            session.query(DownloadPair.user_id, DownloadPair.algorithm_id)
+            .filter(DownloadPair.user_id.in_({u for u, _ in pairs}),
+                    DownloadPair.algorithm_id.in_({a for _, a in pairs}))
+            .all()
+        )
+        session.add_all(DownloadPair(user_id=u, algorithm_id=a) for u, a in sorted(pairs - existing))
+
+    @staticmethod
+    def rollup_downloads(cutoff: datetime, batch_size: int, archive) -> int:
+        return RetentionDAO._rollup_batch(DownloadLog, 'downloaded_at', DownloadDaily,
+                                          ('algorithm_id',), cutoff, batch_size, archive,
+                                          keep=RetentionDAO._keep_pairs)
+
+    @staticmethod
+    def rollup_admin_logs(cutoff: datetime, batch_size: int, archive) -> int:
+        return RetentionDAO._rollup_batch(AdminLog, 'timestamp', AdminLogDaily,
+                                          ('admin_id', 'target_type', 'action'), cutoff, batch_size, archive)
+
+
+# 后台重算分数数据访问对象
+class RescoreDAO:
+    @staticmethod
+    def start() -> RescoreRun:
+        """
+        开始或继续一次重算：最近一次未完成（running / failed）的任务权重与当前策略相同则从其检查点继续，
+        否则将其标记为 superseded 并按当前策略新建任务
+        """
+        session = SessionLocal()
+        try:
+            strat = session.query(ScoringStrategy).get(1)
+            unfinished = (
+                session.query(RescoreRun)
+                .filter(RescoreRun.status.in_(('running', 'failed')))
+                .order_by(RescoreRun.id.desc())
+                .with_for_update()
+                .all()
+            )
+            run = None
+            for r in unfinished:
+                if run is None and (r.func_weight, r.comment_weight) == (strat.func_weight, strat.comment_weight):
+                    run = r
+                    run.status, run.error = 'running', None
+                else:
+                    r.status = 'superseded'
+                    r.finished_at = datetime.utcnow()
+            if run is None:
+                run = RescoreRun(
+                    func_weight=strat.func_weight,
+                    comment_weight=strat.comment_weight,
+                    total=session.query(func.count(Algorithm.id)).scalar()
+                )
+                session.add(run)
+            run.updated_at = datetime.utcnow()
+            session.commit()
+            session.refresh(run)
+            return run
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def next_chunk(after_id: int, batch_size: int) -> list[tuple]:
+        """ID 大于 after_id 的下一批 (ID, 版本号, 源码)"""
+        session = SessionLocal()
+        try:
+            rows = (
+                session.query(Algorithm.id, Algorithm.version, Algorithm.code)
+                .filter(Algorithm.id > after_id)
+                .order_by(Algorithm.id)
+                .limit(batch_size)
+                .all()
+            )
+            return [tuple(r) for r in rows]
+        finally:
+            session.close()
+
+    @staticmethod
+    def save_chunk(run_id: int, after_id: int, last_id: int, scores: list[tuple]) -> bool:
+        """
+        一个短事务：写入一块分数 [(ID, 版本号, 分数)] 并把检查点从 after_id 推进到 last_id。
+        按版本号条件更新，期间上传了新版本的算法保留其上传时的分数。
+        任务已被取代或检查点已被其他进程推进时不写入，返回 False。
+        """
+        session = SessionLocal()
+        try:
+            run = session.query(RescoreRun).filter_by(id=run_id).with_for_update().first()
+            if run is None or run.status != 'running' or run.last_id != after_id:
+                session.rollback()
+                return False
+            if scores:
+                table = Algorithm.__table__
+                session.execute(
+                    update(table)
+                    .where(table.c.id == bindparam('aid'), table.c.version == bindparam('ver'))
+                    .values(score=bindparam('new_score')),
+                    [{'aid': aid, 'ver': ver, 'new_score': sc} for aid, ver, sc in scores]
+                )
+                CardDAO.refresh(session, [aid for aid, _, _ in scores])
+            run.last_id    = last_id
+            run.processed  = run.processed + len(scores)
+            run.updated_at = datetime.utcnow()
+            session.commit()
+            cache.invalidate_lists()
+            return True
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def finish(run_id: int, status: str, error: str = None):
+        session = SessionLocal()
+        try:
+            run = session.query(RescoreRun).get(run_id)
+            if run is not None and run.status == 'running':
+                run.status      = status
+                run.error       = error
+                run.finished_at = run.updated_at = datetime.utcnow()
+                if status == 'done':
+                    ChangeLogDAO.append(session, [changes.entry('strategy', 1, 'rescored')])
+                session.commit()
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def get_latest() -> RescoreRun:
+        session = SessionLocal()
+        try:
+            return session.query(RescoreRun).order_by(RescoreRun.id.desc()).first()
+        finally:
+            session.close()
+
+
+# 后台任务队列数据访问对象
+class JobDAO:
+    @staticmethod
+    def enqueue(kind: str, payload: dict = None, priority: int = 0, created_by: int = None,
+                max_attempts: int = None) -> Job:
+        session = SessionLocal()
+        try:
+            job = Job(kind=kind, payload=json.dumps(payload or {}, ensure_ascii=False), priority=priority,
+                      created_by=created_by, max_attempts=max_attempts or config.JOB_MAX_ATTEMPTS,
+                      run_after=datetime.utcnow())
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+            return job
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def _claimable(now: datetime):
+        return or_(
+            and_(Job.status == 'queued', Job.run_after <= now),
+            and_(Job.status == 'running', Job.lease_expires < now),
+        )
+
+    @staticmethod
+    def claim(owner: str, kinds: list = None, lease_seconds: int = None) -> Job:
+        """
+        领取优先级最高、最早入队的一个可执行任务（含租约已过期的 running 任务），返回 None 表示暂无任务。
+        MySQL 上以 SELECT … FOR UPDATE SKIP LOCKED 跳过其他 worker 正在领取的行；
+        SQLite 不支持行锁，依靠带原状态条件的 UPDATE（影响行数为 0 即被他人抢先）保证只被领取一次。
+        重试次数已用尽且租约过期的任务直接标记为 failed。
+        """
+        lease_seconds = lease_seconds or config.JOB_LEASE_SECONDS
+        session = SessionLocal()
+        try:
+            while True:
+                now = datetime.utcnow()
+                q = session.query(Job).filter(JobDAO._claimable(now))
+                if kinds:
+                    q = q.filter(Job.kind.in_(kinds))
+                job = (
+                    q.order_by(Job.priority.desc(), Job.id)
+                    .with_for_update(skip_locked=True)
+                    .first()
+                )
+                if job is None:
+                    session.rollback()
+                    return None
+                expired = job.status == 'running'
+                if expired and job.attempts >= job.max_attempts:
+                    values = {Job.status: 'failed', Job.finished_at: now, Job.lease_owner: None,
+                              Job.error: '\n'.join(filter(None, (job.error, f"租约过期（{job.lease_owner}）")))}
+                else:
+                    values = {Job.status: 'running', Job.attempts: Job.attempts + 1, Job.lease_owner: owner,
+                              Job.lease_expires: now + timedelta(seconds=lease_seconds), Job.started_at: now}
+                claimed = (
+                    session.query(Job)
+                    .filter(Job.id == job.id, Job.status == job.status,
+                            Job.lease_owner.is_(None) if job.lease_owner is None
+                            else Job.lease_owner == job.lease_owner)
+                    .update(values, synchronize_session=False)
+                )
+                session.commit()
+                if claimed and values[Job.status] == 'running':
+                    return session.query(Job).get(job.id)
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def heartbeat(job_ids: list, owner: str, lease_seconds: int = None) -> int:
+        """为本 worker 持有的任务续约，返回续约成功的任务数"""
+        if not job_ids:
+            return 0
+        lease_seconds = lease_seconds or config.JOB_LEASE_SECONDS
+        session = SessionLocal()
+        try:
+            n = (
+                session.query(Job)
+                .filter(Job.id.in_(job_ids), Job.status == 'running', Job.lease_owner == owner)
+                .update({Job.lease_expires: datetime.utcnow() + timedelta(seconds=lease_seconds)},
+                        synchronize_session=False)
+            )
+            session.commit()
+            return n
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def finish(job_id: int, owner: str, duration: float, result=None, error: str = None) -> str:
+        """
+        记录一次执行结果与耗时：成功为 done；失败且未超过次数时回到 queued 并按退避时间延后，否则为 failed。
+        任务已不由 owner 持有（租约过期后被他人领取）时不做修改。返回任务的新状态。
+        """
+        session = SessionLocal()
+        try:
+            job = session.query(Job).filter_by(id=job_id).with_for_update().first()
+            if job is None or job.status != 'running' or job.lease_owner != owner:
+                session.rollback()
+                return job.status if job else None
+            now = datetime.utcnow()
+            job.duration, job.lease_owner, job.lease_expires = duration, None, None
+            if error is None:
+                job.status, job.error, job.finished_at = 'done', None, now
+                job.result = json.dumps(result, ensure_ascii=False, default=str)
+            elif job.attempts < job.max_attempts:
+                job.status, job.error = 'queued', error
+                job.run_after = now + timedelta(seconds=config.JOB_RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1))
+            else:
+                job.status, job.error, job.finished_at = 'failed', error, now
+            session.commit()
+            return job.status
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def get(job_id: int) -> Job:
+        session = SessionLocal()
+        try:
+            return session.query(Job).get(job_id)
+        finally:
+            session.close()
+
+    @staticmethod
+    def get_latest(kind: str) -> Job:
+        session = SessionLocal()
+        try:
+            return session.query(Job).filter_by(kind=kind).order_by(Job.id.desc()).first()
+        finally:
+            session.close()
+
+    @staticmethod
+    def list_recent(limit: int = 50, status: str = None) -> list[Job]:
+        session = SessionLocal()
+        try:
+            q = session.query(Job)
+            if status:
+                q = q.filter(Job.status == status)
+            return q.order_by(Job.id.desc()).limit(limit).all()
+        finally:
+            session.close()
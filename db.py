@@ -8,9 +8,9 @@
 import mysql.connector
 from mysql.connector import Error
 import bcrypt
-import ast
 import datetime
 import config
+import scoring
 
 
 def create_root_connection():
@@ -76,6 +76,7 @@ def init_db():
             score FLOAT DEFAULT 0,
             status ENUM('pending','approved','rejected') DEFAULT 'pending',
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            row_version INT NOT NULL DEFAULT 1,
             FOREIGN KEY(owner_id) REFERENCES users(id) ON DELETE CASCADE
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
     """)
@@ -120,7 +121,8 @@ def init_db():
         CREATE TABLE IF NOT EXISTS scoring_strategy (
             id INT PRIMARY KEY,
             func_weight INT,
-            comment_weight INT
+            comment_weight INT,
+            row_version INT NOT NULL DEFAULT 1
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
     """)
     # 默认插入一条策略
@@ -202,13 +204,10 @@ def get_scoring_strategy() -> dict:
 
 def score_algorithm(code_text: str) -> float:
     """
-    按策略自动评分：函数定义数*func_weight + 注释数*comment_weight
+    按策略自动评分：函数定义数*func_weight + 注释数*comment_weight（见 scoring.py）
     """
     strat = get_scoring_strategy()
-    tree = ast.parse(code_text)
-    func_cnt = sum(isinstance(n, ast.FunctionDef) for n in ast.walk(tree))
-    comment_cnt = code_text.count('#')
-    return func_cnt * strat['func_weight'] + comment_cnt * strat['comment_weight']
+    return scoring.score(code_text, scoring.strategy_weights(strat))
 
 
 def upload_algorithm(owner_id: int, title: str, description: str,
@@ -0,0 +1,44 @@
+# errors.py
+"""
+跨层共用的异常类型与重试策略（不依赖数据库驱动，client.py 也可导入）。
+- ConcurrencyError：乐观并发冲突。调用方读取之后，记录已被其他会话修改或删除。重新读取最新状态后可以重试
+- check_version：写之前核对调用方读到的 row_version（dao.py / async_dao.py 共用）
+- is_transient / retry_delay：死锁等瞬时错误的判定与退避时间，由 dao.py / async_dao.py 的重试装饰器使用
+"""
+import random
+
+import config
+
+# MySQL 死锁（1213）与锁等待超时（1205）：事务已被回滚，整个事务重做即可
+_TRANSIENT_CODES = {1205, 1213}
+
+
+class ConcurrencyError(RuntimeError):
+    """记录已被其他操作修改或删除（row_version 不匹配），刷新后可重试"""
+    retryable = True
+
+
+def check_version(obj, row_version: int, what: str):
+    """
+    写之前核对调用方读到的版本：记录已删除或 row_version 不一致时抛出 ConcurrencyError。
+    row_version 为 None 表示调用方未读取过记录，只在记录不存在时报错。
+    读取之后、提交之前的并发修改由 ORM 的 WHERE row_version=… 检查（StaleDataError）
+    """
+    if obj is None:
+        if row_version is None:
+            raise ValueError(f"{what}不存在")
+        raise ConcurrencyError(f"{what}已被删除")
+    if row_version is not None and obj.row_version != row_version:
+        raise ConcurrencyError(f"{what}已被其他操作修改（版本 {row_version} → {obj.row_version}），请刷新后重试")
+
+
+def is_transient(exc) -> bool:
+    """exc 为 SQLAlchemy 的 DBAPIError：死锁、锁等待超时或 SQLite 数据库被锁"""
+    orig = getattr(exc, 'orig', None)
+    code = orig.args[0] if orig is not None and orig.args else None
+    return code in _TRANSIENT_CODES or 'database is locked' in str(orig)
+
+
+def retry_delay(attempt: int) -> float:
+    """第 attempt 次（从 0 起）重试前等待的秒数：指数退避加随机抖动，不超过 DB_RETRY_MAX_DELAY"""
+    return min(config.DB_RETRY_MAX_DELAY, config.DB_RETRY_BASE_DELAY * 2 ** attempt) * random.uniform(0.5, 1.0)
@@ -0,0 +1,98 @@
+# export.py
+"""
+批量导出：把一批算法源码逐条写入单个压缩包（zip 或 tar.gz），末尾附 manifest.json 记录元数据与评分。
+源码按行从数据库游标流入压缩包，任一时刻只在内存中保留一条源码，内存占用与导出规模无关。
+包内路径：<分类>/<ID>_<标题>.py
+"""
+import hashlib
+import io
+import json
+import re
+import tarfile
+import time
+import zipfile
+from datetime import datetime
+
+FORMATS = ('zip', 'tar.gz')
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def format_for(path: str) -> str:
+    """按文件扩展名推断格式，无法识别时为 zip"""
+    lower = path.lower()
+    if lower.endswith(('.tar.gz', '.tgz')):
+        return 'tar.gz'
+    return 'zip'
+
+
+def entry_name(row: dict) -> str:
+    title = re.sub(r'[^\w\-]+', '_', row['title'] or '').strip('_') or 'algorithm'
+    category = re.sub(r'[^\w\-]+', '_', row['category'] or '').strip('_') or '未分类'
+    return f"{category}/{row['id']}_{title}.py"
+
+
+class _ZipWriter:
+    def __init__(self, fileobj):
+        self._zip = zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def add(self, name: str, data: bytes):
+        self._zip.writestr(name, data)
+
+    def close(self):
+        self._zip.close()
+
+
+class _TarWriter:
+    def __init__(self, fileobj):
+        self._tar = tarfile.open(fileobj=fileobj, mode='w:gz')
+        self._mtime = time.time()
+
+    def add(self, name: str, data: bytes):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = self._mtime
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self._tar.close()
+
+
+def write_archive(fileobj, rows, fmt: str = 'zip') -> dict:
+    """
+    把 rows（dict 可迭代对象，含 id/title/owner/tags/category/version/score/status/created_at/code）
+    逐条写入 fileobj，最后写入 manifest.json；返回 manifest。
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的导出格式：{fmt}")
+    writer = _ZipWriter(fileobj) if fmt == 'zip' else _TarWriter(fileobj)
+    entries = []
+    try:
+        for row in rows:
+            data = row['code'].encode('utf-8')
+            name = entry_name(row)
+            writer.add(name, data)
+            entries.append({
+                'id':         row['id'],
+                'file':       name,
+                'title':      row['title'],
+                'owner':      row['owner'],
+                'tags':       row['tags'],
+                'category':   row['category'],
+                'version':    row['version'],
+                'score':      row['score'],
+                'status':     row['status'],
+                'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+                'size':       len(data),
+                'sha256':     hashlib.sha256(data).hexdigest(),
+            })
+        manifest = {
+            'exported_at': datetime.utcnow().isoformat(),
+            'format':      fmt,
+            'count':       len(entries),
+            'algorithms':  entries,
+        }
+        writer.add(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+    finally:
+        writer.close()
+    return manifest
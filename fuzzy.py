@@ -0,0 +1,150 @@
+# fuzzy.py
+"""
+容错检索：已通过算法标题与标签的三元组（trigram）倒排索引，"Kruskel"、"Dynamc" 也能找到对应算法。
+- 文本小写后按非字母数字切词，每个词补上首部两个、尾部一个空格后取全部三字符片段（同 pg_trgm）
+- 相似度为查询三元组被命中的比例 |Q∩D|/|Q|，并列时按 Jaccard |Q∩D|/|Q∪D| 优先短标题；
+  至少命中 need = ⌈FUZZY_MIN_SIMILARITY·|Q|⌉ 个三元组才算匹配
+- 候选生成只读最稀有的 |Q|-need+1 个三元组的倒排表（任何匹配的文档至少包含其中一个），
+  读到 FUZZY_MAX_CANDIDATES 个符合分类/标签条件的有效候选即停，再对候选逐个计算精确相似度；
+  不加过滤时每次查询的工作量与索引规模无关，过滤条件很严时最多读完这些倒排表
+- 倒排表为只追加的 array('i')：删除或修改算法时只改文档表，失效的倒排项在收集候选时被跳过，
+  失效项累计超过文档数的 1/4 时整体重建倒排表
+- 首次查询时从卡片表载入，之后每隔 FUZZY_SYNC_SECONDS 秒按变更日志（changes.py）只更新有变更的算法
+"""
+import heapq
+import math
+import re
+import sys
+import threading
+import time
+from array import array
+from collections import defaultdict
+
+import config
+from dao import CardDAO, ChangeLogDAO
+
+_WORD = re.compile(r'\w+')
+
+
+def trigrams(text: str) -> set:
+    grams = set()
+    for word in _WORD.findall((text or '').casefold()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self.loaded = False
+        self._seq = 0
+        self._synced_at = 0.0
+
+    def _reset(self):
+        self.docs = {}        # 算法 ID -> (分类, 小写标签, 三元组元组)
+        self._postings = defaultdict(lambda: array('i'))   # 三元组 -> 算法 ID
+        self._stale = 0
+
+    # ─── 增量维护 ────────────────────────────────────────
+
+    def _add(self, algo_id: int, title: str, tags: str, category: str):
+        if algo_id in self.docs:
+            self._stale += 1
+        grams = tuple(map(sys.intern, trigrams(f"{title} {tags or ''}")))   # 元组比集合省内存，各文档共享字符串
+        self.docs[algo_id] = (category, (tags or '').casefold(), grams)
+        for g in grams:
+            self._postings[g].append(algo_id)
+
+    def _remove(self, algo_id: int):
+        if self.docs.pop(algo_id, None) is not None:
+            self._stale += 1
+
+    def _compact(self):
+        if self._stale * 4 <= len(self.docs):
+            return
+        self._postings = defaultdict(lambda: array('i'))
+        for algo_id, (_, _, grams) in self.docs.items():
+            for g in grams:
+                self._postings[g].append(algo_id)
+        self._stale = 0
+
+    def load(self, rows):
+        """rows 为 (算法 ID, 标题, 标签, 分类) 的可迭代对象，整体重建"""
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._add(*row)
+
+    def update(self, algo_ids: list, rows):
+        """algo_ids 中的算法以 rows（仍为已通过的算法）为准，其余的移除"""
+        with self._lock:
+            for aid in algo_ids:
+                self._remove(aid)
+            for row in rows:
+                self._add(*row)
+            self._compact()
+
+    def sync(self, force: bool = False):
+        """首次调用时从卡片表载入；之后按间隔读取变更日志，只重新读取有变更的算法"""
+        with self._lock:
+            if not force and self.loaded and time.monotonic() - self._synced_at < config.FUZZY_SYNC_SECONDS:
+                return
+            if self.loaded:
+                while True:
+                    head, pruned, rows = ChangeLogDAO.since(self._seq, config.CHANGE_FEED_LIMIT)
+                    if self._seq < pruned:
+                        self.loaded = False   # 落后于已清理的日志，整体重载
+                        break
+                    ids = list({r.algorithm_id for r in rows if r.entity == 'algorithm'})
+                    if ids:
+                        self.update(ids, CardDAO.get_terms(ids))
+                    self._seq = rows[-1].seq if len(rows) == config.CHANGE_FEED_LIMIT else head
+                    if self._seq >= head:
+                        break
+            if not self.loaded:
+                self._seq = ChangeLogDAO.head()   # 先取序号再载入，载入期间的变更下次同步时重放
+                self.load(CardDAO.get_terms())
+                self.loaded = True
+            self._synced_at = time.monotonic()
+
+    # ─── 查询 ──────────────────────────────────────────
+
+    def search(self, query: str, k: int = 20, category: str = None, tags: str = None,
+               min_similarity: float = None) -> list:
+        """返回至多 k 个 (算法 ID, 相似度)，按相似度降序；category 精确过滤，tags 按子串过滤（同精确检索）"""
+        self.sync()
+        q = trigrams(query)
+        if not q:
+            return []
+        min_similarity = config.FUZZY_MIN_SIMILARITY if min_similarity is None else min_similarity
+        need = max(1, math.ceil(min_similarity * len(q)))
+        tags = tags.casefold() if tags else None
+        with self._lock:
+            # 最稀有的 |Q|-need+1 个三元组足以找出全部匹配；失效项（已删除、已修改）与不满足分类/标签条件的
+            # 文档在收集时即跳过，上限只计可能匹配的文档，过滤条件很严时也不会被较早的 ID 占满
+            probes = sorted(((g, self._postings.get(g, ())) for g in q), key=lambda p: len(p[1]))
+            candidates = {}
+            for g, postings in probes[:len(q) - need + 1]:
+                for aid in postings:
+                    if aid in candidates:
+                        continue
+                    doc = self.docs.get(aid)
+                    if doc is None or g not in doc[2] or (category and doc[0] != category) \
+                            or (tags and tags not in doc[1]):
+                        continue
+                    candidates[aid] = doc
+                    if len(candidates) >= config.FUZZY_MAX_CANDIDATES:
+                        break
+                if len(candidates) >= config.FUZZY_MAX_CANDIDATES:
+                    break
+            scored = []
+            for aid, doc in candidates.items():
+                shared = len(q.intersection(doc[2]))
+                if shared >= need:
+                    scored.append((shared / len(q), shared / (len(q) + len(doc[2]) - shared), aid))
+        return [(aid, cover) for cover, _, aid in heapq.nlargest(k, scored)]
+
+
+index = TrigramIndex()
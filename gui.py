@@ -3,31 +3,99 @@
 所有 GUI 相关内容，整合为 APP 类，使用 PyQt5 实现。
 """
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5 import QtWidgets, QtCore
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
     QPushButton, QTextEdit, QComboBox, QSpinBox, QMessageBox,
-    QFileDialog, QScrollArea, QFrame, QDialog, QDateEdit
+    QFileDialog, QScrollArea, QFrame, QDialog, QDateEdit, QCheckBox, QInputDialog, QProgressBar, QCompleter
 )
-import logic
+import config
+import autocomplete
+import benchmark
+import complexity
+import export
+import oracle
+import profiling
+from errors import ConcurrencyError
+
+# 配置了 API 服务地址时经由 HTTP 接口访问后端（client 与 logic 接口一致），否则直连数据库
+if config.API_BASE_URL:
+    import client as logic
+else:
+    import logic
 
 CATEGORY_LIST = ["排序", "查找", "图算法", "动态规划"]
 ALL_CATEGORIES = ["全部"] + CATEGORY_LIST
+SEARCH_MODES = ["按评分", "按热度", "按代码", "性能排行"]
 
 
 
+class JobWatcher(QtCore.QObject):
+    """
+    轮询耗时操作的状态而不阻塞界面：worker 执行的后台任务（按任务 ID 查询）或本进程线程中的操作（Future）。
+    结束后在 GUI 线程中调用 on_done(结果) 或 on_error(错误信息)；所属窗口关闭后不再回调
+    """
+    def __init__(self, parent):
+        super().__init__(parent)
+        self._watched = []   # [(poll, on_done, on_error)]，poll 未结束时返回 None，否则返回 (成功, 结果或错误)
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(500)
+        self._timer.timeout.connect(self._poll)
+
+    def watch_job(self, user, job_id: int, on_done, on_error):
+        def poll():
+            job = logic.get_my_job(user, job_id)
+            if job is None:
+                return False, "任务已被删除"
+            if job['status'] == 'done':
+                return True, job['result']
+            if job['status'] == 'failed':
+                return False, job['error'] or "任务执行失败"
+            return None   # queued（含失败后等待重试）或 running
+        self._watch(poll, on_done, on_error)
+
+    def watch_future(self, future, on_done, on_error):
+        def poll():
+            if not future.done():
+                return None
+            exc = future.exception()
+            return (False, str(exc)) if exc is not None else (True, future.result())
+        self._watch(poll, on_done, on_error)
+
+    def _watch(self, poll, on_done, on_error):
+        self._watched.append((poll, on_done, on_error))
+        self._timer.start()
+
+    def _poll(self):
+        for item in list(self._watched):
+            poll, on_done, on_error = item
+            try:
+                state = poll()
+            except Exception as e:
+                state = (False, str(e))
+            if state is None:
+                continue
+            self._watched.remove(item)
+            ok, value = state
+            (on_done if ok else on_error)(value)
+        if not self._watched:
+            self._timer.stop()
+
+
 class DetailDialog(QDialog):
     def __init__(self, parent, algo, is_review=False, review_callback=None):
         super().__init__(parent)
         self.algo = algo
         self.review_callback = review_callback
+        self.jobs = JobWatcher(self)   # 基准测试等分析提交为后台任务，轮询结果
         self.setWindowTitle(f"算法详情 — {algo.title}")
         self.resize(700, 600)
 
         main_layout = QVBoxLayout()
 
         # 1. 标题 & 分类
-        main_layout.addWidget(QLabel(f"<b>{algo.title}</b>  分类: {algo.category}"))
+        main_layout.addWidget(QLabel(f"<b>{algo.title}</b>  分类: {algo.category}  版本: v{algo.version}"))
 
         # 2. 描述展示
         desc_text = algo.description or "<无描述>"
@@ -42,7 +110,54 @@ class DetailDialog(QDialog):
         code_edit.setReadOnly(True)
         main_layout.addWidget(code_edit, stretch=3)
 
-        # 4. 评论列表区（滚动）
+        # 推荐：下载了它的用户也下载了
+        try:
+            recs = logic.get_recommendations(algo.id)
+        except Exception:
+            recs = []
+        if recs:
+            rec_label = QLabel("下载了它的用户也下载了：" + "、".join(
+                f"{r['algo'].title}（{r['similarity']:.0%}）" for r in recs))
+            rec_label.setWordWrap(True)
+            main_layout.addWidget(rec_label)
+
+        # 4. 性能基准（隔离子进程中执行入口函数）
+        bench_row = QHBoxLayout()
+        self.bench_label = QLabel()
+        self.bench_label.setWordWrap(True)
+        bench_row.addWidget(self.bench_label, stretch=1)
+        bench_btns = QVBoxLayout()
+        bench_btn = QPushButton("⏱ 运行基准测试")
+        bench_btn.clicked.connect(self._do_benchmark)
+        bench_btns.addWidget(bench_btn)
+        cplx_btn = QPushButton("📈 估算复杂度")
+        cplx_btn.clicked.connect(self._do_complexity)
+        bench_btns.addWidget(cplx_btn)
+        verify_btn = QPushButton("✔️ 重新验证")
+        verify_btn.clicked.connect(self._do_verify)
+        bench_btns.addWidget(verify_btn)
+        profile_btn = QPushButton("🔥 热点剖析")
+        profile_btn.clicked.connect(self._do_profile)
+        bench_btns.addWidget(profile_btn)
+        bench_btns.addStretch()
+        bench_row.addLayout(bench_btns)
+        main_layout.addWidget(QLabel("— 性能基准 —"))
+        main_layout.addLayout(bench_row)
+        self.cplx_label = QLabel()
+        self.cplx_label.setWordWrap(True)
+        main_layout.addWidget(self.cplx_label)
+        self.verify_label = QLabel()
+        self.verify_label.setWordWrap(True)
+        main_layout.addWidget(self.verify_label)
+        self._show_benchmark(logic.get_benchmark(algo.id))
+        self._show_complexity(logic.get_complexity(algo.id))
+        self.profile_label = QLabel()
+        self.profile_label.setWordWrap(True)
+        main_layout.addWidget(self.profile_label)
+        self._show_verification(logic.get_verification(algo.id))
+        self._show_profile(logic.get_profile(algo.id))
+
+        # 5. 评论列表区（滚动）
         main_layout.addWidget(QLabel("— 评论列表 —"))
         self._comments_container = QWidget()
         self._comments_layout = QVBoxLayout(self._comments_container)
@@ -52,7 +167,7 @@ class DetailDialog(QDialog):
         main_layout.addWidget(comments_scroll, stretch=2)
         self._load_comments()  # 首次加载
 
-        # 5. 提交新评论区域（所有用户可见）
+        # 6. 提交新评论区域（所有用户可见）
         form = QHBoxLayout()
         form.addWidget(QLabel("打分："))
         self.rating_spin = QSpinBox()
@@ -67,7 +182,7 @@ class DetailDialog(QDialog):
         form.addWidget(post_btn)
         main_layout.addLayout(form)
 
-        # 6. 审核 / 删除 算法 （仅管理员可见）
+        # 7. 审核 / 删除 算法 （仅管理员可见）
         if is_review:
             btns = QHBoxLayout()
             approve = QPushButton("通过")
@@ -81,13 +196,69 @@ class DetailDialog(QDialog):
             btns.addWidget(delete_algo)
             main_layout.addLayout(btns)
 
-        # 7. 统一添加下载按钮
+        # 8. 版本历史 / 上传新版本（作者或管理员可上传） & 下载按钮
+        bottom = QHBoxLayout()
+        history_btn = QPushButton("🕘 版本历史")
+        history_btn.clicked.connect(self._show_versions)
+        bottom.addWidget(history_btn)
+        parent_user = getattr(parent, "user", None)
+        if parent_user and (parent_user.role == 'admin' or parent_user.id == algo.owner_id):
+            new_ver_btn = QPushButton("⬆️ 上传新版本")
+            new_ver_btn.clicked.connect(self._do_upload_version)
+            bottom.addWidget(new_ver_btn)
+        bottom.addStretch()
         down_btn = QPushButton("📥 下载")
         down_btn.clicked.connect(self._do_download)
-        main_layout.addWidget(down_btn, alignment=QtCore.Qt.AlignRight)
+        bottom.addWidget(down_btn)
+        main_layout.addLayout(bottom)
 
         self.setLayout(main_layout)
 
+    def _run_analysis(self, kind: str, force: bool, label, busy_text: str, show):
+        """提交后台分析任务（worker 执行），轮询到结束后显示结果；等待期间窗口可继续操作"""
+        user = getattr(self.parent(), "user", None)
+        label.setText(busy_text)
+
+        def failed(message):
+            show(None)
+            QMessageBox.critical(self, "错误", message)
+
+        def done(result):
+            if result.get('status') == 'deleted':
+                failed("算法已被删除")
+            else:
+                show(result)
+        try:
+            job_id = logic.queue_analysis(user, self.algo.id, kind, force)
+        except Exception as e:
+            failed(str(e))
+            return
+        self.jobs.watch_job(user, job_id, done, failed)
+
+    def _show_benchmark(self, result):
+        self.bench_label.setText(benchmark.format_result(result) if result else "<尚未测试>")
+
+    def _do_benchmark(self):
+        self._run_analysis('benchmark', False, self.bench_label, "测试中（后台任务）…", self._show_benchmark)
+
+    def _show_complexity(self, result):
+        self.cplx_label.setText(complexity.format_result(result) if result else "估算复杂度：<尚未估算>")
+
+    def _do_complexity(self):
+        self._run_analysis('complexity', False, self.cplx_label, "估算中（后台任务）…", self._show_complexity)
+
+    def _show_verification(self, result):
+        self.verify_label.setText(oracle.format_result(result) if result else "正确性验证：<尚未验证>")
+
+    def _do_verify(self):
+        self._run_analysis('verify', True, self.verify_label, "验证中（后台任务）…", self._show_verification)
+
+    def _show_profile(self, result):
+        self.profile_label.setText(profiling.format_result(result) if result else "热点剖析：<尚未剖析>")
+
+    def _do_profile(self):
+        self._run_analysis('profile', True, self.profile_label, "剖析中（后台任务）…", self._show_profile)
+
     def _load_comments(self):
         """加载并展示评论，每条评论管理员可删除"""
         # 清空旧条目
@@ -145,26 +316,100 @@ class DetailDialog(QDialog):
                 f.write(code)
             QMessageBox.information(self, "完成", "已下载")
 
+    def _show_versions(self):
+        """版本历史：选择两个版本查看差异，或查看某一版本的完整源码"""
+        versions = logic.list_algo_versions(self.algo.id)
+        dlg = QDialog(self)
+        dlg.setWindowTitle(f"版本历史 — {self.algo.title}")
+        dlg.resize(700, 500)
+        v = QVBoxLayout(dlg)
+        for rec in versions:
+            v.addWidget(QLabel(f"v{rec['version']}  {rec['created_at']:%Y-%m-%d %H:%M:%S}  评分：{rec['score']:.1f}"))
+        form = QHBoxLayout()
+        old_box, new_box = QComboBox(), QComboBox()
+        for rec in versions:
+            old_box.addItem(f"v{rec['version']}", rec['version'])
+            new_box.addItem(f"v{rec['version']}", rec['version'])
+        old_box.setCurrentIndex(max(len(versions) - 2, 0))
+        new_box.setCurrentIndex(len(versions) - 1)
+        form.addWidget(QLabel("从:")); form.addWidget(old_box)
+        form.addWidget(QLabel("到:")); form.addWidget(new_box)
+        view = QTextEdit(); view.setReadOnly(True)
+
+        def show_diff():
+            try:
+                view.setPlainText(logic.diff_algo_versions(
+                    self.algo.id, old_box.currentData(), new_box.currentData()) or "<无差异>")
+            except Exception as e:
+                QMessageBox.critical(dlg, "错误", str(e))
+
+        def show_code():
+            try:
+                view.setPlainText(logic.get_algo_version_code(self.algo.id, new_box.currentData()))
+            except Exception as e:
+                QMessageBox.critical(dlg, "错误", str(e))
+
+        form.addWidget(QPushButton("对比", clicked=show_diff))
+        form.addWidget(QPushButton("查看源码", clicked=show_code))
+        v.addLayout(form)
+        v.addWidget(view)
+        dlg.exec_()
+
+    def _do_upload_version(self):
+        """编辑当前源码并提交为新版本，提交后回到待审核状态"""
+        dlg = QDialog(self)
+        dlg.setWindowTitle(f"上传新版本 — {self.algo.title}")
+        dlg.resize(700, 500)
+        v = QVBoxLayout(dlg)
+        editor = QTextEdit()
+        editor.setPlainText(self.algo.code)
+        v.addWidget(editor)
+
+        def submit():
+            code = editor.toPlainText()
+            if not code.strip():
+                QMessageBox.warning(dlg, "提示", "代码不能为空")
+                return
+            try:
+                version = logic.upload_new_version(self.parent().user, self.algo.id, code)
+                QMessageBox.information(dlg, "成功", f"已上传 v{version}，等待审核")
+                dlg.accept()
+                self.close()
+            except Exception as e:
+                QMessageBox.critical(dlg, "错误", str(e))
+
+        v.addWidget(QPushButton("📤 提交新版本", clicked=submit), alignment=QtCore.Qt.AlignRight)
+        dlg.exec_()
+
     def _do_review(self, action: str):
         try:
-            logic.review_algo(self.parent().user, self.algo.id, action)
-            QMessageBox.information(self, "完成", f"{action} 成功")
+            logic.review_algo(self.parent().user, self.algo.id, action, self.algo.row_version)
             if self.review_callback:
                 self.review_callback(self.algo.id)
             self.close()
+            QMessageBox.information(self.parent(), "完成", f"{action} 成功")
+        except ConcurrencyError as e:
+            self._conflict(e)
         except Exception as e:
             QMessageBox.critical(self, "错误", str(e))
 
     def _do_delete(self):
         try:
-            logic.delete_algo(self.parent().user, self.algo.id)
-            QMessageBox.information(self, "完成", "算法已删除")
+            logic.delete_algo(self.parent().user, self.algo.id, self.algo.row_version)
             if self.review_callback:
                 self.review_callback(self.algo.id)
             self.close()
+            QMessageBox.information(self.parent(), "完成", "算法已删除")
+        except ConcurrencyError as e:
+            self._conflict(e)
         except Exception as e:
             QMessageBox.critical(self, "错误", str(e))
 
+    def _conflict(self, e):
+        """打开详情后算法已被他人修改或删除：关闭窗口，重新打开即看到最新状态"""
+        self.close()
+        QMessageBox.warning(self.parent(), "操作冲突", f"{e}\n\n请重新打开该算法确认最新状态后再操作。")
+
 
 
 
@@ -175,12 +420,23 @@ class App(QMainWindow):
         self.resize(800, 600)
         self.user = None
 
+        # 耗时操作：分析与排行提交为后台任务，导出在后台线程中写本地文件，均由 jobs 轮询
+        self.jobs       = JobWatcher(self)
+        self.background = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gui-export')
+
         # 管理员专属按钮，登录后根据角色显隐
         self.review_btn   = QPushButton("审核算法", clicked=self._show_review_page)
         self.strategy_btn = QPushButton("调整评分策略", clicked=self._show_strategy_page)
         self.review_btn.hide()
         self.strategy_btn.hide()
 
+        # 变更日志轮询：登录后每 CHANGE_POLL_SECONDS 秒读取新变更，就地更新已打开的列表与详情窗口
+        self.change_seq    = 0
+        self.detail_dialog = None
+        self.change_timer  = QtCore.QTimer(self)
+        self.change_timer.setInterval(int(config.CHANGE_POLL_SECONDS * 1000))
+        self.change_timer.timeout.connect(self._poll_changes)
+
         # 页面容器
         self.stack = QtWidgets.QStackedWidget()
         self.setCentralWidget(self.stack)
@@ -221,6 +477,9 @@ class App(QMainWindow):
             if not user:
                 raise ValueError("用户名或密码错误")
             self.user = user
+            self.change_seq = logic.get_change_seq()   # 先取序号再加载页面，加载期间的变更会在下次轮询时补上
+            self.change_timer.start()
+            self._load_suggestions()
             # 管理员按钮显隐
             if user.role == 'admin':
                 self.review_btn.show()
@@ -241,6 +500,10 @@ class App(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "错误", str(e))
 
+    def _do_logout(self):
+        self.change_timer.stop()
+        self.stack.setCurrentWidget(self.login_page)
+
     # ─── 主 菜 单 ─────────────────────────────────────────────────
     def _build_main(self):
         self.main_page = QWidget()
@@ -250,7 +513,7 @@ class App(QMainWindow):
         layout.addWidget(self.review_btn)
         layout.addWidget(self.strategy_btn)
         layout.addWidget(QPushButton("平台统计", clicked=lambda: self.stack.setCurrentWidget(self.stats_page)))
-        layout.addWidget(QPushButton("登出", clicked=lambda: self.stack.setCurrentWidget(self.login_page)))
+        layout.addWidget(QPushButton("登出", clicked=self._do_logout))
         self.stack.addWidget(self.main_page)
 
     # ─── 上传 算 法 ───────────────────────────────────────────────
@@ -306,47 +569,204 @@ class App(QMainWindow):
         layout.addWidget(QLabel("算法检索页面", alignment=QtCore.Qt.AlignCenter))
 
         top = QHBoxLayout()
-        self.search_input = QLineEdit(); self.search_input.setPlaceholderText("🔍 输入关键词…")
+        self.search_input = QLineEdit(); self.search_input.setPlaceholderText("🔍 输入关键词，或 #标签…")
         self.search_cat   = QComboBox(); self.search_cat.addItems(ALL_CATEGORIES)
-        top.addWidget(self.search_input); top.addWidget(self.search_cat)
+        self.search_mode  = QComboBox(); self.search_mode.addItems(SEARCH_MODES)
+        top.addWidget(self.search_input); top.addWidget(self.search_cat); top.addWidget(self.search_mode)
         top.addWidget(QPushButton("搜索", clicked=self._do_search))
+        top.addWidget(QPushButton("📦 导出", clicked=self._do_export))
         layout.addLayout(top)
 
+        # 输入提示：停止输入 AUTOCOMPLETE_DEBOUNCE_MS 毫秒后查询内存前缀索引（登录时载入，随变更日志增量更新）
+        self.suggest_index = autocomplete.PrefixIndex()
+        self.suggest_model = QtCore.QStringListModel(self)
+        completer = QCompleter(self.suggest_model, self)
+        completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)   # 过滤已由索引完成
+        completer.activated[str].connect(lambda _: self._do_search())
+        self.search_input.setCompleter(completer)
+        self.suggest_timer = QtCore.QTimer(self)
+        self.suggest_timer.setSingleShot(True)
+        self.suggest_timer.setInterval(config.AUTOCOMPLETE_DEBOUNCE_MS)
+        self.suggest_timer.timeout.connect(self._suggest)
+        self.search_input.textEdited.connect(lambda _: self.suggest_timer.start())
+        self.search_input.returnPressed.connect(self._do_search)
+
         self.search_scroll    = QScrollArea(); self.search_scroll.setWidgetResizable(True)
         self.search_container = QWidget(); self.search_vbox = QVBoxLayout(self.search_container)
         self.search_scroll.setWidget(self.search_container)
         layout.addWidget(self.search_scroll)
+        self.search_cards = {}    # algo_id -> 卡片
+        self.search_view  = None  # 当前结果对应的 (模式, 关键词, 标签, 分类)
 
         layout.addWidget(QPushButton("🔙 返回", clicked=lambda: self.stack.setCurrentWidget(self.main_page)))
         self.stack.addWidget(self.search_page)
 
+    def _search_terms(self):
+        """检索框内容 -> (关键词, 标签, 分类)；以 # 开头时按标签过滤"""
+        text = self.search_input.text().strip()
+        q, tags = (None, text[1:].strip() or None) if text.startswith('#') else (text or None, None)
+        cat = self.search_cat.currentText(); cat = None if cat == "全部" else cat
+        return q, tags, cat
+
+    def _load_suggestions(self):
+        self.suggest_index.load((c.algorithm_id, c.title, c.tags) for c in logic.list_cards())
+
+    def _suggest(self):
+        text = self.search_input.text().strip()
+        if text.startswith('#'):
+            items = ['#' + t for kind, t in self.suggest_index.suggest(text[1:], config.AUTOCOMPLETE_LIMIT)
+                     if kind == 'tag']
+        else:
+            items = [t if kind == 'title' else '#' + t
+                     for kind, t in self.suggest_index.suggest(text, config.AUTOCOMPLETE_LIMIT)]
+        self.suggest_model.setStringList(items)
+        if items:
+            self.search_input.completer().complete()
+
     def _do_search(self):
         # 清空旧卡片
         for i in reversed(range(self.search_vbox.count())):
             self.search_vbox.itemAt(i).widget().deleteLater()
-        q   = self.search_input.text().strip() or None
-        cat = self.search_cat.currentText(); cat = None if cat == "全部" else cat
-        algos = logic.list_algos(query=q, tags=None, category=cat)
-        for a in algos:
-            card = QFrame(); card.setFrameShape(QFrame.Box)
-            c = QHBoxLayout(card)
-            c.addWidget(QLabel(f"🧠 {a.title}    作者：{a.owner.username}"))
-            c.addWidget(QLabel(f"标签：{a.tags or '—'}    评分：{a.score:.1f}"))
-            detail_btn = QPushButton("详情")
-            detail_btn.clicked.connect(lambda _, aid=a.id: self._show_detail(aid))
-            c.addWidget(detail_btn)
-            if self.user and self.user.role == 'admin':
-                del_btn = QPushButton("删除")
-                del_btn.clicked.connect(lambda _, aid=a.id, card=card: self._delete_algo(aid, card))
-                c.addWidget(del_btn)
-            self.search_vbox.addWidget(card)
+        self.search_cards = {}
+        q, tags, cat = self._search_terms()
+        self.search_view = (self.search_mode.currentText(), q, tags, cat)
+        if self.search_mode.currentText() == "性能排行":
+            self._do_leaderboard(cat)
+            return
+        if self.search_mode.currentText() == "按热度":
+            for e in logic.list_trending(query=q, tags=tags, category=cat):
+                a = e['algo']
+                self._add_algo_card(a, f"热度：{e['trending']:.1f}    评分：{a.score:.1f}")
+            return
+        if self.search_mode.currentText() == "按代码":
+            self._do_code_search(cat)
+            return
+        self._load_cards(q, tags, cat)
+        if q and not self.search_cards:
+            # 没有精确匹配时按三元组相似度容错检索（拼写错误等）
+            for a in logic.list_algos(q, tags, cat, fuzzy=True):
+                self._add_algo_card(a, f"模糊匹配    标签：{a.tags or '—'}    评分：{a.score:.1f}")
+
+    def _load_cards(self, q, tags, cat, algo_ids=None):
+        """按评分列出卡片；给定 algo_ids 时只取这些算法，替换已显示的卡片或按评分插入到对应位置"""
+        for c in logic.list_cards(query=q, tags=tags, category=cat, algo_ids=algo_ids):
+            rating = f"{c.avg_rating:.1f}" if c.avg_rating is not None else "—"
+            index = -1
+            if algo_ids is not None:
+                old = self.search_cards.get(c.algorithm_id)
+                if old is not None:
+                    index = self.search_vbox.indexOf(old)
+                    self._drop_search_card(c.algorithm_id)
+                else:
+                    index = next((i for i in range(self.search_vbox.count())
+                                  if self.search_vbox.itemAt(i).widget().property('score') < c.score), -1)
+            self._add_search_card(
+                c.algorithm_id, c.title, c.owner_name,
+                f"标签：{c.tags or '—'}    评分：{c.score:.1f}    用户评分：{rating}    "
+                f"评论：{c.comment_count}    下载：{c.download_count}",
+                score=c.score, index=index)
+
+    def _do_code_search(self, cat):
+        """粘贴一段代码，按归一化记号 n-gram 的 TF-IDF 余弦相似度查找实现相同功能的算法"""
+        code, ok = QInputDialog.getMultiLineText(self, "按代码检索", "粘贴代码片段：")
+        if not ok or not code.strip():
+            return
+        try:
+            entries = logic.search_by_code(code, category=cat)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", str(e))
+            return
+        for e in entries:
+            a = e['algo']
+            self._add_algo_card(a, f"相似度：{e['similarity']:.0%}    评分：{a.score:.1f}")
+
+    def _do_export(self):
+        """
+        把当前检索条件下的所有算法导出为一个压缩包（含 manifest.json）。
+        文件写在本机，不能交给 worker（queue_export 写在 worker 所在机器上），改在后台线程中流式写入
+        """
+        q, tags, cat = self._search_terms()
+        path, chosen = QFileDialog.getSaveFileName(
+            self, "批量导出", f"algorithms_{cat or '全部'}.zip", "Zip (*.zip);;tar.gz (*.tar.gz)"
+        )
+        if not path:
+            return
+        fmt = 'tar.gz' if chosen.startswith('tar.gz') else export.format_for(path)
+
+        def run():
+            with open(path, "wb") as f:
+                return logic.export_algos(self.user, f, fmt, query=q, tags=tags, category=cat)
+        self.jobs.watch_future(
+            self.background.submit(run),
+            lambda manifest: QMessageBox.information(self, "完成", f"已导出 {manifest['count']} 个算法"),
+            lambda message: QMessageBox.critical(self, "错误", message))
+
+    def _do_leaderboard(self, cat):
+        """
+        性能排行：同一分类的算法在同一份基准语料上按吞吐量排名。
+        先显示已保存的排行，再提交后台任务重跑结果过期的算法，完成后刷新（期间检索条件变化则不刷新）
+        """
+        if cat is None:
+            QMessageBox.warning(self, "提示", "性能排行需要先选择分类")
+            return
+        try:
+            self._show_leaderboard(logic.get_leaderboard(cat, refresh=False))
+            job_id = logic.queue_leaderboard(self.user, cat)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", str(e))
+            return
+        view = self.search_view
+
+        def refreshed(_):
+            if self.search_view != view:
+                return
+            for aid in list(self.search_cards):
+                self._drop_search_card(aid)
+            self._show_leaderboard(logic.get_leaderboard(cat, refresh=False))
+        self.jobs.watch_job(self.user, job_id, refreshed,
+                            lambda message: QMessageBox.critical(self, "错误", f"刷新性能排行失败：{message}"))
+
+    def _show_leaderboard(self, entries):
+        for e in entries:
+            if e['status'] == 'ok':
+                text = f"#{e['rank']}    吞吐量：{e['throughput']:,.0f} {e['unit']}"
+            else:
+                text = f"—    {e['status']}：{e.get('error') or ''}"
+            self._add_algo_card(e['algo'], text)
+
+    def _add_algo_card(self, a, info: str):
+        self._add_search_card(a.id, a.title, a.owner.username, info)
+
+    def _add_search_card(self, algo_id: int, title: str, owner: str, info: str,
+                         score: float = None, index: int = -1):
+        card = QFrame(); card.setFrameShape(QFrame.Box)
+        card.setProperty('score', score if score is not None else float('-inf'))
+        c = QHBoxLayout(card)
+        c.addWidget(QLabel(f"🧠 {title}    作者：{owner}"))
+        c.addWidget(QLabel(info))
+        detail_btn = QPushButton("详情")
+        detail_btn.clicked.connect(lambda _, aid=algo_id: self._show_detail(aid))
+        c.addWidget(detail_btn)
+        if self.user and self.user.role == 'admin':
+            del_btn = QPushButton("删除")
+            del_btn.clicked.connect(lambda _, aid=algo_id, card=card: self._delete_algo(aid, card))
+            c.addWidget(del_btn)
+        self.search_vbox.insertWidget(index, card)
+        self.search_cards[algo_id] = card
+
+    def _drop_search_card(self, aid):
+        card = self.search_cards.pop(aid, None)
+        if card is not None:
+            self.search_vbox.removeWidget(card)
+            card.deleteLater()
 
     def _delete_algo(self, aid, card):
         if QMessageBox.question(self, "确认", "确定要删除此算法？") != QMessageBox.Yes:
             return
         try:
             logic.delete_algo(self.user, aid)
-            card.deleteLater()
+            self._drop_search_card(aid)
+            self._drop_review_card(aid)
         except Exception as e:
             QMessageBox.critical(self, "错误", str(e))
 
@@ -355,6 +775,19 @@ class App(QMainWindow):
         self.review_page = QWidget()
         layout = QVBoxLayout(self.review_page)
         layout.addWidget(QLabel("待审核算法", alignment=QtCore.Qt.AlignCenter))
+        batch = QHBoxLayout()
+        self.review_select_all = QCheckBox("全选")
+        self.review_select_all.toggled.connect(
+            lambda on: [box.setChecked(on) for box, _ in self.review_checks.values()])
+        batch.addWidget(self.review_select_all)
+        batch.addStretch()
+        batch.addWidget(QPushButton("✅ 通过所选", clicked=lambda: self._batch_review('approved')))
+        batch.addWidget(QPushButton("❌ 驳回所选", clicked=lambda: self._batch_review('rejected')))
+        batch.addWidget(QPushButton("🗑 删除所选", clicked=lambda: self._batch_review('delete')))
+        batch.addWidget(QPushButton("全部通过（当前列表）", clicked=lambda: self._batch_review('approved', True)))
+        layout.addLayout(batch)
+        self.review_checks = {}   # algo_id -> (复选框, 卡片)
+        self.review_loaded = False
         self.review_scroll    = QScrollArea(); self.review_scroll.setWidgetResizable(True)
         self.review_container = QWidget(); self.review_vbox = QVBoxLayout(self.review_container)
         self.review_scroll.setWidget(self.review_container)
@@ -363,38 +796,176 @@ class App(QMainWindow):
         self.stack.addWidget(self.review_page)
 
     def _show_review_page(self):
-        self._do_review()
+        # 首次进入时整页加载，之后由变更日志增量更新
+        if not self.review_loaded:
+            self._do_review()
         self.stack.setCurrentWidget(self.review_page)
 
     def _do_review(self):
         for i in reversed(range(self.review_vbox.count())):
             self.review_vbox.itemAt(i).widget().deleteLater()
+        self.review_checks = {}
+        self.review_select_all.setChecked(False)
         pending = logic.list_pending()
+        verifications = logic.get_verifications(pending)
         for a in pending:
-            card = QFrame(); card.setFrameShape(QFrame.Box)
-            c = QHBoxLayout(card)
-            c.addWidget(QLabel(f"{a.id}. {a.title}    作者：{a.owner.username}"))
-            detail_btn = QPushButton("审核详情")
-            detail_btn.clicked.connect(lambda _, aid=a.id, card=card: self._show_review_detail(aid, card))
-            c.addWidget(detail_btn)
-            del_btn = QPushButton("删除")
-            del_btn.clicked.connect(lambda _, aid=a.id, card=card: self._delete_algo(aid, card))
-            c.addWidget(del_btn)
-            self.review_vbox.addWidget(card)
+            self._add_review_card(a, verifications.get(a.id))
+        self.review_loaded = True
+
+    def _add_review_card(self, a, v):
+        card = QFrame(); card.setFrameShape(QFrame.Box)
+        c = QHBoxLayout(card)
+        box = QCheckBox()
+        self.review_checks[a.id] = (box, card)
+        c.addWidget(box)
+        c.addWidget(QLabel(f"{a.id}. {a.title}    作者：{a.owner.username}"))
+        if v is None:
+            c.addWidget(QLabel("验证：—"))
+        elif v['status'] in ('pass', 'fail'):
+            c.addWidget(QLabel(f"验证：{'✅' if v['status'] == 'pass' else '❌'} {v['passed']}/{v['total']}"))
+        else:
+            c.addWidget(QLabel(f"验证：{v['status']}"))
+        detail_btn = QPushButton("审核详情")
+        detail_btn.clicked.connect(lambda _, aid=a.id, card=card: self._show_review_detail(aid, card))
+        c.addWidget(detail_btn)
+        del_btn = QPushButton("删除")
+        del_btn.clicked.connect(lambda _, aid=a.id, card=card: self._delete_algo(aid, card))
+        c.addWidget(del_btn)
+        self.review_vbox.addWidget(card)
+
+    def _batch_review(self, action: str, all_visible: bool = False):
+        """对勾选（或列表中全部）的待审核算法批量执行通过 / 驳回 / 删除"""
+        ids = [aid for aid, (box, _) in self.review_checks.items() if all_visible or box.isChecked()]
+        if not ids:
+            QMessageBox.warning(self, "提示", "请先勾选算法")
+            return
+        names = {'approved': "通过", 'rejected': "驳回", 'delete': "删除"}
+        if QMessageBox.question(self, "确认", f"确定{names[action]} {len(ids)} 个算法？") != QMessageBox.Yes:
+            return
+        try:
+            count = logic.review_algos(self.user, ids, action)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", str(e))
+            return
+        for aid in ids:
+            self._drop_review_card(aid)   # 未处理的也已不再待审核（被他人审核或删除）
+        skipped = f"，{len(ids) - count} 个已被其他管理员处理" if count < len(ids) else ""
+        QMessageBox.information(self, "完成", f"已{names[action]} {count} 个算法{skipped}")
+
+    def _drop_review_card(self, aid):
+        entry = self.review_checks.pop(aid, None)
+        if entry is not None:
+            self.review_vbox.removeWidget(entry[1])
+            entry[1].deleteLater()
 
     # ─── 详 情 弹 窗 ─────────────────────────────────────────────
     def _show_detail(self, aid):
         algo = logic.get_algo_detail(aid)
-        dlg = DetailDialog(self, algo, is_review=False)
-        dlg.exec_()
+        self._exec_detail(DetailDialog(self, algo, is_review=False))
 
     def _show_review_detail(self, aid, parent_card):
         algo = logic.get_algo_detail(aid)
         dlg = DetailDialog(
             self, algo, is_review=True,
-            review_callback=lambda _: parent_card.deleteLater()
+            review_callback=self._drop_review_card
         )
-        dlg.exec_()
+        self._exec_detail(dlg)
+
+    def _exec_detail(self, dlg):
+        # 模态对话框期间变更轮询照常进行（见 _poll_changes）
+        self.detail_dialog = dlg
+        try:
+            dlg.exec_()
+        finally:
+            self.detail_dialog = None
+
+    # ─── 变 更 轮 询 ─────────────────────────────────────────────
+    def _poll_changes(self):
+        """读取上次之后的变更，就地更新待审核列表、检索结果与打开的详情窗口"""
+        try:
+            feed = logic.get_changes(self.change_seq)
+        except Exception:
+            return   # 后端暂时不可用时下次再试
+        self.change_seq = feed['seq']
+        if feed['reset']:
+            # 离线超过变更日志保留期，无法增量更新
+            self._load_suggestions()
+            if self.review_loaded:
+                self._do_review()
+            if self.search_view and self.search_view[0] == "按评分":
+                self._do_search()
+            return
+        algos, comments, rescored = {}, set(), False
+        for c in feed['changes']:
+            if c['entity'] == 'algorithm':
+                algos[c['algorithm_id']] = c['action']   # 同一算法只看最后一次变更
+            elif c['entity'] == 'comment':
+                comments.add(c['algorithm_id'])
+            elif c['action'] == 'rescored':
+                rescored = True
+        self._apply_review_changes(algos)
+        self._apply_suggest_changes(algos)
+        self._apply_search_changes(algos, comments, rescored)
+        self._apply_detail_changes(algos, comments)
+        if feed['more']:
+            QtCore.QTimer.singleShot(0, self._poll_changes)
+
+    def _apply_review_changes(self, algos: dict):
+        if not self.review_loaded:
+            return
+        added = []
+        for aid, action in algos.items():
+            if action in ('upload', 'new_version'):
+                if aid not in self.review_checks:
+                    added.append(aid)
+            else:
+                self._drop_review_card(aid)
+        pending = [a for a in map(logic.get_algo_detail, added) if a is not None and a.status == 'pending']
+        if pending:
+            verifications = logic.get_verifications(pending)
+            for a in pending:
+                self._add_review_card(a, verifications.get(a.id))
+
+    def _apply_suggest_changes(self, algos: dict):
+        approved = [aid for aid, action in algos.items() if action == 'approved']
+        for aid, action in algos.items():
+            if action != 'approved':
+                self.suggest_index.remove(aid)
+        if approved:
+            for c in logic.list_cards(algo_ids=approved):
+                self.suggest_index.add(c.algorithm_id, c.title, c.tags)
+
+    def _apply_search_changes(self, algos: dict, comments: set, rescored: bool):
+        if self.search_view is None:
+            return
+        # 删除、驳回或上传新版本（回到待审核）的算法从任何模式的结果中移除
+        for aid, action in algos.items():
+            if action != 'approved':
+                self._drop_search_card(aid)
+        mode, q, tags, cat = self.search_view
+        if mode != "按评分":
+            return
+        if rescored:
+            # 全部分数都变了，整体重排
+            for aid in list(self.search_cards):
+                self._drop_search_card(aid)
+            self._load_cards(q, tags, cat)
+            return
+        changed = [aid for aid, action in algos.items() if action == 'approved']
+        changed += [aid for aid in comments if aid in self.search_cards and aid not in algos]
+        if changed:
+            self._load_cards(q, tags, cat, changed)
+
+    def _apply_detail_changes(self, algos: dict, comments: set):
+        dlg = self.detail_dialog
+        if dlg is None or not dlg.isVisible():
+            return
+        aid = dlg.algo.id
+        if algos.get(aid) == 'delete':
+            dlg.reject()
+            QMessageBox.information(self, "提示", "该算法已被删除")
+        elif aid in comments:
+            dlg._load_comments()
 
     # ─── 调 整 评 分 策 略 ────────────────────────────────────────
     def _build_strategy(self):
@@ -403,6 +974,7 @@ class App(QMainWindow):
         layout.addWidget(QLabel("调整评分策略", alignment=QtCore.Qt.AlignCenter))
 
         curr = logic.get_scoring_strategy()
+        self.strat_version = curr['row_version']   # 保存时核对，期间被其他管理员修改则提示冲突
         layout.addWidget(QLabel(f"当前权重 — 函数: {curr['func_weight']}  注释: {curr['comment_weight']}"))
 
         form = QHBoxLayout()
@@ -414,6 +986,14 @@ class App(QMainWindow):
         form.addWidget(QLabel("注释权重:")); form.addWidget(self.strat_comm)
         layout.addLayout(form)
 
+        # 后台重算进度（保存策略后按块重算全部分数）
+        self.rescore_bar = QProgressBar(); self.rescore_bar.setVisible(False)
+        self.rescore_label = QLabel("")
+        layout.addWidget(self.rescore_bar); layout.addWidget(self.rescore_label)
+        self.rescore_timer = QtCore.QTimer(self)
+        self.rescore_timer.setInterval(500)
+        self.rescore_timer.timeout.connect(self._poll_rescore)
+
         btns = QHBoxLayout()
         btns.addWidget(QPushButton("💾 保存策略", clicked=self._save_strategy))
         btns.addWidget(QPushButton("🔙 返回上一页", clicked=lambda: self.stack.setCurrentWidget(self.main_page)))
@@ -422,19 +1002,49 @@ class App(QMainWindow):
 
         self.stack.addWidget(self.strategy_page)
 
-    def _show_strategy_page(self):
+    def _load_strategy(self):
         curr = logic.get_scoring_strategy()
         self.strat_func.setValue(curr['func_weight'])
         self.strat_comm.setValue(curr['comment_weight'])
+        self.strat_version = curr['row_version']
+
+    def _show_strategy_page(self):
+        self._load_strategy()
+        self._poll_rescore()
         self.stack.setCurrentWidget(self.strategy_page)
 
     def _save_strategy(self):
         fw, cw = self.strat_func.value(), self.strat_comm.value()
         try:
-            logic.update_scoring(self.user, fw, cw)
-            QMessageBox.information(self, "完成", "评分策略已保存")
+            logic.update_scoring(self.user, fw, cw, self.strat_version)
+            self.strat_version = logic.get_scoring_strategy()['row_version']
+            QMessageBox.information(self, "完成", "评分策略已保存，正在后台重算全部分数")
+        except ConcurrencyError as e:
+            self._load_strategy()
+            QMessageBox.warning(self, "操作冲突", f"{e}\n\n已载入最新的评分策略，确认后可再次保存。")
+            return
         except Exception as e:
             QMessageBox.critical(self, "错误", str(e))
+            return
+        self._poll_rescore()
+
+    def _poll_rescore(self):
+        """刷新后台重算进度；任务运行中时每 0.5 秒轮询一次"""
+        p = logic.get_rescore_progress()
+        if p is None:
+            return
+        total = max(p['total'], p['processed'], 1)
+        self.rescore_bar.setVisible(True)
+        self.rescore_bar.setRange(0, total)
+        self.rescore_bar.setValue(p['processed'])
+        text = {'queued': "排队中（等待 worker 执行）", 'running': "重算中", 'done': "重算完成", 'failed': "重算失败（重启后从检查点继续）",
+                'superseded': "已被新的策略取代"}[p['status']]
+        self.rescore_label.setText(f"{text}：{p['processed']} / {p['total']}" +
+                                   (f"    {p['error']}" if p['error'] else ""))
+        if p['status'] in ('queued', 'running'):
+            self.rescore_timer.start()
+        else:
+            self.rescore_timer.stop()
 
     def _show_strategy_history(self):
         history = logic.get_strategy_history()
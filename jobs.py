@@ -0,0 +1,101 @@
+# jobs.py
+"""
+后台任务类型：任务名 -> 处理函数。处理函数在 worker.py 的子进程中执行，参数为入队时的 payload（dict），
+返回值须可 JSON 序列化，作为任务结果保存；抛出异常即本次执行失败（按 Job.max_attempts 重试）。
+权限检查在 logic.py 入队时完成，这里不再检查。处理函数应可重复执行：worker 崩溃后任务会被重新领取。
+"""
+import time
+
+
+def _rescore(payload: dict):
+    import rescore   # 重算本身按检查点续跑，重复领取只会从上次提交处继续
+    return rescore.run()
+
+
+def _rebuild_cards(payload: dict):
+    from dao import CardDAO
+    return {'cards': CardDAO.rebuild()}
+
+
+def _rebuild_trending(payload: dict):
+    from dao import TrendingDAO
+    return {'algorithms': TrendingDAO.rebuild()}
+
+
+def _retention(payload: dict):
+    import retention
+    return retention.run(payload.get('days'))
+
+
+def _verify(payload: dict):
+    import logic
+    from dao import AlgorithmDAO
+    if AlgorithmDAO.get_detail(payload['algo_id']) is None:
+        return {'status': 'deleted'}   # 入队后算法已被删除
+    result = logic.verify_algo(payload['algo_id'], payload.get('force', False))
+    return {'status': result['status'], 'passed': result.get('passed'), 'total': result.get('total')}
+
+
+def _benchmark(payload: dict):
+    import logic
+    results = logic.benchmark_algos(payload['algo_ids'], payload.get('force', False))
+    return {str(aid): r for aid, r in results.items()}
+
+
+def _analysis(payload: dict):
+    """单个算法的按需分析，返回的分析结果同时保存在 analysis_results"""
+    import logic
+    from dao import AlgorithmDAO
+    if AlgorithmDAO.get_detail(payload['algo_id']) is None:
+        return {'status': 'deleted'}
+    run = {
+        'benchmark':  logic.benchmark_algo,
+        'complexity': logic.estimate_complexity,
+        'verify':     logic.verify_algo,
+        'profile':    logic.profile_algo,
+    }[payload['analysis']]
+    return run(payload['algo_id'], payload.get('force', False))
+
+
+def _leaderboard(payload: dict):
+    import logic
+    return {'ranked': len(logic.get_leaderboard(payload['category']))}
+
+
+def _export(payload: dict):
+    """导出到 worker 所在机器上的 payload['path']，先写临时文件再改名，重试时不会留下半个压缩包"""
+    import os
+    import logic
+    from dao import UserDAO
+    user = UserDAO.get_by_id(payload['user_id']) if payload.get('user_id') else None
+    if user is None:
+        raise PermissionError("导出任务缺少有效的用户（用户已删除或任务由旧版本提交）")
+    tmp = payload['path'] + '.part'
+    with open(tmp, 'wb') as f:
+        manifest = logic.export_algos(user, f, payload.get('format', 'zip'), payload.get('algo_ids'),
+                                      payload.get('query'), payload.get('tags'), payload.get('category'))
+    os.replace(tmp, payload['path'])
+    return {'path': payload['path'], 'format': manifest['format'], 'count': manifest['count']}
+
+
+# 任务名 -> (处理函数, 默认优先级)；优先级越大越先执行
+KINDS = {
+    'rescore':          (_rescore, 10),
+    'rebuild_cards':    (_rebuild_cards, 5),
+    'rebuild_trending': (_rebuild_trending, 5),
+    'retention':        (_retention, 0),
+    'verify':           (_verify, 3),      # 上传后的正确性验证，待审核列表依赖其结果
+    'analysis':         (_analysis, 4),    # 用户在详情页等待结果
+    'leaderboard':      (_leaderboard, 4),
+    'benchmark':        (_benchmark, 0),
+    'export':           (_export, 0),
+}
+
+
+def execute(kind: str, payload: dict) -> tuple:
+    """在子进程中执行一个任务，返回 (结果, 耗时秒数)"""
+    if kind not in KINDS:
+        raise ValueError(f"未知的任务类型：{kind}")
+    start = time.perf_counter()
+    result = KINDS[kind][0](payload)
+    return result, time.perf_counter() - start
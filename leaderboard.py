@@ -0,0 +1,87 @@
+# leaderboard.py
+"""
+分类性能排行：同一分类的算法在同一份基准语料（见 corpus.py）上运行，按吞吐量排名。
+结果按 (源码哈希, 语料版本) 缓存，只有源码或语料版本变化的算法才需要重新运行。
+"""
+import secrets
+
+import benchmark
+import config
+import corpus
+import sandbox
+
+
+def make_payload(code_text: str, category: str):
+    """构造语料任务；分类不支持或找不到入口函数时返回 (None, 错误信息)"""
+    if category not in corpus.UNITS:
+        return None, f"不支持的分类：{category}"
+    try:
+        entry = benchmark.find_entry(code_text, category)
+    except SyntaxError as e:
+        return None, f"语法错误：{e}"
+    if entry is None:
+        return None, "找不到入口函数"
+    return {
+        'mode': 'benchmark',
+        'code': code_text,
+        'entry': entry,
+        'repeat': 1,
+        'trace_memory': False,   # 子进程 CPU 时间只含计时轮次，用于核对报告的耗时（见 run）
+        'answer_salt': secrets.token_hex(16),   # 每次运行不同，输出摘要无法预先算好
+        'copy_args': benchmark.CATEGORY_SPECS[category]['copy'],
+        'cases': corpus.cases(category),
+    }, None
+
+
+def run(items: list) -> list:
+    """
+    items 为 [(code_text, category), ...]，在子进程池中并发运行语料任务。
+    每个结果包含 status、entry、wall（各数据集单次调用耗时之和）、throughput、unit、corpus_version。
+    子进程报告的耗时不可信（上传代码可以伪造结果行）：每个分类另以空入口函数运行一次作为基线，
+    报告的耗时低于父进程测得的 CPU 时间（扣除基线，见 benchmark.understated）时记为 error；
+    最后一轮输出的摘要须与参考答案（corpus.answer）一致，否则记为 wrong_answer，不参与排名。
+    """
+    payloads, errors = zip(*(make_payload(code, cat) for code, cat in items)) if items else ((), ())
+    runnable = [p for p in payloads if p is not None]
+    categories = sorted({cat for (_, cat), p in zip(items, payloads) if p is not None})
+    baselines = [benchmark.baseline_payload(make_payload(benchmark.BASELINE_CODE, cat)[0]) for cat in categories]
+    outputs = sandbox.run_many(runnable + baselines, benchmark.default_limits(), config.BENCH_WORKERS)
+    baseline_of = dict(zip(categories, outputs[len(runnable):]))
+    outputs = iter(outputs[:len(runnable)])
+    results = []
+    for (code, category), payload, error in zip(items, payloads, errors):
+        base = {'corpus_version': corpus.CORPUS_VERSION, 'unit': corpus.UNITS.get(category)}
+        if payload is None:
+            results.append(dict(base, status='error', error=error))
+            continue
+        out = next(outputs)
+        if out.get('status') != 'ok':
+            results.append(dict(base, status=out.get('status'), error=out.get('error'), entry=payload['entry']))
+            continue
+        wrong = next((case['name'] for c, case in zip(out['cases'], payload['cases'])
+                      if c.get('answer') != corpus.answer(case['corpus']['name'], payload['answer_salt'])), None)
+        if wrong is not None:
+            results.append(dict(base, status='wrong_answer', error=f"{wrong} 上的输出与参考答案不符",
+                                entry=payload['entry']))
+            continue
+        problem = benchmark.understated(out, baseline_of[category], payload)
+        if problem:
+            results.append(dict(base, status='error', error=problem, entry=payload['entry']))
+            continue
+        wall = max(sum(c['wall'] for c in out['cases']), 1e-12)
+        work = sum(c['work'] for c in payload['cases'])
+        results.append(dict(base, status='ok', entry=payload['entry'], wall=wall,
+                            max_rss=out['max_rss'], datasets={c['name']: c['wall'] for c in out['cases']},
+                            throughput=work / wall))
+    return results
+
+
+def rank(entries: list) -> list:
+    """成功的按吞吐量降序在前，失败（超时、超内存、出错）的在后"""
+    ok = sorted((e for e in entries if e['status'] == 'ok'), key=lambda e: -e['throughput'])
+    failed = [e for e in entries if e['status'] != 'ok']
+    for i, e in enumerate(ok, 1):
+        e['rank'] = i
+    for e in failed:
+        e['rank'] = None
+    return ok + failed
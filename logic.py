@@ -3,13 +3,24 @@
 核心业务逻辑：封装 DAO 操作，提供注册、登录、上传、检索、评论、审核、下载、统计等接口
 """
 import dao
-from dao import UserDAO, AlgorithmDAO, CommentDAO, DownloadLogDAO, ScoringStrategyDAO, StatsDAO
+import benchmark
+import cache
+import config
+import export
+import profiling
+import scoring
+import trending
+import versioning
+from dao import (UserDAO, AlgorithmDAO, AnalysisDAO, CardDAO, ChangeLogDAO, CommentDAO, DownloadLogDAO, JobDAO,
+                 RescoreDAO, ScoringStrategyDAO, StatsDAO, TrendingDAO)
+from errors import ConcurrencyError
 from models import User, Algorithm
 from typing import Optional, List
 
 
 import csv
-from datetime import timedelta, date
+import json
+from datetime import timedelta, date, datetime
 from io import StringIO
 
 
@@ -30,11 +41,285 @@ def authenticate(username: str, password: str) -> User:
 def upload_algo(user_id: int, title: str, description: str,
                 tags: str, category: str, code_text: str) -> int:
     algo = AlgorithmDAO.upload(user_id, title, description, tags, category, code_text)
+    _index_code(algo)
+    _enqueue('verify', {'algo_id': algo.id}, None, user_id)   # 验证由 worker 执行，不阻塞上传
     return algo.id
 
-# 查询已通过算法
-def list_algos(query: str=None, tags: str=None, category: str=None) -> List[Algorithm]:
-    return AlgorithmDAO.get_approved(query, tags, category)
+# 上传新版本（仅作者或管理员）
+def upload_new_version(user: User, algo_id: int, code_text: str) -> int:
+    """
+    为已有算法上传新版本，旧版本以压缩增量保存，返回新版本号。
+    """
+    algo = AlgorithmDAO.get_detail(algo_id)
+    if algo is None:
+        raise ValueError("算法不存在")
+    if user.role != 'admin' and algo.owner_id != user.id:
+        raise PermissionError("只有作者或管理员可以上传新版本")
+    algo = AlgorithmDAO.upload_version(algo_id, code_text)
+    _index_code(algo)
+    _enqueue('verify', {'algo_id': algo_id}, user)
+    return algo.version
+
+def _index_code(algo: Algorithm):
+    import codesearch   # 依赖 NumPy/SciPy，按需导入
+    codesearch.index.add(algo.id, algo.version, algo.code)
+
+def _unindex_code(algo_ids: list):
+    import codesearch
+    codesearch.index.remove(algo_ids)
+
+def list_algo_versions(algo_id: int) -> list:
+    """
+    返回算法的版本列表，每条为 {'version', 'score', 'created_at', 'delta_size'}
+    """
+    return AlgorithmDAO.get_versions(algo_id)
+
+def get_algo_version_code(algo_id: int, version: int) -> str:
+    return AlgorithmDAO.get_version_code(algo_id, version)
+
+def diff_algo_versions(algo_id: int, old_version: int, new_version: int) -> str:
+    """
+    返回两个版本之间的 unified diff 文本
+    """
+    codes = AlgorithmDAO.get_version_codes(algo_id, [old_version, new_version])
+    return versioning.diff_texts(codes[old_version], codes[new_version],
+                                 f"v{old_version}", f"v{new_version}")
+
+# 执行基准测试
+def _stored_analysis(algo: Algorithm, kind: str) -> Optional[dict]:
+    """已保存的分析结果；从未分析或源码已变化时返回 None"""
+    row = AnalysisDAO.get(algo.id, kind)
+    if row is None or row.code_hash != scoring.code_hash(algo.code):
+        return None
+    return json.loads(row.result)
+
+def get_benchmark(algo_id: int) -> Optional[dict]:
+    """
+    返回已保存的基准测试结果；从未测试或源码已变化时返回 None
+    """
+    algo = AlgorithmDAO.get_detail(algo_id)
+    return _stored_analysis(algo, 'benchmark') if algo else None
+
+def benchmark_algos(algo_ids: list, force: bool = False) -> dict:
+    """
+    在隔离子进程池中对多个算法执行基准测试并保存结果，返回 {algo_id: result}。
+    源码未变化且已有结果时直接复用，除非 force=True。
+    """
+    results, todo = {}, []
+    for aid in algo_ids:
+        algo = AlgorithmDAO.get_detail(aid)
+        if algo is None:
+            raise ValueError(f"算法不存在：{aid}")
+        cached = None if force else _stored_analysis(algo, 'benchmark')
+        if cached is not None:
+            results[aid] = cached
+        else:
+            todo.append(algo)
+    outputs = benchmark.run_benchmarks([(a.code, a.category) for a in todo])
+    for algo, result in zip(todo, outputs):
+        AnalysisDAO.save(algo.id, 'benchmark', scoring.code_hash(algo.code),
+                         result['status'], result.get('wall_time'), result)
+        results[algo.id] = result
+    return results
+
+def benchmark_algo(algo_id: int, force: bool = False) -> dict:
+    return benchmark_algos([algo_id], force)[algo_id]
+
+# 经验复杂度估算
+def get_complexity(algo_id: int) -> Optional[dict]:
+    """
+    返回已保存的复杂度估算结果；从未估算或源码已变化时返回 None
+    """
+    algo = AlgorithmDAO.get_detail(algo_id)
+    return _stored_analysis(algo, 'complexity') if algo else None
+
+def estimate_complexity(algo_id: int, force: bool = False) -> dict:
+    """
+    在几何增长的输入规模上运行算法并拟合增长模型，保存复杂度类别与常数。
+    """
+    import complexity   # 依赖 NumPy，按需导入以保持命令行工具启动速度
+    algo = AlgorithmDAO.get_detail(algo_id)
+    if algo is None:
+        raise ValueError(f"算法不存在：{algo_id}")
+    cached = None if force else _stored_analysis(algo, 'complexity')
+    if cached is not None:
+        return cached
+    result = complexity.estimate(algo.code, algo.category)
+    AnalysisDAO.save(algo.id, 'complexity', scoring.code_hash(algo.code),
+                     result['status'], result.get('loglog_slope'), result)
+    return result
+
+# 分类性能排行
+def get_leaderboard(category: str, refresh: bool = True) -> list:
+    """
+    同一分类已通过算法在同一份基准语料上的吞吐量排行。
+    只有从未运行、源码变化或语料版本变化的算法会被重新运行（refresh=False 时不运行，直接跳过）。
+    返回按名次排列的 [{'algo', 'rank', 'status', 'throughput', 'unit', 'wall', ...}]
+    """
+    import corpus        # 依赖 NumPy，按需导入
+    import leaderboard
+    algos = AlgorithmDAO.get_approved(category=category)
+    rows = AnalysisDAO.get_many([a.id for a in algos], 'leaderboard')
+    entries, stale = {}, []
+    for a in algos:
+        row = rows.get(a.id)
+        if (row is not None and row.code_hash == scoring.code_hash(a.code)
+                and row.corpus_version == corpus.CORPUS_VERSION):
+            entries[a.id] = json.loads(row.result)
+        else:
+            stale.append(a)
+    if refresh and stale:
+        for a, result in zip(stale, leaderboard.run([(a.code, a.category) for a in stale])):
+            AnalysisDAO.save(a.id, 'leaderboard', scoring.code_hash(a.code), result['status'],
+                             result.get('throughput'), result, corpus.CORPUS_VERSION)
+            entries[a.id] = result
+    by_id = {a.id: a for a in algos}
+    ranked = leaderboard.rank([dict(r, algo_id=aid) for aid, r in entries.items()])
+    for e in ranked:
+        e['algo'] = by_id[e['algo_id']]
+    return ranked
+
+# 热点剖析
+def get_profile(algo_id: int) -> Optional[dict]:
+    """
+    返回已保存的热点剖析摘要；从未剖析或源码已变化时返回 None
+    """
+    algo = AlgorithmDAO.get_detail(algo_id)
+    return _stored_analysis(algo, 'profile') if algo else None
+
+def profile_algo(algo_id: int, force: bool = False) -> dict:
+    """
+    按需在子进程中以 cProfile（及行级采样）运行算法，保存前 N 个热点的摘要。
+    """
+    algo = AlgorithmDAO.get_detail(algo_id)
+    if algo is None:
+        raise ValueError(f"算法不存在：{algo_id}")
+    cached = None if force else _stored_analysis(algo, 'profile')
+    if cached is not None:
+        return cached
+    result = profiling.profile(algo.code, algo.category)
+    AnalysisDAO.save(algo.id, 'profile', scoring.code_hash(algo.code),
+                     result['status'], result.get('total_time'), result)
+    return result
+
+# 差分正确性验证
+def verify_algo(algo_id: int, force: bool = False) -> dict:
+    """
+    用参考实现在大量随机输入上验证算法输出，保存通过/失败与最小失败输入。
+    上传与上传新版本后提交为后台任务（worker 执行），审核时可在详情页查看或重新验证。
+    """
+    import oracle   # 依赖 NumPy/SciPy，按需导入
+    algo = AlgorithmDAO.get_detail(algo_id)
+    if algo is None:
+        raise ValueError(f"算法不存在：{algo_id}")
+    cached = None if force else _stored_analysis(algo, 'verify')
+    if cached is not None:
+        return cached
+    result = oracle.verify(algo.code, algo.category)
+    rate = result['passed'] / result['total'] if result.get('total') else None
+    AnalysisDAO.save(algo.id, 'verify', scoring.code_hash(algo.code), result['status'], rate, result)
+    return result
+
+def get_verifications(algos: list) -> dict:
+    """
+    批量返回 {algo_id: 验证结果}（如待审核列表），从未验证或源码已变化的为 None
+    """
+    rows = AnalysisDAO.get_many([a.id for a in algos], 'verify')
+    results = {}
+    for a in algos:
+        row = rows.get(a.id)
+        ok = row is not None and row.code_hash == scoring.code_hash(a.code)
+        results[a.id] = json.loads(row.result) if ok else None
+    return results
+
+def get_verification(algo_id: int) -> Optional[dict]:
+    algo = AlgorithmDAO.get_detail(algo_id)
+    return _stored_analysis(algo, 'verify') if algo else None
+
+# 查询已通过算法（经由查询缓存）
+def list_algos(query: str=None, tags: str=None, category: str=None, fuzzy: bool=False) -> List[Algorithm]:
+    """
+    已通过的算法；fuzzy 为 True 时按标题与标签的三元组相似度容错匹配（如 "Kruskel"），按相似度降序
+    """
+    if fuzzy and query:
+        return [e['algo'] for e in search_fuzzy(query, tags=tags, category=category)]
+    key = cache.list_key(query, tags, category)
+    return cache.catalog_cache.get_or_load(
+        key,
+        lambda: AlgorithmDAO.get_approved(key[1], key[2], key[3]),
+        ids_of=lambda algos: [a.id for a in algos]
+    )
+
+# 容错检索（三元组索引，见 fuzzy.py）
+def search_fuzzy(query: str, k: int = 20, tags: str = None, category: str = None) -> list:
+    """
+    返回 [{'algo', 'similarity'}]，similarity 为查询三元组被命中的比例，按相似度降序
+    """
+    import fuzzy
+    result = []
+    for aid, sim in fuzzy.index.search(query, k, category, tags):
+        algo = get_algo_detail(aid)
+        if algo is not None and algo.status == 'approved':
+            result.append({'algo': algo, 'similarity': sim})
+    return result
+
+# 列表页卡片（读模型单表查询，不经缓存：评论数、下载数随时变化）
+def list_cards(query: str = None, tags: str = None, category: str = None, limit: int = None,
+               algo_ids: list = None) -> list:
+    """
+    按评分降序返回已通过算法的卡片（AlgorithmCard），含作者名、平均评分、评论数与下载数；
+    给定 algo_ids 时只返回其中符合条件的卡片
+    """
+    return CardDAO.list(query, tags, category, limit, algo_ids)
+
+def rebuild_cards(admin) -> int:
+    """
+    管理员提交按源表重建全部算法卡片的后台任务，返回任务 ID
+    """
+    if admin.role != 'admin':
+        raise PermissionError("必须为管理员才能重建卡片")
+    return _enqueue('rebuild_cards', {}, admin)
+
+# 变更日志：客户端记住序号，轮询之后的变更并就地更新已打开的列表与详情窗口
+def get_changes(since: int = 0, limit: int = None) -> dict:
+    """
+    读取序号大于 since 的变更，返回
+    {'seq': 下次轮询传入的序号, 'changes': [{'seq', 'entity', 'entity_id', 'algorithm_id', 'action', 'created_at'}],
+     'more': 是否还有未读完的变更, 'reset': since 早于已清理的日志（调用方应整页重载）}。
+    entity 为 algorithm（action：upload / new_version / approved / rejected / delete）、
+    comment（add / delete，algorithm_id 为所属算法）或 strategy（update / rescored）
+    """
+    limit = limit or config.CHANGE_FEED_LIMIT
+    head, pruned, rows = ChangeLogDAO.since(since, limit)
+    return {
+        'seq':     rows[-1].seq if len(rows) == limit else head,
+        'changes': [r._asdict() for r in rows],
+        'more':    len(rows) == limit and rows[-1].seq < head,
+        'reset':   since < pruned,
+    }
+
+def get_change_seq() -> int:
+    """
+    当前最大变更序号：客户端整页加载前读取，之后从这里开始轮询
+    """
+    return ChangeLogDAO.head()
+
+# 按热度检索已通过算法（不经缓存：按索引排序的单次查询，热度随下载/评论实时变化）
+def list_trending(query: str = None, tags: str = None, category: str = None, limit: int = None) -> list:
+    """
+    返回按热度降序的 [{'algo', 'trending'}]，trending 为当前时刻的衰减后下载/评论加权数
+    """
+    now = datetime.utcnow()
+    return [{'algo': a, 'trending': trending.current(log_score, now)}
+            for a, log_score in TrendingDAO.get_trending(query, tags, category, limit)]
+
+def rebuild_trending(admin) -> int:
+    """
+    管理员提交从现有下载日志与评论重建热度的后台任务，返回任务 ID
+    """
+    if admin.role != 'admin':
+        raise PermissionError("必须为管理员才能重建热度")
+    return _enqueue('rebuild_trending', {}, admin)
 
 def list_pending() -> list[Algorithm]:
     """
@@ -44,9 +329,18 @@ def list_pending() -> list[Algorithm]:
 
 
 
-# 获取算法详情
+# 获取算法详情（经由查询缓存）
 def get_algo_detail(algo_id: int) -> Algorithm:
-    return AlgorithmDAO.get_detail(algo_id)
+    return cache.catalog_cache.get_or_load(
+        cache.detail_key(algo_id),
+        lambda: AlgorithmDAO.get_detail(algo_id)
+    )
+
+def get_cache_stats() -> dict:
+    """
+    返回查询缓存的命中/未命中/淘汰/失效统计
+    """
+    return cache.catalog_cache.stats()
 
 # 添加评论
 def comment_algo(user_id: int, algo_id: int, rating: int, content: str) -> int:
@@ -54,39 +348,123 @@ def comment_algo(user_id: int, algo_id: int, rating: int, content: str) -> int:
     return c.id
 
 # 管理员审核算法
-def review_algo(admin: User, algo_id: int, action: str):
+def review_algo(admin: User, algo_id: int, action: str, row_version: int = None):
+    """
+    row_version 为审核者看到的算法版本（Algorithm.row_version）：算法此后被修改或删除时抛出 ConcurrencyError，
+    并清除该算法的缓存，刷新详情即可取得最新状态
+    """
+    if admin.role != 'admin':
+        raise PermissionError("必须为管理员才能审核")
+    try:
+        AlgorithmDAO.review(admin.id, algo_id, action, row_version)
+    except ConcurrencyError:
+        cache.invalidate_algorithm(algo_id)
+        raise
+
+# 管理员批量审核
+def review_algos(admin: User, algo_ids: list, action: str) -> int:
+    """
+    批量通过（approved）、驳回（rejected）或删除（delete）一组算法，单个事务完成，返回处理数量。
+    """
     if admin.role != 'admin':
         raise PermissionError("必须为管理员才能审核")
-    AlgorithmDAO.review(admin.id, algo_id, action)
+    n = AlgorithmDAO.review_many(admin.id, algo_ids, action)
+    if action == 'delete':
+        _unindex_code(algo_ids)
+    return n
 
 # 下载算法
-def download_algo(user: Optional[User], algo_id: int) -> str:
-    code = AlgorithmDAO.get_detail(algo_id).code
-    DownloadLogDAO.record(user.id if user else 0, algo_id)
-    return code
+def can_view_code(user: User, algo: Algorithm) -> bool:
+    """源码只对登录用户开放；待审核、已驳回的算法只有作者与管理员可见"""
+    return user is not None and (algo.status == 'approved' or user.role == 'admin' or user.id == algo.owner_id)
+
+def download_algo(user: User, algo_id: int) -> str:
+    """下载需登录：download_logs.user_id 引用 users(id)，匿名下载无法记录"""
+    if user is None:
+        raise PermissionError("请先登录后再下载")
+    algo = AlgorithmDAO.get_detail(algo_id)
+    if algo is None:
+        raise ValueError(f"算法不存在：{algo_id}")
+    if not can_view_code(user, algo):
+        raise PermissionError("该算法尚未通过审核，只有作者与管理员可以下载")
+    DownloadLogDAO.record(user.id, algo_id)
+    return algo.code
+
+# 下载了它的用户也下载了
+def get_recommendations(algo_id: int, k: int = 5) -> list:
+    """
+    基于共同下载的相似算法，返回 [{'algo', 'similarity'}]（只含已通过的算法）
+    """
+    import recommend   # 依赖 NumPy/SciPy，按需导入
+    result = []
+    for other, sim in recommend.index.similar(algo_id):
+        algo = get_algo_detail(other)
+        if algo is not None and algo.status == 'approved':
+            result.append({'algo': algo, 'similarity': sim})
+            if len(result) >= k:
+                break
+    return result
+
+# 按代码检索
+def search_by_code(code_text: str, k: int = 10, category: str = None) -> list:
+    """
+    返回与给定代码片段最相似的已通过算法 [{'algo', 'similarity'}]，按余弦相似度降序
+    """
+    import codesearch
+    result = []
+    for aid, sim in codesearch.index.search(code_text):
+        algo = get_algo_detail(aid)
+        if algo is None or algo.status != 'approved' or (category and algo.category != category):
+            continue
+        result.append({'algo': algo, 'similarity': sim})
+        if len(result) >= k:
+            break
+    return result
+
+# 批量导出
+def export_algos(user: User, fileobj, fmt: str = 'zip', algo_ids: list = None,
+                 query: str = None, tags: str = None, category: str = None) -> dict:
+    """
+    把按 ID 列表或检索条件筛选出的已通过算法，从数据库游标逐条写入 fileobj（zip / tar.gz），
+    末尾附 manifest.json；写完后一次性批量记录下载日志。返回 manifest。
+    与 download_algo 一样需登录，在写入任何内容之前检查。
+    """
+    if user is None:
+        raise PermissionError("请先登录后再导出")
+    rows = AlgorithmDAO.iter_export(algo_ids, query, tags, category)
+    manifest = export.write_archive(fileobj, rows, fmt)
+    DownloadLogDAO.record_many(user.id, [e['id'] for e in manifest['algorithms']])
+    return manifest
 
 # 更新评分策略
-def update_scoring(admin: User, func_w: int, comment_w: int):
+def update_scoring(admin: User, func_w: int, comment_w: int, row_version: int = None):
     if admin.role != 'admin':
         raise PermissionError("必须为管理员才能修改评分策略")
-    ScoringStrategyDAO.update(admin.id, func_w, comment_w)
+    ScoringStrategyDAO.update(admin.id, func_w, comment_w, row_version)
 
 # 平台统计
 def get_stats() -> dict:
     return StatsDAO.get_stats()
 
-def delete_algo(admin, algo_id: int):
+def delete_algo(admin, algo_id: int, row_version: int = None):
     """
     管理员删除算法
     """
     if admin.role != 'admin':
         raise PermissionError("必须为管理员才能删除算法")
     from dao import AlgorithmDAO
-    AlgorithmDAO.delete(algo_id)
+    AlgorithmDAO.delete(algo_id, row_version)
+    _unindex_code([algo_id])
 
 
 
 def get_comments(algo_id: int) -> list:
+    return cache.catalog_cache.get_or_load(
+        cache.comments_key(algo_id),
+        lambda: _load_comments(algo_id)
+    )
+
+def _load_comments(algo_id: int) -> list:
     comments = CommentDAO.get_by_algo(algo_id)
     return [{
         'id':       c.id,                 # ← 把评论的主键也返回
@@ -98,31 +476,37 @@ def get_comments(algo_id: int) -> list:
 
 
 
-def delete_algo(admin, algo_id: int):
+def delete_algo(admin, algo_id: int, row_version: int = None):
     """
-    管理员删除算法。
+    管理员删除算法。row_version 同 review_algo：算法在此之后被修改或删除时抛出 ConcurrencyError。
     """
     if admin.role != 'admin':
         raise PermissionError("必须为管理员才能删除算法")
-    AlgorithmDAO.delete(algo_id)
+    try:
+        AlgorithmDAO.delete(algo_id, row_version)
+    except ConcurrencyError:
+        cache.invalidate_algorithm(algo_id)
+        raise
+    _unindex_code([algo_id])
 
 def get_scoring_strategy() -> dict:
     """
-    返回当前评分策略的 func 和 comment 权重
+    返回当前评分策略的 func 和 comment 权重，以及修改时用于冲突检查的 row_version
     """
     strat = ScoringStrategyDAO.get_strategy()
     return {
         'func_weight':    strat.func_weight,
-        'comment_weight': strat.comment_weight
+        'comment_weight': strat.comment_weight,
+        'row_version':    strat.row_version
     }
 
-def update_scoring(admin, func_weight: int, comment_weight: int):
+def update_scoring(admin, func_weight: int, comment_weight: int, row_version: int = None):
     """
     管理员修改评分策略。
     """
     if admin.role != 'admin':
         raise PermissionError("必须为管理员才能修改评分策略")
-    ScoringStrategyDAO.update(admin.id, func_weight, comment_weight)
+    ScoringStrategyDAO.update(admin.id, func_weight, comment_weight, row_version)
 
 def get_strategy_history() -> list:
     """
@@ -137,8 +521,136 @@ def get_strategy_history() -> list:
             'admin': log.admin.username,
             'action': log.action
         })
+    # 超过保留期的记录已按天汇总（见 retention.py），排在原始记录之后
+    for r in ScoringStrategyDAO.get_history_rollups():
+        history.append({
+            'time':  r.day.strftime('%Y-%m-%d'),
+            'admin': r.admin.username,
+            'action': f"{r.action}（当日 {r.count} 次，已归档）"
+        })
     return history
 
+def rescore_all(admin) -> int:
+    """
+    管理员提交按当前评分策略重算所有分数的后台任务（按块提交、可中断后继续，见 rescore.py），返回任务 ID
+    """
+    if admin.role != 'admin':
+        raise PermissionError("必须为管理员才能重新评分")
+    return _enqueue('rescore', {}, admin)
+
+def get_rescore_progress() -> Optional[dict]:
+    """
+    最近一次重算的进度 {'id', 'status', 'processed', 'total', 'error', 'started_at', 'finished_at'}；
+    最近的重算任务尚在排队时 status 为 'queued'，从未重算过时返回 None
+    """
+    job = JobDAO.get_latest('rescore')
+    if job is not None and job.status == 'queued' and job.attempts == 0:
+        return {'id': None, 'status': 'queued', 'processed': 0, 'total': 0,
+                'error': None, 'started_at': None, 'finished_at': None}
+    run = RescoreDAO.get_latest()
+    if run is None:
+        return None
+    return {'id': run.id, 'status': run.status, 'processed': run.processed, 'total': run.total,
+            'error': run.error, 'started_at': run.started_at, 'finished_at': run.finished_at}
+
+def run_retention(admin, days: int = None) -> int:
+    """
+    管理员提交日志保留任务：过期的下载日志与管理员日志汇总、归档并删除（任务结果为 {表名: 处理行数}），返回任务 ID。
+    """
+    if admin.role != 'admin':
+        raise PermissionError("必须为管理员才能执行日志归档")
+    return _enqueue('retention', {'days': days}, admin)
+
+# 后台任务队列（由 worker.py 执行）
+def _enqueue(kind: str, payload: dict, user, created_by: int = None) -> int:
+    """created_by 在只有用户 ID（如 upload_algo）时代替 user"""
+    import jobs
+    return JobDAO.enqueue(kind, payload, jobs.KINDS[kind][1], user.id if user else created_by).id
+
+def _job_dict(job) -> dict:
+    return {
+        'id':          job.id,
+        'kind':        job.kind,
+        'status':      job.status,
+        'priority':    job.priority,
+        'attempts':    job.attempts,
+        'created_at':  job.created_at,
+        'started_at':  job.started_at,
+        'finished_at': job.finished_at,
+        'duration':    job.duration,
+        'result':      json.loads(job.result) if job.result else None,
+        'error':       job.error,
+    }
+
+def get_job(job_id: int) -> Optional[dict]:
+    """
+    任务状态 {'id', 'kind', 'status', 'priority', 'attempts', 'created_at', 'started_at', 'finished_at',
+    'duration', 'result', 'error'}，不存在时返回 None
+    """
+    job = JobDAO.get(job_id)
+    return _job_dict(job) if job else None
+
+def list_jobs(limit: int = 50, status: str = None) -> list:
+    return [_job_dict(j) for j in JobDAO.list_recent(limit, status)]
+
+def get_my_job(user: User, job_id: int) -> Optional[dict]:
+    """
+    登录用户查看自己提交的任务（管理员可查看全部），格式同 get_job；不存在时返回 None
+    """
+    if user is None:
+        raise PermissionError("请先登录")
+    job = JobDAO.get(job_id)
+    if job is None:
+        return None
+    if user.role != 'admin' and job.created_by != user.id:
+        raise PermissionError("只能查看自己提交的任务")
+    return _job_dict(job)
+
+# 可由登录用户按需提交的单个算法分析（结果保存方式同 benchmark_algo 等）
+ANALYSIS_KINDS = ('benchmark', 'complexity', 'verify', 'profile')
+
+def queue_analysis(user: User, algo_id: int, kind: str, force: bool = False) -> int:
+    """
+    提交单个算法的基准测试 / 复杂度估算 / 正确性验证 / 热点剖析后台任务，返回任务 ID。
+    任务结果即分析结果，也可在完成后用 get_benchmark 等读取；GUI 以 get_my_job 轮询，不阻塞界面
+    """
+    if user is None:
+        raise PermissionError("请先登录")
+    if kind not in ANALYSIS_KINDS:
+        raise ValueError(f"未知的分析类型：{kind}")
+    if AlgorithmDAO.get_detail(algo_id) is None:
+        raise ValueError(f"算法不存在：{algo_id}")
+    return _enqueue('analysis', {'algo_id': algo_id, 'analysis': kind, 'force': force}, user)
+
+def queue_leaderboard(user: User, category: str) -> int:
+    """
+    提交刷新分类性能排行的后台任务（只重跑结果过期的算法），返回任务 ID；
+    完成后用 get_leaderboard(category, refresh=False) 读取排行
+    """
+    if user is None:
+        raise PermissionError("请先登录")
+    return _enqueue('leaderboard', {'category': category}, user)
+
+def queue_benchmarks(admin, algo_ids: list, force: bool = False) -> int:
+    """
+    管理员提交批量基准测试的后台任务（结果保存方式同 benchmark_algos），返回任务 ID
+    """
+    if admin.role != 'admin':
+        raise PermissionError("必须为管理员才能提交批量基准测试")
+    return _enqueue('benchmark', {'algo_ids': list(algo_ids), 'force': force}, admin)
+
+def queue_export(user: User, path: str, fmt: str = 'zip', algo_ids: list = None,
+                 query: str = None, tags: str = None, category: str = None) -> int:
+    """
+    提交批量导出的后台任务，由 worker 写入其所在机器上的 path，返回任务 ID
+    """
+    if user is None:
+        raise PermissionError("请先登录后再导出")
+    if fmt not in export.FORMATS:
+        raise ValueError(f"不支持的导出格式：{fmt}")
+    return _enqueue('export', {'user_id': user.id, 'path': path, 'format': fmt,
+                               'algo_ids': algo_ids, 'query': query, 'tags': tags, 'category': category}, user)
+
 def delete_comment(admin, comment_id: int):
     """
     管理员删除评论
@@ -149,13 +661,17 @@ def delete_comment(admin, comment_id: int):
 
 
 
-def update_scoring(admin, func_weight: int, comment_weight: int):
+def update_scoring(admin, func_weight: int, comment_weight: int, row_version: int = None):
+    """
+    row_version 为调用方读到的策略版本（get_scoring_strategy），期间被其他管理员修改时抛出 ConcurrencyError，
+    不覆盖对方的修改
+    """
     if admin.role != 'admin':
         raise PermissionError("必须为管理员才能修改评分策略")
     # 1. 更新策略表并记日志
-    ScoringStrategyDAO.update(admin.id, func_weight, comment_weight)
-    # 2. 批量重新计算所有算法的 score
-    AlgorithmDAO.recalculate_all_scores()
+    ScoringStrategyDAO.update(admin.id, func_weight, comment_weight, row_version)
+    # 2. 提交后台任务按块重新计算所有算法的 score（进度见 get_rescore_progress）
+    _enqueue('rescore', {}, admin)
 
 
 
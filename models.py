@@ -3,7 +3,8 @@
 ORM 模型定义：使用 SQLAlchemy 定义数据库表结构。
 """
 from sqlalchemy import (
-    Column, Integer, String, Text, Enum, Float, DateTime, ForeignKey, create_engine
+    Column, Integer, BigInteger, String, Text, Enum, Float, Date, DateTime, ForeignKey, LargeBinary,
+    Index, UniqueConstraint, DDL, create_engine, event
 )
 from sqlalchemy.orm import relationship, declarative_base, sessionmaker
 from datetime import datetime
@@ -25,6 +26,7 @@ class User(Base):
     comments      = relationship('Comment',   back_populates='user',    cascade='all, delete-orphan')
     admin_logs    = relationship('AdminLog',  back_populates='admin',   cascade='all, delete-orphan')
     download_logs = relationship('DownloadLog', back_populates='user', cascade='all, delete-orphan')
+    download_pairs = relationship('DownloadPair', back_populates='user', cascade='all, delete-orphan')
 
 class Algorithm(Base):
     __tablename__ = 'algorithms'
@@ -39,10 +41,91 @@ class Algorithm(Base):
     score       = Column(Float, default=0.0)
     status      = Column(Enum('pending','approved','rejected'), default='pending')
     created_at  = Column(DateTime, default=datetime.utcnow)
+    # 乐观锁：ORM 的每次 UPDATE/DELETE 带上 WHERE row_version=读到的值并加一，匹配 0 行即抛出 StaleDataError。
+    # 分数由评论与策略推导，重算分数（rescore.py）的 Core 语句不递增版本
+    row_version = Column(Integer, nullable=False, default=1)
+    __mapper_args__ = {'version_id_col': row_version}
 
     owner        = relationship('User',    back_populates='algorithms')
     comments     = relationship('Comment', back_populates='algorithm', cascade='all, delete-orphan')
     download_logs= relationship('DownloadLog', back_populates='algorithm', cascade='all, delete-orphan')
+    versions     = relationship('AlgorithmVersion', back_populates='algorithm', cascade='all, delete-orphan')
+    analyses     = relationship('AnalysisResult', back_populates='algorithm', cascade='all, delete-orphan')
+    download_daily = relationship('DownloadDaily', back_populates='algorithm', cascade='all, delete-orphan')
+    download_pairs = relationship('DownloadPair', back_populates='algorithm', cascade='all, delete-orphan')
+    trending     = relationship('AlgorithmTrending', back_populates='algorithm', uselist=False,
+                                cascade='all, delete-orphan')
+    card         = relationship('AlgorithmCard', back_populates='algorithm', uselist=False,
+                                cascade='all, delete-orphan')
+
+class AlgorithmVersion(Base):
+    """算法旧版本：delta 为相对下一版本源码的压缩反向增量（见 versioning.py）"""
+    __tablename__ = 'algorithm_versions'
+    __table_args__ = (UniqueConstraint('algorithm_id', 'version'),)
+    id           = Column(Integer, primary_key=True)
+    algorithm_id = Column(Integer, ForeignKey('algorithms.id'), nullable=False)
+    version      = Column(Integer, nullable=False)
+    delta        = Column(LargeBinary(length=2**24), nullable=False)
+    score        = Column(Float, default=0.0)
+    archived_at  = Column(DateTime, default=datetime.utcnow)  # 被下一版本取代的时间
+
+    algorithm    = relationship('Algorithm', back_populates='versions')
+
+class AnalysisResult(Base):
+    """
+    算法的执行分析结果（基准测试等），每个算法每种 kind 一行。
+    code_hash 记录被测源码的哈希，源码变化后结果即失效；依赖基准语料的结果另记 corpus_version。
+    result 为 JSON 文本。
+    """
+    __tablename__ = 'analysis_results'
+    __table_args__ = (UniqueConstraint('algorithm_id', 'kind'),)
+    id             = Column(Integer, primary_key=True)
+    algorithm_id   = Column(Integer, ForeignKey('algorithms.id'), nullable=False)
+    kind           = Column(String(20), nullable=False)
+    code_hash      = Column(String(64), nullable=False)
+    corpus_version = Column(Integer)
+    status         = Column(String(20), nullable=False)
+    metric         = Column(Float)
+    result         = Column(Text)
+    created_at     = Column(DateTime, default=datetime.utcnow)
+
+    algorithm      = relationship('Algorithm', back_populates='analyses')
+
+class AlgorithmTrending(Base):
+    """算法热度：log_score 为随时间衰减的下载/评论加权和的对数（见 trending.py），随事件增量更新"""
+    __tablename__ = 'algorithm_trending'
+    algorithm_id = Column(Integer, ForeignKey('algorithms.id'), primary_key=True)
+    log_score    = Column(Float, nullable=False, index=True)
+    updated_at   = Column(DateTime, default=datetime.utcnow)
+
+    algorithm    = relationship('Algorithm', back_populates='trending')
+
+class AlgorithmCard(Base):
+    """
+    列表页读模型：每个已通过算法一行，卡片所需字段（含作者名与评论/评分/下载聚合）全部预先计算，
+    由 cards.py 生成的语句在修改源表的同一事务中维护
+    """
+    __tablename__ = 'algorithm_cards'
+    __table_args__ = (Index('ix_algorithm_cards_category_score', 'category', 'score'),)
+    algorithm_id   = Column(Integer, ForeignKey('algorithms.id'), primary_key=True)
+    title          = Column(String(100), nullable=False)
+    owner_id       = Column(Integer, nullable=False)
+    owner_name     = Column(String(50), nullable=False)
+    tags           = Column(String(255))
+    category       = Column(String(50))
+    version        = Column(Integer)
+    score          = Column(Float, index=True)
+    rating_sum     = Column(Integer, nullable=False, default=0)
+    rating_count   = Column(Integer, nullable=False, default=0)
+    comment_count  = Column(Integer, nullable=False, default=0)
+    download_count = Column(Integer, nullable=False, default=0)
+    created_at     = Column(DateTime)
+
+    algorithm      = relationship('Algorithm', back_populates='card')
+
+    @property
+    def avg_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else None
 
 class Comment(Base):
     __tablename__  = 'comments'
@@ -77,16 +160,123 @@ class DownloadLog(Base):
     user              = relationship('User',      back_populates='download_logs')
     algorithm         = relationship('Algorithm', back_populates='download_logs')
 
+class DownloadDaily(Base):
+    """下载日志按天、按算法的汇总（由 retention.py 从过期的 download_logs 滚动生成）"""
+    __tablename__ = 'download_daily'
+    __table_args__ = (UniqueConstraint('day', 'algorithm_id'),)
+    id           = Column(Integer, primary_key=True)
+    day          = Column(Date, nullable=False)
+    algorithm_id = Column(Integer, ForeignKey('algorithms.id'), nullable=False)
+    count        = Column(Integer, nullable=False, default=0)
+
+    algorithm    = relationship('Algorithm', back_populates='download_daily')
+
+class DownloadPair(Base):
+    """已归档的下载日志中出现过的 (用户, 算法) 对，去重保存（由 retention.py 滚动生成，recommend.py 据此重建共现索引）"""
+    __tablename__ = 'download_pairs'
+    __table_args__ = (UniqueConstraint('user_id', 'algorithm_id'),)
+    id           = Column(Integer, primary_key=True)
+    user_id      = Column(Integer, ForeignKey('users.id'),      nullable=False)
+    algorithm_id = Column(Integer, ForeignKey('algorithms.id'), nullable=False)
+
+    user         = relationship('User',      back_populates='download_pairs')
+    algorithm    = relationship('Algorithm', back_populates='download_pairs')
+
+class AdminLogDaily(Base):
+    """管理员操作日志按天、管理员、操作对象类型与操作的汇总（由 retention.py 滚动生成）"""
+    __tablename__ = 'admin_log_daily'
+    __table_args__ = (UniqueConstraint('day', 'admin_id', 'target_type', 'action'),)
+    id          = Column(Integer, primary_key=True)
+    day         = Column(Date, nullable=False)
+    admin_id    = Column(Integer, ForeignKey('users.id'), nullable=False)
+    target_type = Column(String(50))
+    action      = Column(String(100))
+    count       = Column(Integer, nullable=False, default=0)
+
+    admin       = relationship('User')
+
+class RescoreRun(Base):
+    """
+    一次按评分策略重算全部分数的后台任务（见 rescore.py）：按 ID 区间分块提交，
+    last_id 为已提交的最后一个算法 ID，与该块的分数在同一事务中写入，中断后从此处继续
+    """
+    __tablename__ = 'rescore_runs'
+    id             = Column(Integer, primary_key=True)
+    func_weight    = Column(Integer, nullable=False)
+    comment_weight = Column(Integer, nullable=False)
+    status         = Column(Enum('running', 'done', 'failed', 'superseded'), nullable=False, default='running')
+    last_id        = Column(Integer, nullable=False, default=0)
+    processed      = Column(Integer, nullable=False, default=0)
+    total          = Column(Integer, nullable=False, default=0)
+    error          = Column(Text)
+    started_at     = Column(DateTime, default=datetime.utcnow)
+    updated_at     = Column(DateTime, default=datetime.utcnow)
+    finished_at    = Column(DateTime)
+
+class Job(Base):
+    """
+    后台任务队列（见 jobs.py / worker.py）：worker 按优先级领取 queued 任务并持有租约，
+    租约过期（worker 崩溃）的 running 任务可被重新领取；失败后按退避时间重试，超过次数标记为 failed
+    """
+    __tablename__ = 'jobs'
+    __table_args__ = (Index('ix_jobs_status_priority', 'status', 'priority', 'id'),)
+    id            = Column(Integer, primary_key=True)
+    kind          = Column(String(50), nullable=False)
+    payload       = Column(Text)
+    status        = Column(Enum('queued', 'running', 'done', 'failed'), nullable=False, default='queued')
+    priority      = Column(Integer, nullable=False, default=0)
+    attempts      = Column(Integer, nullable=False, default=0)
+    max_attempts  = Column(Integer, nullable=False, default=3)
+    run_after     = Column(DateTime, default=datetime.utcnow)
+    lease_owner   = Column(String(100))
+    lease_expires = Column(DateTime)
+    created_by    = Column(Integer, ForeignKey('users.id'))
+    created_at    = Column(DateTime, default=datetime.utcnow)
+    started_at    = Column(DateTime)
+    finished_at   = Column(DateTime)
+    duration      = Column(Float)         # 最近一次执行耗时（秒）
+    result        = Column(Text)
+    error         = Column(Text)
+
+class ChangeLog(Base):
+    """
+    只追加的变更日志（见 changes.py）：上传、新版本、审核、删除、评论与评分策略修改在同一事务中各追加一行，
+    客户端按 seq 轮询之后的变更。algorithm_id 不设外键，算法删除后其变更仍保留
+    """
+    __tablename__ = 'change_log'
+    seq          = Column(BigInteger, primary_key=True, autoincrement=False)
+    entity       = Column(String(20), nullable=False)   # algorithm / comment / strategy
+    entity_id    = Column(Integer, nullable=False)
+    algorithm_id = Column(Integer)
+    action       = Column(String(20), nullable=False)
+    created_at   = Column(DateTime, default=datetime.utcnow, index=True)
+
+class ChangeCounter(Base):
+    """change_log 序号计数器（单行）：seq 为已分配的最大序号，pruned 为已清理到的序号"""
+    __tablename__ = 'change_counter'
+    id     = Column(Integer, primary_key=True)
+    seq    = Column(BigInteger, nullable=False, default=0)
+    pruned = Column(BigInteger, nullable=False, default=0)
+
+event.listen(ChangeCounter.__table__, 'after_create',
+             DDL("INSERT INTO change_counter (id, seq, pruned) VALUES (1, 0, 0)"))
+
 class ScoringStrategy(Base):
     __tablename__    = 'scoring_strategy'
     id                = Column(Integer, primary_key=True)
     func_weight       = Column(Integer)
     comment_weight    = Column(Integer)
+    row_version       = Column(Integer, nullable=False, default=1)   # 乐观锁，同 Algorithm.row_version
+    __mapper_args__   = {'version_id_col': row_version}
 
 # 引擎与会话工厂
 engine = create_engine(
     f"mysql+pymysql://{config.APP_DB_USER}:{config.APP_DB_PWD}@{config.DB_HOST}/{config.DB_NAME}?charset=utf8mb4",
-    echo=False
+    echo=False,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=3600
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -0,0 +1,240 @@
+# oracle.py
+"""
+差分正确性验证：为每个分类生成大量小规模随机输入（含空输入、重复元素等边界情况），
+在隔离子进程池中批量运行待验证算法（见 sandbox.py 的 verify 模式），
+再用批量化的快速参考实现（NumPy 排序/查找、SciPy 最小生成树、向量化背包 DP）逐一比对，
+给出通过/失败以及最小的失败输入。
+"""
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import minimum_spanning_tree
+
+import benchmark
+import config
+import sandbox
+
+SEED = 20240701
+
+
+# ─── 输入生成 ─────────────────────────────────────────────
+
+def _gen_sort(rng, count):
+    lengths = rng.integers(0, 65, count)
+    lengths[:3] = (0, 1, 2)
+    return [(rng.integers(-50, 51, n).tolist(),) for n in lengths]
+
+
+def _gen_search(rng, count):
+    cases = []
+    for i in range(count):
+        n = int(rng.integers(0, 65))
+        data = np.sort(rng.choice(400, n, replace=False)).tolist()
+        if n and i % 2 == 0:
+            target = data[int(rng.integers(0, n))]
+        else:
+            target = int(rng.integers(0, 400))
+        cases.append((data, target))
+    return cases
+
+
+def _gen_graph(rng, count):
+    cases = []
+    for _ in range(count):
+        n = int(rng.integers(1, 13))
+        graph = {u: [] for u in range(n)}
+        edges = [(int(rng.integers(0, v)), v) for v in range(1, n)]
+        edges += [tuple(int(x) for x in rng.integers(0, n, 2)) for _ in range(int(rng.integers(0, 2 * n + 1)))]
+        for u, v in edges:
+            if u != v:
+                w = int(rng.integers(1, 30))
+                graph[u].append((v, w))
+                graph[v].append((u, w))
+        cases.append((graph,))
+    return cases
+
+
+def _gen_knapsack(rng, count):
+    cases = []
+    for _ in range(count):
+        n = int(rng.integers(0, 13))
+        cases.append((rng.integers(1, 21, n).tolist(), rng.integers(1, 51, n).tolist(),
+                      int(rng.integers(0, 61))))
+    return cases
+
+
+GENERATORS = {
+    '排序':     _gen_sort,
+    '查找':     _gen_search,
+    '图算法':   _gen_graph,
+    '动态规划': _gen_knapsack,
+}
+
+
+def input_size(category: str, args: tuple) -> int:
+    """输入规模，用于挑选最小的失败输入"""
+    if category == '图算法':
+        return sum(len(adj) for adj in args[0].values()) + len(args[0])
+    if category == '动态规划':
+        return len(args[0]) * 100 + args[2]
+    return len(args[0])
+
+
+# ─── 批量参考实现 ─────────────────────────────────────────
+
+def _ref_sort(cases):
+    """按长度分组，每组一次 np.sort"""
+    expected = [None] * len(cases)
+    by_len = {}
+    for i, (data,) in enumerate(cases):
+        by_len.setdefault(len(data), []).append(i)
+    for n, idx in by_len.items():
+        block = np.sort(np.array([cases[i][0] for i in idx], dtype=np.int64).reshape(len(idx), n), axis=1)
+        for i, row in zip(idx, block.tolist()):
+            expected[i] = row
+    return expected
+
+
+def _ref_search(cases):
+    """补齐为矩阵后一次性比较，得到每个目标是否存在"""
+    width = max((len(d) for d, _ in cases), default=0)
+    matrix = np.full((len(cases), max(width, 1)), np.iinfo(np.int64).min, dtype=np.int64)
+    for i, (data, _) in enumerate(cases):
+        matrix[i, :len(data)] = data
+    targets = np.array([t for _, t in cases], dtype=np.int64)
+    return (matrix == targets[:, None]).any(axis=1).tolist()
+
+
+def _ref_mst(cases):
+    """SciPy 最小生成树总权重；重边取最小权重"""
+    expected = []
+    for (graph,) in cases:
+        n = len(graph)
+        best = {}
+        for u, adj in graph.items():
+            for v, w in adj:
+                key = (min(u, v), max(u, v))
+                best[key] = min(w, best.get(key, w))
+        if not best:
+            expected.append(0)
+            continue
+        (rows, cols), weights = zip(*best.keys()), list(best.values())
+        mst = minimum_spanning_tree(coo_matrix((weights, (rows, cols)), shape=(n, n)).tocsr())
+        expected.append(int(mst.sum()))
+    return expected
+
+
+def _ref_knapsack(cases):
+    """所有实例共用一张 (实例数, 最大容量+1) 的 DP 表，逐个物品下标向量化更新"""
+    count = len(cases)
+    cap = max((c[2] for c in cases), default=0)
+    items = max((len(c[0]) for c in cases), default=0)
+    weights = np.zeros((count, items), dtype=np.int64)
+    values = np.zeros((count, items), dtype=np.int64)
+    for i, (w, v, _) in enumerate(cases):
+        weights[i, :len(w)] = w
+        values[i, :len(v)] = v
+    dp = np.zeros((count, cap + 1), dtype=np.int64)
+    cols = np.arange(cap + 1)
+    rows = np.arange(count)[:, None]
+    for j in range(items):
+        src = cols[None, :] - weights[:, j:j + 1]
+        take = np.where(src >= 0, dp[rows, np.maximum(src, 0)] + values[:, j:j + 1], -1)
+        dp = np.maximum(dp, take)
+    return [int(dp[i, c[2]]) for i, c in enumerate(cases)]
+
+
+REFERENCES = {
+    '排序':     _ref_sort,
+    '查找':     _ref_search,
+    '图算法':   _ref_mst,
+    '动态规划': _ref_knapsack,
+}
+
+
+# ─── 结果比对 ─────────────────────────────────────────────
+
+def _check(category: str, args: tuple, expected, actual) -> bool:
+    if category == '排序':
+        return actual == expected
+    if category == '查找':
+        data, target = args
+        if expected:
+            return isinstance(actual, int) and not isinstance(actual, bool) \
+                and 0 <= actual < len(data) and data[actual] == target
+        return actual in (-1, None, False)
+    if category == '图算法':
+        if isinstance(actual, (int, float)):
+            return actual == expected
+        if isinstance(actual, list):
+            return sum(e[-1] for e in actual) == expected and len(actual) == max(len(args[0]) - 1, 0)
+        return False
+    if category == '动态规划':
+        return actual == expected
+    return False
+
+
+def verify(code_text: str, category: str, count: int = None) -> dict:
+    """
+    生成 count 个输入，分块在子进程池中运行算法并与参考实现比对。
+    返回 dict：status（pass/fail/error/...）、total、passed、failures、minimal_failing
+    """
+    if category not in GENERATORS:
+        return {'status': 'error', 'error': f"不支持的分类：{category}"}
+    try:
+        entry = benchmark.find_entry(code_text, category)
+    except SyntaxError as e:
+        return {'status': 'error', 'error': f"语法错误：{e}"}
+    if entry is None:
+        return {'status': 'error', 'error': "找不到入口函数"}
+
+    count = count or config.ORACLE_CASES
+    cases = GENERATORS[category](np.random.default_rng(SEED), count)
+    chunk = config.ORACLE_CHUNK
+    payloads = [{
+        'mode': 'verify',
+        'code': code_text,
+        'entry': entry,
+        'inplace_arg': category == '排序',   # 原地排序且无返回值时取被修改的参数
+        'cases': cases[i:i + chunk],
+    } for i in range(0, len(cases), chunk)]
+    limits = sandbox.Limits(config.BENCH_CPU_SECONDS, config.BENCH_WALL_SECONDS, config.BENCH_MEMORY_MB)
+    outputs = sandbox.run_many(payloads, limits, config.BENCH_WORKERS)
+    expected = REFERENCES[category](cases)
+
+    failures = []
+    for start, out in zip(range(0, len(cases), chunk), outputs):
+        block = cases[start:start + chunk]
+        if out.get('status') != 'ok':
+            # 整块失败（超时、超内存、崩溃）：无法定位具体输入，整块计为失败
+            failures.extend((start + k, {'error': f"{out.get('status')}: {out.get('error')}"})
+                            for k in range(len(block)))
+            continue
+        for k, res in enumerate(out['results']):
+            i = start + k
+            if 'error' in res or not _check(category, cases[i], expected[i], res['value']):
+                failures.append((i, res))
+
+    result = {'status': 'pass' if not failures else 'fail', 'entry': entry,
+              'total': len(cases), 'passed': len(cases) - len(failures), 'failures': len(failures),
+              'minimal_failing': None}
+    if failures:
+        i, res = min(failures, key=lambda f: (input_size(category, cases[f[0]]), f[0]))
+        result['minimal_failing'] = {
+            'args': sandbox.to_jsonable(cases[i]),
+            'expected': expected[i],
+            'actual': res.get('value'),
+            'error': res.get('error'),
+        }
+    return result
+
+
+def format_result(result: dict) -> str:
+    """供界面展示的文本"""
+    if result.get('status') not in ('pass', 'fail'):
+        return f"正确性验证：{result.get('status')}  {result.get('error', '')}"
+    text = f"正确性验证：{'✅ 通过' if result['status'] == 'pass' else '❌ 未通过'}  " \
+           f"{result['passed']}/{result['total']}"
+    m = result.get('minimal_failing')
+    if m:
+        text += f"\n最小失败输入：{m['args']}\n期望：{m['expected']}  实际：{m['error'] or m['actual']}"
+    return text
@@ -0,0 +1,46 @@
+# profiling.py
+"""
+热点剖析：按需在隔离子进程中以 cProfile 运行算法（可选行级采样），输入取该分类最大的标准基准输入，
+只保留前 N 个热点函数/行的精简摘要。与常规基准测试分开运行，不影响其计时。
+"""
+import benchmark
+import config
+import sandbox
+
+
+def profile(code_text: str, category: str, line_sampling: bool = True) -> dict:
+    """
+    返回 dict：status、entry、size、total_time、functions（按自身耗时排序的前 N 个函数）、
+    以及 line_sampling 时的 samples、lines（采样次数最多的前 N 行）
+    """
+    if category not in benchmark.STANDARD_SIZES:
+        return {'status': 'error', 'error': f"不支持的分类：{category}"}
+    size = max(benchmark.STANDARD_SIZES[category])
+    payload, error = benchmark.make_payload(code_text, category, [size])
+    if payload is None:
+        return {'status': 'error', 'error': error}
+    payload.update({
+        'mode': 'profile',
+        'top_n': config.PROFILE_TOP_N,
+        'line_sampling': line_sampling,
+        'sample_interval': config.PROFILE_SAMPLE_INTERVAL,
+    })
+    result = sandbox.run(payload, benchmark.default_limits())
+    result.update({'entry': payload['entry'], 'size': size})
+    return result
+
+
+def format_result(result: dict) -> str:
+    """供界面展示的多行文本"""
+    if result.get('status') != 'ok':
+        return f"热点剖析失败：{result.get('status')}  {result.get('error', '')}"
+    lines = [f"热点剖析（规模 {result['size']}，总耗时 {result['total_time'] * 1000:.2f} ms）"]
+    for f in result['functions']:
+        calls = f['ncalls'] if f['ncalls'] == f['primitive_calls'] else f"{f['ncalls']}/{f['primitive_calls']}"
+        lines.append(f"  {f['function']} ({f['where']})  调用 {calls} 次  "
+                     f"自身 {f['tottime'] * 1000:.2f} ms  累计 {f['cumtime'] * 1000:.2f} ms")
+    if result.get('lines'):
+        lines.append(f"热点行（共 {result['samples']} 次采样）：")
+        for ln in result['lines']:
+            lines.append(f"  第 {ln['line']} 行 {ln['share']:.0%}  {ln['source']}")
+    return '\n'.join(lines)
@@ -0,0 +1,140 @@
+# recommend.py
+"""
+“下载了它的用户也下载了”：基于 download_logs 中 (用户, 算法) 对的物品-物品共现推荐。
+- 首次使用时把全部下载对构造成 SciPy 稀疏的 用户×算法 0/1 矩阵 X，共现矩阵 C = XᵀX，
+  对角线为各算法的下载人数，逐行向量化计算 Jaccard（或余弦）相似度并预先取前 k 个近邻
+- 之后按 download_logs 主键高水位增量读取新下载，只更新受影响的共现计数与近邻列表，不重建矩阵。
+  自增主键在插入时分配而非提交时，较慢的事务可能在更大的 ID 之后才提交，因此每次从高水位以下
+  RECOMMEND_REREAD_WINDOW 个 ID 处开始读；add 对同一 (用户, 算法) 幂等，重读的行不会重复计数
+- 查询直接读内存中的近邻表，为字典查找
+- retention.py 删除过期下载前把其中的 (用户, 算法) 对去重保存到 download_pairs，
+  全量构建时先读 download_logs 再读 download_pairs：两次读取之间被归档的行已包含在前者中，重启后历史共现不丢失
+匿名下载（user_id 为 0）不参与。
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+import config
+from dao import DownloadLogDAO
+
+
+def similarity(metric: str, co: int, n_a: int, n_b: int) -> float:
+    if metric == 'cosine':
+        return co / math.sqrt(n_a * n_b)
+    return co / (n_a + n_b - co)
+
+
+class CoDownloadIndex:
+    def __init__(self, metric: str = None, k: int = None):
+        self.metric = metric or config.RECOMMEND_METRIC
+        self.k = k or config.RECOMMEND_TOP_K
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.user_items = defaultdict(set)        # 用户 -> 下载过的算法
+        self.item_count = Counter()               # 算法 -> 下载人数
+        self.co = defaultdict(Counter)            # 算法 -> {算法: 共同下载人数}
+        self.neighbors = {}                       # 算法 -> [(近邻, 相似度)]，按相似度降序
+        self.last_log_id = 0
+        self.built = False
+        self._refreshed_at = 0.0
+
+    # ─── 全量构建（仅首次） ───────────────────────────────
+
+    def build(self, rows):
+        """rows 为 (log_id, user_id, algorithm_id) 可迭代对象"""
+        with self._lock:
+            last_id, pairs = 0, set()
+            for log_id, user_id, algo_id in rows:
+                pairs.add((user_id, algo_id))
+                last_id = max(last_id, log_id)
+            self._reset()
+            self.last_log_id = last_id
+            if pairs:
+                users, items = map(np.asarray, zip(*pairs))
+                user_keys, u_idx = np.unique(users, return_inverse=True)
+                item_keys, i_idx = np.unique(items, return_inverse=True)
+                x = csr_matrix((np.ones(len(pairs), dtype=np.int32), (u_idx, i_idx)),
+                               shape=(len(user_keys), len(item_keys)))
+                c = (x.T @ x).tocsr()
+                counts = c.diagonal()
+                for u, i in zip(users.tolist(), items.tolist()):
+                    self.user_items[u].add(i)
+                self.item_count.update(dict(zip(item_keys.tolist(), counts.tolist())))
+                self._load_rows(c, counts, item_keys)
+            self.built = True
+
+    def _load_rows(self, c, counts, item_keys):
+        """把共现矩阵逐行转为计数字典，并向量化计算每行相似度、取前 k 个"""
+        for row in range(c.shape[0]):
+            start, end = c.indptr[row], c.indptr[row + 1]
+            cols, co = c.indices[start:end], c.data[start:end]
+            keep = cols != row
+            cols, co = cols[keep], co[keep]
+            if not len(cols):
+                continue
+            item = int(item_keys[row])
+            self.co[item] = Counter(dict(zip(item_keys[cols].tolist(), co.tolist())))
+            if self.metric == 'cosine':
+                sims = co / np.sqrt(counts[row] * counts[cols])
+            else:
+                sims = co / (counts[row] + counts[cols] - co)
+            top = np.argsort(-sims, kind='stable')[:self.k]
+            self.neighbors[item] = list(zip(item_keys[cols[top]].tolist(), sims[top].tolist()))
+
+    # ─── 增量更新 ────────────────────────────────────────
+
+    def _rank(self, item: int):
+        n = self.item_count[item]
+        scored = ((j, similarity(self.metric, c, n, self.item_count[j])) for j, c in self.co[item].items())
+        self.neighbors[item] = heapq.nlargest(self.k, scored, key=lambda p: p[1])
+
+    def add(self, user_id: int, item: int):
+        """记录一次新下载；同一用户重复下载同一算法不改变共现"""
+        with self._lock:
+            owned = self.user_items[user_id]
+            if item in owned:
+                return
+            others = list(owned)
+            owned.add(item)
+            self.item_count[item] += 1
+            for j in others:
+                self.co[item][j] += 1
+                self.co[j][item] += 1
+            self._rank(item)
+            changed = set(others)
+            # item 的下载人数变化会改变它与所有共现算法的相似度；只重排近邻表中含有 item 的那些
+            for j in self.co[item]:
+                if j in changed or any(n == item for n, _ in self.neighbors.get(j, ())):
+                    self._rank(j)
+
+    def refresh(self, force: bool = False):
+        """读取高水位附近及之后的下载并增量应用（见模块说明）；未构建时全量构建"""
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < config.RECOMMEND_REFRESH_SECONDS:
+                return
+            if not self.built:
+                kept = ((0, user_id, algo_id) for user_id, algo_id in DownloadLogDAO.iter_kept_pairs())
+                self.build(itertools.chain(DownloadLogDAO.iter_pairs(), kept))
+            else:
+                start = max(0, self.last_log_id - config.RECOMMEND_REREAD_WINDOW)
+                for log_id, user_id, algo_id in DownloadLogDAO.iter_pairs(start):
+                    self.add(user_id, algo_id)
+                    self.last_log_id = max(self.last_log_id, log_id)
+            self._refreshed_at = time.monotonic()
+
+    def similar(self, item: int, k: int = None) -> list:
+        """返回 [(算法 ID, 相似度)]，按相似度降序"""
+        self.refresh()
+        return self.neighbors.get(item, [])[:k or self.k]
+
+
+index = CoDownloadIndex()
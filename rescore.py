@@ -0,0 +1,58 @@
+# rescore.py
+"""
+按当前评分策略重算全部算法分数（作为 'rescore' 后台任务由 worker.py 执行，见 jobs.py）。
+- 按 ID 升序每次取 RESCORE_BATCH_SIZE 个算法，源码解析（scoring.analyze）在 RESCORE_WORKERS 个子进程中并行，
+  只有写回分数时才开启一个短事务，不长时间锁住 algorithms 表
+- 每块的分数与检查点（rescore_runs.last_id）在同一事务中提交；worker 中断后任务被重新领取时，
+  权重未变则从检查点继续，已完成的块不再重算；策略在运行中再次修改时旧任务被取代、按新权重重新开始
+- 进度（已处理数 / 总数）保存在 rescore_runs 中，GUI 通过 logic.get_rescore_progress() 轮询
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import config
+import scoring
+from dao import RescoreDAO
+
+
+def run(batch_size: int = None, workers: int = None, progress=None) -> dict:
+    """
+    执行（或从检查点继续）一次重算，返回任务状态 dict；progress(processed, total) 在每块提交后调用。
+    """
+    batch_size = batch_size or config.RESCORE_BATCH_SIZE
+    workers = config.RESCORE_WORKERS if workers is None else workers
+    job = RescoreDAO.start()
+    weights = scoring.strategy_weights({'func_weight': job.func_weight, 'comment_weight': job.comment_weight})
+    pool = ProcessPoolExecutor(workers, mp_context=get_context('spawn')) if workers > 1 else None
+    after, processed, status = job.last_id, job.processed, 'done'
+    try:
+        while True:
+            rows = RescoreDAO.next_chunk(after, batch_size)
+            if not rows:
+                break
+            codes = [code for _, _, code in rows]
+            if pool is not None:
+                chunksize = max(1, len(codes) // (workers * 4))
+                metrics = list(pool.map(scoring.try_analyze, codes, chunksize=chunksize))
+            else:
+                metrics = [scoring.try_analyze(c) for c in codes]
+            # 语法错误的算法（metrics 为 None）保留原分数
+            scores = [(aid, ver, scoring.score_metrics(m, weights))
+                      for (aid, ver, _), m in zip(rows, metrics) if m is not None]
+            last = rows[-1][0]
+            if not RescoreDAO.save_chunk(job.id, after, last, scores):
+                status = 'superseded'
+                break
+            after, processed = last, processed + len(scores)
+            if progress:
+                progress(processed, job.total)
+    except Exception as e:
+        RescoreDAO.finish(job.id, 'failed', f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if status == 'done':
+        RescoreDAO.finish(job.id, 'done')
+    return {'id': job.id, 'status': status, 'processed': processed, 'total': job.total}
+
@@ -0,0 +1,70 @@
+# retention.py
+"""
+日志保留任务：download_logs 与 admin_logs 中早于保留期的原始行
+1. 以 gzip 压缩的 NDJSON 追加写入 <ARCHIVE_DIR>/<表名>-<运行日期>.ndjson.gz（每批一个 gzip 成员，可直接 gzip.open 读取）
+2. 按天累加到 download_daily / admin_log_daily 汇总表
+3. 按主键分小批删除，每批一个短事务，批次之间短暂让出，不长时间持有锁
+归档写入并 fsync 后才提交删除；若在两者之间中断，重跑时这些行会再次归档（至少一次）。
+统计查询（StatsDAO.get_stats、评分策略历史）会同时读取汇总表与保留期内的原始行。
+变更日志（change_log）只供客户端增量刷新，早于 CHANGE_LOG_DAYS 天的行直接分批删除，不归档。
+"""
+import gzip
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+
+import config
+from dao import ChangeLogDAO, RetentionDAO
+
+
+def archive_dir() -> str:
+    base = config.ARCHIVE_DIR
+    if not os.path.isabs(base):
+        base = os.path.join(os.path.dirname(os.path.abspath(__file__)), base)
+    return base
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _archiver(table: str, run_date: date):
+    path = os.path.join(archive_dir(), f"{table}-{run_date:%Y%m%d}.ndjson.gz")
+
+    def write(rows: list):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'ab') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as gz:
+                for r in rows:
+                    gz.write((json.dumps(r, ensure_ascii=False, default=_default) + '\n').encode('utf-8'))
+            raw.flush()
+            os.fsync(raw.fileno())
+    return write
+
+
+def run(days: int = None, batch_size: int = None, pause: float = 0.05) -> dict:
+    """
+    滚动汇总并归档早于 days 天（默认 RETENTION_DAYS）的日志，返回 {表名: 处理行数}
+    """
+    days = config.RETENTION_DAYS if days is None else days
+    batch_size = batch_size or config.RETENTION_BATCH_SIZE
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    today = datetime.utcnow().date()
+    result = {}
+    for table, rollup in (('download_logs', RetentionDAO.rollup_downloads),
+                          ('admin_logs', RetentionDAO.rollup_admin_logs)):
+        archive = _archiver(table, today)
+        total = 0
+        while True:
+            n = rollup(cutoff, batch_size, archive)
+            total += n
+            if n < batch_size:
+                break
+            time.sleep(pause)
+        result[table] = total
+    result['change_log'] = ChangeLogDAO.prune(datetime.utcnow() - timedelta(days=config.CHANGE_LOG_DAYS),
+                                              batch_size)
+    return result
@@ -0,0 +1,525 @@
+# sandbox.py
+"""
+隔离执行：在独立的 Python 子进程（-I 隔离模式）中运行上传代码的入口函数。
+- 子进程启动后先设置 CPU 时间与内存上限（resource.setrlimit，不支持的平台跳过）
+- 只执行源码中的 import / 函数 / 类定义 / 赋值语句，示例脚本、input() 循环与 __main__ 块不会运行
+- 用户代码的标准输入为空、标准输出被丢弃；结果以一行 JSON 经独立的文件描述符回传
+- 父进程负责墙钟超时，超时即杀死子进程
+- 结果由与用户代码同进程的代码写出，可被伪造：父进程核对结果格式（_CHECKS），并以 os.wait4 自行测量子进程的
+  CPU 时间（process_cpu），子进程报告的计时超出该值即判为无效；需要可信耗时的调用方以 process_cpu 为下限
+本文件同时是子进程脚本，只依赖标准库（读取内存映射语料时另需 NumPy）。
+"""
+import ast
+import json
+import math
+import os
+import pickle
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+RESULT_MARK = '@@SANDBOX_RESULT@@'
+_SIGXCPU = getattr(signal, 'SIGXCPU', None)
+
+# 保留执行的顶层语句类型
+_KEEP_STMTS = (
+    ast.Import, ast.ImportFrom, ast.FunctionDef, ast.AsyncFunctionDef,
+    ast.ClassDef, ast.Assign, ast.AnnAssign
+)
+
+
+class Limits:
+    """单次执行的资源上限"""
+
+    def __init__(self, cpu_seconds: int, wall_seconds: float, memory_mb: int):
+        self.cpu_seconds = cpu_seconds
+        self.wall_seconds = wall_seconds
+        self.memory_mb = memory_mb
+
+
+def strip_module(code_text: str) -> ast.Module:
+    """只保留定义类语句，去掉顶层的示例调用、循环与 if __name__ == '__main__' 块"""
+    tree = ast.parse(code_text)
+    tree.body = [stmt for stmt in tree.body if isinstance(stmt, _KEEP_STMTS)]
+    return tree
+
+
+# ─── 父进程侧 ───────────────────────────────────────────────
+
+class _Process(subprocess.Popen):
+    """以 os.wait4 回收子进程，同时取得其资源用量（由内核记录，子进程中的代码无法篡改）"""
+    rusage = None
+
+    def _try_wait(self, wait_flags):
+        if not hasattr(os, 'wait4'):   # 非 POSIX
+            return super()._try_wait(wait_flags)
+        try:
+            pid, sts, rusage = os.wait4(self.pid, wait_flags)
+        except ChildProcessError:
+            return self.pid, 0
+        if pid == self.pid:
+            self.rusage = rusage
+        return pid, sts
+
+
+def run(payload: dict, limits: Limits) -> dict:
+    """
+    在子进程中执行一个任务，返回结果 dict，status 取值：
+    ok / error / timeout / cpu_limit / memory_limit / crashed
+    payload 中的 mode 决定子进程做什么（见 _MODES）。
+    process_wall / process_cpu 为父进程测得的子进程墙钟与 CPU 时间（不支持 wait4 的平台 process_cpu 为 None）。
+    """
+    payload = dict(payload, cpu_seconds=limits.cpu_seconds, memory_mb=limits.memory_mb)
+    started = time.perf_counter()
+    with _Process([sys.executable, '-I', os.path.abspath(__file__)],
+                  stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+        try:
+            stdout, stderr = proc.communicate(pickle.dumps(payload), timeout=limits.wall_seconds)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            return {'status': 'timeout', 'error': f"超过墙钟时间上限 {limits.wall_seconds}s"}
+    elapsed = time.perf_counter() - started
+    cpu = proc.rusage.ru_utime + proc.rusage.ru_stime if proc.rusage is not None else None
+
+    for line in reversed(stdout.decode('utf-8', 'replace').splitlines()):
+        if line.startswith(RESULT_MARK):
+            try:
+                result = json.loads(line[len(RESULT_MARK):])
+                problem = _check_result(payload, result, cpu)
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                problem = f"{type(e).__name__}: {e}"
+            if problem:
+                return {'status': 'error', 'error': f"子进程返回的结果无效：{problem}",
+                        'process_wall': elapsed, 'process_cpu': cpu}
+            result['process_wall'] = elapsed
+            result['process_cpu'] = cpu
+            return result
+
+    if _SIGXCPU is not None and proc.returncode in (-_SIGXCPU, -signal.SIGKILL):
+        return {'status': 'cpu_limit', 'error': f"超过 CPU 时间上限 {limits.cpu_seconds}s"}
+    stderr = stderr.decode('utf-8', 'replace').strip().splitlines()
+    if stderr and 'MemoryError' in stderr[-1]:
+        return {'status': 'memory_limit', 'error': f"超过内存上限 {limits.memory_mb}MB"}
+    return {'status': 'crashed', 'error': stderr[-1] if stderr else f"退出码 {proc.returncode}"}
+
+
+# ─── 结果核对（父进程侧） ────────────────────────────────────
+# 子进程的结果由与上传代码同一进程中的代码写出，上传代码可以伪造或写出残缺的结果行；
+# 这里只接受格式完整、数值合理的结果，调用方因此可以直接按键取值。
+
+# 子进程报告的计时之和允许超出父进程测得的 CPU 时间的比例与绝对量（计时粒度、调度误差）
+CPU_TOLERANCE = (1.1, 0.05)
+
+
+def _number(value, allow_none: bool = False) -> bool:
+    if value is None:
+        return allow_none
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value) and value >= 0
+
+
+def _check_benchmark(payload: dict, result: dict, cpu) -> str:
+    cases = result.get('cases')
+    if not isinstance(cases, list) or len(cases) != len(payload['cases']):
+        return "cases 数量不符"
+    claimed = 0.0
+    for got, case in zip(cases, payload['cases']):
+        if not isinstance(got, dict) or got.get('name') != case['name'] or got.get('size') != case['size']:
+            return f"{case['name']} 的结果缺失或不对应"
+        if not (_number(got.get('wall')) and _number(got.get('cpu'))
+                and _number(got.get('peak_bytes'), allow_none=not payload.get('trace_memory', True))):
+            return f"{case['name']} 的计时或内存字段无效"
+        if payload.get('answer_salt') is not None and 'corpus' in case \
+                and not isinstance(got.get('answer'), (str, type(None))):
+            return f"{case['name']} 的输出摘要无效"
+        claimed += got['cpu'] * case.get('loops', 1) * payload.get('repeat', 1)
+    ratio, slack = CPU_TOLERANCE
+    if cpu is not None and claimed > cpu * ratio + slack:
+        return f"报告的 CPU 时间 {claimed:.3f}s 超过父进程测得的 {cpu:.3f}s"
+    return None
+
+
+def _check_verify(payload: dict, result: dict, cpu) -> str:
+    results = result.get('results')
+    if not isinstance(results, list) or len(results) != len(payload['cases']):
+        return "results 数量不符"
+    for res in results:
+        if not isinstance(res, dict) or not ('value' in res or isinstance(res.get('error'), str)):
+            return "results 中有无效条目"
+    return None
+
+
+def _check_profile(payload: dict, result: dict, cpu) -> str:
+    functions = result.get('functions')
+    if not _number(result.get('total_time')) or not isinstance(functions, list):
+        return "缺少 total_time 或 functions"
+    keys = ('function', 'where', 'user_code', 'ncalls', 'primitive_calls', 'tottime', 'cumtime')
+    if not all(isinstance(f, dict) and all(k in f for k in keys) for f in functions):
+        return "functions 中有无效条目"
+    if payload.get('line_sampling'):
+        lines = result.get('lines')
+        if not _number(result.get('samples')) or not isinstance(lines, list):
+            return "缺少 samples 或 lines"
+        keys = ('line', 'function', 'samples', 'share', 'source')
+        if not all(isinstance(ln, dict) and all(k in ln for k in keys) for ln in lines):
+            return "lines 中有无效条目"
+    return None
+
+
+_CHECKS = {
+    'benchmark': _check_benchmark,
+    'verify':    _check_verify,
+    'profile':   _check_profile,
+}
+
+
+def _check_result(payload: dict, result: dict, cpu) -> str:
+    """返回结果的问题描述，没有问题时返回 None；非 ok 的结果只要求有 error 文本"""
+    if not isinstance(result, dict) or not isinstance(result.get('status'), str):
+        return "不是带 status 的对象"
+    if not _number(result.get('max_rss')):
+        return "max_rss 无效"
+    if result['status'] != 'ok':
+        return None if isinstance(result.get('error'), str) else "缺少 error"
+    return _CHECKS[payload['mode']](payload, result, cpu)
+
+
+def run_many(payloads: list, limits: Limits, workers: int) -> list:
+    """并发执行多个任务（每个任务一个子进程），结果顺序与 payloads 一致"""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(lambda p: run(p, limits), payloads))
+
+
+# ─── 子进程侧 ───────────────────────────────────────────────
+
+def _apply_limits(cpu_seconds: int, memory_mb: int):
+    if resource is None:
+        return
+    # CPU 软上限触发 SIGXCPU，硬上限多留 1 秒兜底
+    for res, soft, hard in ((resource.RLIMIT_CPU, cpu_seconds, cpu_seconds + 1),
+                            (resource.RLIMIT_AS, memory_mb * 1024 * 1024, memory_mb * 1024 * 1024)):
+        try:
+            resource.setrlimit(res, (soft, hard))
+        except (ValueError, OSError):
+            pass   # 部分平台（如 macOS 的 RLIMIT_AS）不支持
+
+
+def _load_entry(code_text: str, entry: str):
+    namespace = {'__name__': '__sandbox__'}
+    exec(compile(strip_module(code_text), '<algorithm>', 'exec'), namespace)
+    func = namespace.get(entry)
+    if not callable(func):
+        raise LookupError(f"找不到入口函数：{entry}")
+    return func
+
+
+def _max_rss() -> int:
+    """
+    子进程自身的常驻内存峰值（字节）。Linux 的 ru_maxrss 经 fork + exec 后仍保留父进程（GUI、服务）的峰值，
+    因此优先读取 /proc/self/status 的 VmHWM：它属于 exec 后新建的地址空间，只反映子进程本身
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass   # 非 Linux
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def _view(array_):
+    """int64 语料数组 -> 只读 memoryview（格式 'q'）：直接引用内存映射页，不复制；
+    入口函数看到的是支持下标、切片、迭代、len 的序列，元素为 int，写入会抛出 TypeError"""
+    return memoryview(array_).cast('B').cast('q')
+
+
+def _corpus_calls(spec: dict) -> list:
+    """
+    以内存映射方式打开语料数组（多个子进程共享页缓存），还原为一次计时内依次传给入口函数的参数元组：
+    查找语料对每个查询各调用一次（共享同一份有序数组），其余为单次调用。数据集类型见 corpus.DATASETS。
+    只读的输入（查找的有序数组、背包的重量与价值）以 _view 零拷贝传入；排序会原地修改输入，
+    需复制为可变列表，图需构造成邻接表。
+    """
+    import numpy as np
+    arrays = {k: np.load(path, mmap_mode='r') for k, path in spec['files'].items()}
+    kind = spec['kind']
+    if kind == 'array':
+        return [(arrays['data'].tolist(),)]
+    if kind == 'search':
+        data = _view(arrays['data'])
+        return [(data, int(q)) for q in arrays['queries']]
+    if kind == 'graph':
+        graph = {u: [] for u in range(spec['meta']['n'])}
+        for u, v, w in arrays['edges'].tolist():
+            graph[u].append((v, w))
+            graph[v].append((u, w))
+        return [(graph,)]
+    if kind == 'knapsack':
+        return [(_view(arrays['weights']), _view(arrays['values']), spec['meta']['capacity'])]
+    raise ValueError(f"未知的语料类型：{kind}")
+
+
+def _case_calls(case: dict) -> list:
+    return _corpus_calls(case['corpus']) if 'corpus' in case else [case['args']]
+
+
+def _case_args(case: dict) -> tuple:
+    """单次调用的参数（剖析用第一组）"""
+    return _case_calls(case)[0]
+
+
+def _mode_benchmark(func, payload: dict) -> dict:
+    """
+    对每组输入：先重复计时（取最优墙钟时间与对应 CPU 时间），再单独跑一次 tracemalloc 取内存峰值，
+    以免内存跟踪拖慢计时；trace_memory 为假时跳过这一次（peak_bytes 为 None），
+    子进程的 CPU 时间便只含计时轮次，父进程可用它核对报告的耗时。
+    copy_args 为真时每次调用前深拷贝输入（只读的 memoryview 语料除外），避免原地排序影响后续轮次；
+    给定 answer_salt 时计时轮次保留语料 case 的输出，最后一轮的输出摘要（_answer）随结果返回；
+    case['loops'] 为一次计时内的重复轮数，用于放大耗时很短的调用（如查找）；
+    一轮依次完成该组输入的全部调用（语料查找为全部查询），wall / cpu 为每轮耗时。
+    """
+    import copy
+    import tracemalloc
+    copy_args = payload.get('copy_args', True)
+
+    def fresh(args):
+        return copy.deepcopy(args, {id(a): a for a in args if isinstance(a, memoryview)}) if copy_args else args
+
+    results = []
+    for case in payload['cases']:
+        calls = _case_calls(case)
+        loops = case.get('loops', 1)
+        check = payload.get('answer_salt') is not None and 'corpus' in case
+        best_wall, best_cpu = None, None
+        for _ in range(payload.get('repeat', 1)):
+            batch = [fresh(args) for _ in range(loops) for args in calls]
+            w0, c0 = time.perf_counter(), time.process_time()
+            if check:
+                outputs = [func(*args) for args in batch]
+            else:
+                for args in batch:
+                    func(*args)
+            wall = (time.perf_counter() - w0) / loops
+            cpu = (time.process_time() - c0) / loops
+            if best_wall is None or wall < best_wall:
+                best_wall, best_cpu = wall, cpu
+        peak = None
+        if payload.get('trace_memory', True):
+            args = fresh(calls[0])
+            tracemalloc.start()
+            func(*args)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        results.append({'name': case['name'], 'size': case['size'],
+                        'wall': best_wall, 'cpu': best_cpu, 'peak_bytes': peak})
+        if check:
+            results[-1]['answer'] = _answer(case['corpus']['kind'], batch[-len(calls):], outputs[-len(calls):],
+                                            payload['answer_salt'])
+    return {'cases': results}
+
+
+def _answer(kind: str, calls: list, outputs: list, salt: str):
+    """
+    语料上最后一轮调用输出的摘要（加盐 SHA-256），父进程与 corpus.answer 算出的正确答案比对；
+    输出形式无法识别时返回 None。原地排序（返回 None）取被修改的参数
+    """
+    import hashlib
+    from array import array
+    digest = hashlib.sha256(salt.encode())
+    try:
+        if kind == 'array':
+            (args,), (value,) = calls, outputs
+            digest.update(array('q', args[0] if value is None else value).tobytes())
+        elif kind == 'search':
+            found = []
+            for (data, target), r in zip(calls, outputs):
+                hit = isinstance(r, int) and not isinstance(r, bool) and 0 <= r < len(data) and data[r] == target
+                found.append(r if hit else -1)
+            digest.update(array('q', found).tobytes())
+        else:
+            (value,) = outputs
+            if kind == 'graph' and isinstance(value, list):
+                value = sum(e[-1] for e in value)   # 返回边列表时取总权重
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value != int(value):
+                return None
+            digest.update(str(int(value)).encode())
+    except (TypeError, ValueError, OverflowError, IndexError):
+        return None
+    return digest.hexdigest()
+
+
+def to_jsonable(value):
+    """把算法输出转换为可 JSON 序列化的值：元组转列表，字典键转字符串，其它对象取 repr"""
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return repr(value)
+
+
+def _mode_verify(func, payload: dict) -> dict:
+    """逐个输入调用入口函数，记录输出或异常（单个输入出错不影响其余输入）"""
+    results = []
+    for args in payload['cases']:
+        args = [list(a) if isinstance(a, list) else a for a in args]
+        try:
+            value = func(*args)
+            if value is None and payload.get('inplace_arg'):
+                value = args[0]
+            results.append({'value': to_jsonable(value)})
+        except Exception as e:
+            results.append({'error': f"{type(e).__name__}: {e}"})
+    return {'results': results}
+
+
+def _instruction_lines(code) -> list:
+    """
+    每个字节码单元（2 字节）对应的源码行号。Python 3.11+ 循环末尾的 JUMP_BACKWARD 没有行号，
+    而采样信号恰好多在这里处理，归到跳转目标（循环头，如 for 所在行）；其余无行号的指令沿用前一条指令的行号
+    """
+    import dis
+    lines = [None] * (len(code.co_code) // 2)
+    backward = {}
+    for ins in dis.get_instructions(code):
+        positions = getattr(ins, 'positions', None)   # Python 3.11+
+        line = positions.lineno if positions is not None else ins.starts_line
+        if line is None and ins.opname.startswith('JUMP_BACKWARD'):
+            backward[ins.offset // 2] = ins.argval // 2
+        lines[ins.offset // 2] = line
+    last = code.co_firstlineno
+    for i, line in enumerate(lines):   # 补齐无行号的指令与内联缓存单元
+        last = lines[i] = line if line is not None else last
+    for i, target in backward.items():
+        lines[i] = lines[target]
+    return lines
+
+
+def _sample_lines(func, args, interval: float, min_samples: int, budget: float) -> dict:
+    """
+    行级采样：用 ITIMER_PROF 定时中断，记录当前栈中最内层上传代码帧正在执行的行。
+    信号处理函数只在循环回跳、函数入口等检查点运行，此时 Python 3.11+ 的 frame.f_lineno 常为 None，
+    因此按 frame.f_lasti 查指令行号表（_instruction_lines，每个代码对象算一次）。
+    单次调用太快时重复调用，直到采样数达到 min_samples 或用时超过 budget 秒。
+    不支持 setitimer 的平台返回空结果。
+    """
+    import copy
+    if not hasattr(signal, 'setitimer'):
+        return {}
+    counts = {}
+    line_tables = {}
+
+    def on_tick(signum, frame):
+        while frame is not None and frame.f_code.co_filename != '<algorithm>':
+            frame = frame.f_back
+        if frame is None:
+            return
+        code = frame.f_code
+        table = line_tables.get(code)
+        if table is None:
+            table = line_tables[code] = _instruction_lines(code)
+        i = frame.f_lasti // 2
+        line = table[i] if 0 <= i < len(table) else frame.f_lineno or code.co_firstlineno
+        key = (line, code.co_name)
+        counts[key] = counts.get(key, 0) + 1
+
+    previous = signal.signal(signal.SIGPROF, on_tick)
+    signal.setitimer(signal.ITIMER_PROF, interval, interval)
+    started = time.perf_counter()
+    try:
+        while True:
+            func(*copy.deepcopy(args))
+            if sum(counts.values()) >= min_samples or time.perf_counter() - started > budget:
+                break
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, previous)
+    return counts
+
+
+def _mode_profile(func, payload: dict) -> dict:
+    """
+    在 cProfile 下运行一次入口函数，按自身耗时取前 top_n 个函数；
+    line_sampling 为真时再单独运行一次做行级采样（不与 cProfile 叠加，避免相互干扰）。
+    """
+    import copy
+    import cProfile
+    import pstats
+    case_args = _case_args(payload['cases'][0])
+    profiler = cProfile.Profile()
+    profiler.runcall(func, *copy.deepcopy(case_args))
+    stats = pstats.Stats(profiler).stats
+    total = sum(tt for (_, _, tt, _, _) in stats.values())
+    rows = []
+    for (filename, lineno, name), (prim, ncalls, tt, ct, _) in stats.items():
+        if '_lsprof' in name:
+            continue   # 剖析器自身
+        if filename == '<algorithm>':
+            where = f"line {lineno}"
+        elif filename == '~':
+            where = 'builtin'
+        else:
+            where = filename.rsplit('/', 1)[-1]
+        rows.append({'function': name, 'where': where, 'user_code': filename == '<algorithm>',
+                     'ncalls': ncalls, 'primitive_calls': prim, 'tottime': tt, 'cumtime': ct})
+    rows.sort(key=lambda r: -r['tottime'])
+    result = {'total_time': total, 'functions': rows[:payload.get('top_n', 10)]}
+
+    if payload.get('line_sampling'):
+        counts = _sample_lines(func, case_args, payload.get('sample_interval', 0.001),
+                               payload.get('min_samples', 200), payload.get('sample_budget', 2.0))
+        samples = sum(counts.values())
+        source = payload['code'].splitlines()
+        lines = sorted(counts.items(), key=lambda kv: -kv[1])[:payload.get('top_n', 10)]
+        result['samples'] = samples
+        result['lines'] = [{'line': ln, 'function': fn, 'samples': n, 'share': n / samples,
+                            'source': source[ln - 1].strip() if 0 < ln <= len(source) else ''}
+                           for (ln, fn), n in lines]
+    return result
+
+
+_MODES = {
+    'benchmark': _mode_benchmark,
+    'verify':    _mode_verify,
+    'profile':   _mode_profile,
+}
+
+
+def _child_main():
+    payload = pickle.loads(sys.stdin.buffer.read())
+    _apply_limits(payload['cpu_seconds'], payload['memory_mb'])
+
+    # 结果通道：复制原标准输出，然后把 fd 1 与 sys.stdout 指向空设备
+    result_out = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    sys.stdout = open(os.devnull, 'w')
+    sys.stdin = open(os.devnull, 'r')
+
+    try:
+        func = _load_entry(payload['code'], payload['entry'])
+        result = _MODES[payload['mode']](func, payload)
+        result['status'] = 'ok'
+    except MemoryError:
+        result = {'status': 'memory_limit', 'error': f"超过内存上限 {payload['memory_mb']}MB"}
+    except BaseException as e:
+        result = {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+    result['max_rss'] = _max_rss()
+    result_out.write(RESULT_MARK + json.dumps(result, ensure_ascii=False) + '\n')
+    result_out.flush()
+
+
+if __name__ == '__main__':
+    _child_main()
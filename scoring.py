@@ -0,0 +1,170 @@
+# scoring.py
+"""
+静态评分引擎：一次 ast.NodeVisitor 遍历 + 一次 tokenize 扫描得到全部代码指标，
+按源码哈希缓存分析结果，评分时只需按策略权重加权求和。
+指标：
+- functions   函数定义数（含 async def 与方法）
+- classes     类定义数
+- comments    真实注释数（COMMENT token，不含字符串中的 '#'）
+- docstrings  模块/类/函数文档字符串数
+- loc         有效代码行数（不含空行与纯注释行）
+- complexity  圈复杂度（1 + 判定点数）
+- max_complexity 单个函数的最大圈复杂度
+"""
+import ast
+import hashlib
+import io
+import threading
+import tokenize
+from collections import OrderedDict
+
+import config
+
+METRICS = ('functions', 'classes', 'comments', 'docstrings', 'loc', 'complexity', 'max_complexity')
+
+# 评分策略字段 -> 指标名称；新增一种加权指标只需在 scoring_strategy 表加列并在此登记
+STRATEGY_FIELDS = {
+    'func_weight':    'functions',
+    'comment_weight': 'comments',
+}
+
+# 不计入有效代码行的 token 类型
+_NON_CODE_TOKENS = {
+    tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE,
+    tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER, tokenize.ENCODING
+}
+
+
+class _MetricsVisitor(ast.NodeVisitor):
+    """单次遍历统计函数、类、文档字符串与圈复杂度"""
+
+    def __init__(self):
+        self.functions = 0
+        self.classes = 0
+        self.docstrings = 0
+        self.decisions = 0
+        self.max_complexity = 0
+        self._stack = []   # 当前所在函数的判定点计数
+
+    def _decision(self, count=1):
+        self.decisions += count
+        if self._stack:
+            self._stack[-1] += count
+
+    def _docstring(self, node):
+        if ast.get_docstring(node, clean=False) is not None:
+            self.docstrings += 1
+
+    def visit_Module(self, node):
+        self._docstring(node)
+        self.generic_visit(node)
+
+    def _visit_function(self, node):
+        self.functions += 1
+        self._docstring(node)
+        self._stack.append(0)
+        self.generic_visit(node)
+        self.max_complexity = max(self.max_complexity, 1 + self._stack.pop())
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_ClassDef(self, node):
+        self.classes += 1
+        self._docstring(node)
+        self.generic_visit(node)
+
+    def _visit_branch(self, node):
+        self._decision()
+        self.generic_visit(node)
+
+    visit_If = visit_IfExp = visit_For = visit_AsyncFor = visit_While = _visit_branch
+    visit_ExceptHandler = visit_Assert = visit_match_case = _visit_branch
+
+    def visit_BoolOp(self, node):
+        self._decision(len(node.values) - 1)
+        self.generic_visit(node)
+
+    def visit_comprehension(self, node):
+        self._decision(1 + len(node.ifs))
+        self.generic_visit(node)
+
+
+def _scan_tokens(code_text: str):
+    """返回 (注释数, 有效代码行数)"""
+    comments = 0
+    code_rows = set()
+    for tok in tokenize.generate_tokens(io.StringIO(code_text).readline):
+        if tok.type == tokenize.COMMENT:
+            comments += 1
+        elif tok.type not in _NON_CODE_TOKENS:
+            code_rows.update(range(tok.start[0], tok.end[0] + 1))
+    return comments, len(code_rows)
+
+
+def code_hash(code_text: str) -> str:
+    return hashlib.sha256(code_text.encode('utf-8')).hexdigest()
+
+
+_memo = OrderedDict()   # code_hash -> metrics
+_memo_lock = threading.Lock()
+
+
+def _analyze(code_text: str) -> dict:
+    tree = ast.parse(code_text)
+    visitor = _MetricsVisitor()
+    visitor.visit(tree)
+    comments, loc = _scan_tokens(code_text)
+    return {
+        'functions':      visitor.functions,
+        'classes':        visitor.classes,
+        'comments':       comments,
+        'docstrings':     visitor.docstrings,
+        'loc':            loc,
+        'complexity':     1 + visitor.decisions,
+        'max_complexity': visitor.max_complexity,
+    }
+
+
+def analyze(code_text: str) -> dict:
+    """
+    计算源码的全部指标，结果按源码哈希缓存；语法错误时抛出 SyntaxError。
+    """
+    key = code_hash(code_text)
+    with _memo_lock:
+        metrics = _memo.get(key)
+        if metrics is not None:
+            _memo.move_to_end(key)
+            return dict(metrics)
+    metrics = _analyze(code_text)
+    with _memo_lock:
+        _memo[key] = metrics
+        while len(_memo) > config.SCORING_MEMO_SIZE:
+            _memo.popitem(last=False)
+    return dict(metrics)
+
+
+def try_analyze(code_text: str):
+    """同 analyze，语法错误时返回 None（供批量重算在子进程中调用，不涉及数据库）"""
+    try:
+        return analyze(code_text)
+    except SyntaxError:
+        return None
+
+
+def strategy_weights(strat) -> dict:
+    """把 ScoringStrategy 对象或 dict 转换为 {指标名: 权重}"""
+    if isinstance(strat, dict):
+        get = strat.get
+    else:
+        get = lambda field: getattr(strat, field, None)
+    return {metric: get(field) or 0 for field, metric in STRATEGY_FIELDS.items()}
+
+
+def score_metrics(metrics: dict, weights: dict) -> float:
+    return float(sum(metrics[name] * weight for name, weight in weights.items()))
+
+
+def score(code_text: str, weights: dict) -> float:
+    """按权重对源码评分"""
+    return score_metrics(analyze(code_text), weights)
@@ -0,0 +1,685 @@
+#!/usr/bin/env python3
+# server.py
+"""
+HTTP/JSON API 服务：基于 asyncio.start_server 的单进程服务，供多个客户端（GUI、脚本）共享同一后端。
+- 连接处理、请求解析与响应写出都在事件循环中完成，可同时保持数百个客户端连接
+- 业务调用仍走同步的 logic 层，在线程池中执行；所有线程共享 models.engine 的数据库连接池
+- 基准测试、验证等耗时分析使用单独的小线程池，避免占满查询线程
+- 登录后返回令牌，需要身份的接口使用请求头 Authorization: Bearer <令牌>
+- 源码下载以 chunked 分块流式写出，按套接字写缓冲区背压逐块发送
+- 审核、删除与修改评分策略可带上读到的 row_version，记录已被他人修改或删除时返回 409，客户端刷新后重试
+
+启动：python server.py [--host 127.0.0.1] [--port 8765]
+"""
+import argparse
+import asyncio
+import json
+import re
+import secrets
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import config
+import logic
+from errors import ConcurrencyError
+
+CHUNK_SIZE = 64 * 1024
+
+_query_pool = ThreadPoolExecutor(max_workers=config.API_WORKERS, thread_name_prefix='api')
+_analysis_pool = ThreadPoolExecutor(max_workers=config.BENCH_WORKERS, thread_name_prefix='api-analysis')
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query          # {参数名: 值}，同名参数取最后一个
+        self.headers = headers      # 小写键
+        self.body = body
+        self.params = {}            # 路径参数
+        self.user = None
+
+    def json(self) -> dict:
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except ValueError:
+            raise HTTPError(400, "请求体不是合法的 JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "请求体必须是 JSON 对象")
+        return data
+
+
+class Stream:
+    """流式响应：body 为 str/bytes 或二进制文件对象，按 CHUNK_SIZE 分块写出"""
+    def __init__(self, body, content_type: str, filename: str = None, headers: dict = None):
+        self.body = body.encode('utf-8') if isinstance(body, str) else body
+        self.content_type = content_type
+        self.filename = filename
+        self.headers = headers or {}
+
+    def chunks(self):
+        if isinstance(self.body, (bytes, bytearray)):
+            view = memoryview(self.body)
+            for start in range(0, len(view), CHUNK_SIZE):
+                yield view[start:start + CHUNK_SIZE]
+            return
+        while True:
+            chunk = self.body.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        if hasattr(self.body, 'close'):
+            self.body.close()
+
+
+# ─── 登录令牌 ─────────────────────────────────────────────
+
+class TokenStore:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def issue(self, user) -> str:
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._tokens[token] = (user, time.monotonic() + self.ttl)
+        return token
+
+    def resolve(self, token: str):
+        with self._lock:
+            item = self._tokens.get(token)
+            if item is None:
+                return None
+            if item[1] < time.monotonic():
+                del self._tokens[token]
+                return None
+            return item[0]
+
+    def revoke(self, token: str):
+        with self._lock:
+            self._tokens.pop(token, None)
+
+
+tokens = TokenStore(config.API_TOKEN_TTL_SECONDS)
+
+
+# ─── 序列化 ───────────────────────────────────────────────
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"无法序列化的类型：{type(value).__name__}")
+
+
+def user_dict(u) -> dict:
+    return {'id': u.id, 'username': u.username, 'role': u.role}
+
+
+def algo_dict(a, with_code: bool = False) -> dict:
+    d = {
+        'id':          a.id,
+        'title':       a.title,
+        'description': a.description,
+        'owner_id':    a.owner_id,
+        'owner':       {'id': a.owner.id, 'username': a.owner.username} if a.owner else None,
+        'tags':        a.tags,
+        'category':    a.category,
+        'version':     a.version,
+        'score':       a.score,
+        'status':      a.status,
+        'created_at':  a.created_at,
+        'row_version': a.row_version,
+    }
+    if with_code:
+        d['code'] = a.code
+    return d
+
+
+def card_dict(c) -> dict:
+    return {
+        'algorithm_id':   c.algorithm_id,
+        'title':          c.title,
+        'owner_id':       c.owner_id,
+        'owner_name':     c.owner_name,
+        'tags':           c.tags,
+        'category':       c.category,
+        'version':        c.version,
+        'score':          c.score,
+        'rating_sum':     c.rating_sum,
+        'rating_count':   c.rating_count,
+        'avg_rating':     c.avg_rating,
+        'comment_count':  c.comment_count,
+        'download_count': c.download_count,
+        'created_at':     c.created_at,
+    }
+
+
+# ─── 路由 ────────────────────────────────────────────────
+
+ROUTES = []
+
+
+def route(method: str, pattern: str, auth: str = None, slow: bool = False):
+    """
+    注册接口；pattern 中的 {name} 为整数路径参数，{name:str} 为字符串路径参数。
+    auth 为 None（匿名）、'user'（需登录）或 'admin'（需管理员）；slow 的接口在分析线程池中执行。
+    """
+    regex = re.sub(r'\{(\w+)\}', r'(?P<\1>\\d+)', pattern)
+    regex = re.sub(r'\{(\w+):str\}', r'(?P<\1>[^/]+)', regex)
+
+    def decorator(func):
+        ROUTES.append((method, re.compile(f'^{regex}$'), func, auth, slow))
+        return func
+    return decorator
+
+
+def _algo_or_404(algo_id: int):
+    algo = logic.get_algo_detail(algo_id)
+    if algo is None:
+        raise HTTPError(404, f"算法不存在：{algo_id}")
+    return algo
+
+
+def _date_arg(req, name: str) -> date:
+    try:
+        return date.fromisoformat(req.query[name])
+    except (KeyError, ValueError):
+        raise HTTPError(400, f"缺少或非法的日期参数：{name}")
+
+
+@route('GET', '/api/health')
+def health(req):
+    return {'status': 'ok'}
+
+
+@route('POST', '/api/register')
+def register(req):
+    body = req.json()
+    return {'id': logic.register(body['username'], body['password'])}
+
+
+@route('POST', '/api/login')
+def login(req):
+    body = req.json()
+    try:
+        user = logic.authenticate(body.get('username', ''), body.get('password', ''))
+    except ValueError as e:
+        raise HTTPError(401, str(e))
+    return {'token': tokens.issue(user), 'user': user_dict(user)}
+
+
+@route('POST', '/api/logout', auth='user')
+def logout(req):
+    tokens.revoke(req.headers['authorization'].split(None, 1)[1])
+    return {'ok': True}
+
+
+@route('GET', '/api/algorithms')
+def list_algos(req):
+    q = req.query
+    fuzzy = q.get('fuzzy') in ('1', 'true')
+    return [algo_dict(a) for a in logic.list_algos(q.get('query'), q.get('tags'), q.get('category'), fuzzy)]
+
+
+@route('GET', '/api/cards')
+def list_cards(req):
+    q = req.query
+    limit = int(q['limit']) if q.get('limit', '').isdigit() else None
+    ids = [int(i) for i in q['ids'].split(',') if i.isdigit()] if q.get('ids') is not None else None
+    return [card_dict(c) for c in logic.list_cards(q.get('query'), q.get('tags'), q.get('category'), limit, ids)]
+
+
+@route('GET', '/api/changes')
+def get_changes(req):
+    q = req.query
+    since = int(q['since']) if q.get('since', '').isdigit() else 0
+    limit = int(q['limit']) if q.get('limit', '').isdigit() else None
+    return logic.get_changes(since, limit)
+
+
+@route('GET', '/api/changes/seq')
+def get_change_seq(req):
+    return {'seq': logic.get_change_seq()}
+
+
+@route('GET', '/api/trending')
+def list_trending(req):
+    q = req.query
+    limit = int(q['limit']) if q.get('limit', '').isdigit() else None
+    entries = logic.list_trending(q.get('query'), q.get('tags'), q.get('category'), limit)
+    return [dict(e, algo=algo_dict(e['algo'])) for e in entries]
+
+
+@route('POST', '/api/algorithms', auth='user', slow=True)
+def upload_algo(req):
+    body = req.json()
+    aid = logic.upload_algo(req.user.id, body['title'], body.get('description', ''),
+                            body.get('tags', ''), body['category'], body['code'])
+    return {'id': aid}
+
+
+@route('GET', '/api/algorithms/pending', auth='admin')
+def list_pending(req):
+    return [algo_dict(a) for a in logic.list_pending()]
+
+
+@route('POST', '/api/algorithms/review', auth='admin')
+def review_algos(req):
+    body = req.json()
+    return {'count': logic.review_algos(req.user, [int(i) for i in body['ids']], body['action'])}
+
+
+def _code_or_403(req, algo_id: int):
+    """读取源码（含历史版本与差异）前的检查，规则同 logic.can_view_code"""
+    algo = _algo_or_404(algo_id)
+    if req.user is None:
+        raise HTTPError(401, "需要登录")
+    if not logic.can_view_code(req.user, algo):
+        raise HTTPError(403, "该算法尚未通过审核，只有作者与管理员可以查看源码")
+    return algo
+
+
+@route('GET', '/api/algorithms/{algo_id}')
+def algo_detail(req):
+    """匿名用户与无权查看的用户得到的 code 为 None"""
+    algo = _algo_or_404(req.params['algo_id'])
+    d = algo_dict(algo, with_code=True)
+    if not logic.can_view_code(req.user, algo):
+        d['code'] = None
+    return d
+
+
+@route('DELETE', '/api/algorithms/{algo_id}', auth='admin')
+def delete_algo(req):
+    row_version = req.query.get('row_version')
+    logic.delete_algo(req.user, req.params['algo_id'], int(row_version) if row_version else None)
+    return {'ok': True}
+
+
+@route('POST', '/api/algorithms/{algo_id}/review', auth='admin')
+def review_algo(req):
+    body = req.json()
+    logic.review_algo(req.user, req.params['algo_id'], body['action'], body.get('row_version'))
+    return {'ok': True}
+
+
+@route('GET', '/api/algorithms/{algo_id}/download', auth='user')
+def download_algo(req):
+    algo = _algo_or_404(req.params['algo_id'])
+    code = logic.download_algo(req.user, algo.id)
+    return Stream(code, 'text/x-python; charset=utf-8', f"{algo.id}.py")
+
+
+@route('GET', '/api/export', auth='user', slow=True)
+def export_algos(req):
+    """批量导出：先在临时文件中生成压缩包（小包留在内存），再分块流式发送"""
+    fmt = req.query.get('format', 'zip')
+    try:
+        ids = [int(x) for x in req.query['ids'].split(',') if x] if 'ids' in req.query else None
+    except ValueError:
+        raise HTTPError(400, "ids 必须是逗号分隔的整数")
+    buf = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    try:
+        manifest = logic.export_algos(req.user, buf, fmt, ids, req.query.get('query'),
+                                      req.query.get('tags'), req.query.get('category'))
+    except Exception:
+        buf.close()
+        raise
+    buf.seek(0)
+    content_type = 'application/zip' if fmt == 'zip' else 'application/gzip'
+    return Stream(buf, content_type, f"algorithms.{fmt}", {'X-Export-Count': manifest['count']})
+
+
+@route('POST', '/api/search/code', slow=True)
+def search_by_code(req):
+    b = req.json()
+    rows = logic.search_by_code(b['code'], int(b.get('k') or 10), b.get('category'))
+    return [dict(r, algo=algo_dict(r['algo'])) for r in rows]
+
+
+@route('GET', '/api/algorithms/{algo_id}/recommendations')
+def get_recommendations(req):
+    k = int(req.query['k']) if req.query.get('k', '').isdigit() else 5
+    return [dict(r, algo=algo_dict(r['algo'])) for r in logic.get_recommendations(req.params['algo_id'], k)]
+
+
+@route('GET', '/api/algorithms/{algo_id}/comments')
+def get_comments(req):
+    return logic.get_comments(req.params['algo_id'])
+
+
+@route('POST', '/api/algorithms/{algo_id}/comments', auth='user')
+def comment_algo(req):
+    body = req.json()
+    return {'id': logic.comment_algo(req.user.id, req.params['algo_id'], int(body['rating']), body['content'])}
+
+
+@route('DELETE', '/api/comments/{comment_id}', auth='admin')
+def delete_comment(req):
+    logic.delete_comment(req.user, req.params['comment_id'])
+    return {'ok': True}
+
+
+@route('GET', '/api/algorithms/{algo_id}/versions')
+def list_versions(req):
+    return logic.list_algo_versions(req.params['algo_id'])
+
+
+@route('POST', '/api/algorithms/{algo_id}/versions', auth='user', slow=True)
+def upload_version(req):
+    return {'version': logic.upload_new_version(req.user, req.params['algo_id'], req.json()['code'])}
+
+
+@route('GET', '/api/algorithms/{algo_id}/versions/{version}', auth='user')
+def version_code(req):
+    _code_or_403(req, req.params['algo_id'])
+    return {'code': logic.get_algo_version_code(req.params['algo_id'], req.params['version'])}
+
+
+@route('GET', '/api/algorithms/{algo_id}/diff', auth='user')
+def version_diff(req):
+    _code_or_403(req, req.params['algo_id'])
+    try:
+        old, new = int(req.query['old']), int(req.query['new'])
+    except (KeyError, ValueError):
+        raise HTTPError(400, "需要整数参数 old 与 new")
+    return {'diff': logic.diff_algo_versions(req.params['algo_id'], old, new)}
+
+
+# 已保存的分析结果（GET）与按需运行（POST）
+ANALYSES = {
+    'benchmark':  (logic.get_benchmark,    logic.benchmark_algo),
+    'complexity': (logic.get_complexity,   logic.estimate_complexity),
+    'verify':     (logic.get_verification, logic.verify_algo),
+    'profile':    (logic.get_profile,      logic.profile_algo),
+}
+
+
+def _analysis(req):
+    kind = req.params['kind']
+    if kind not in ANALYSES:
+        raise HTTPError(404, f"未知的分析类型：{kind}")
+    return ANALYSES[kind]
+
+
+@route('GET', '/api/algorithms/{algo_id}/analysis/{kind:str}')
+def get_analysis(req):
+    return _analysis(req)[0](req.params['algo_id'])
+
+
+@route('POST', '/api/algorithms/{algo_id}/analysis/{kind:str}', auth='user', slow=True)
+def run_analysis(req):
+    return _analysis(req)[1](req.params['algo_id'], force=bool(req.json().get('force')))
+
+
+@route('POST', '/api/algorithms/{algo_id}/analysis/{kind:str}/jobs', auth='user')
+def queue_analysis(req):
+    _analysis(req)
+    return {'job': logic.queue_analysis(req.user, req.params['algo_id'], req.params['kind'],
+                                        bool(req.json().get('force')))}
+
+
+@route('GET', '/api/verifications')
+def get_verifications(req):
+    try:
+        ids = [int(x) for x in req.query.get('ids', '').split(',') if x]
+    except ValueError:
+        raise HTTPError(400, "ids 必须是逗号分隔的整数")
+    algos = [a for a in (logic.get_algo_detail(i) for i in ids) if a is not None]
+    return {str(k): v for k, v in logic.get_verifications(algos).items()}
+
+
+@route('GET', '/api/leaderboard/{category:str}', auth='user')
+def get_leaderboard(req):
+    """只返回已保存的排行；重跑过期结果经 POST /api/leaderboard/{分类}/jobs 提交后台任务"""
+    entries = logic.get_leaderboard(req.params['category'], refresh=False)
+    return [dict(e, algo=algo_dict(e['algo'])) for e in entries]
+
+
+@route('POST', '/api/leaderboard/{category:str}/jobs', auth='user')
+def queue_leaderboard(req):
+    return {'job': logic.queue_leaderboard(req.user, req.params['category'])}
+
+
+@route('GET', '/api/strategy')
+def get_strategy(req):
+    return logic.get_scoring_strategy()
+
+
+@route('PUT', '/api/strategy', auth='admin')
+def update_strategy(req):
+    body = req.json()
+    logic.update_scoring(req.user, int(body['func_weight']), int(body['comment_weight']),
+                         body.get('row_version'))
+    return logic.get_scoring_strategy()
+
+
+@route('POST', '/api/rescore', auth='admin')
+def rescore_all(req):
+    return {'job': logic.rescore_all(req.user)}
+
+
+@route('GET', '/api/rescore')
+def rescore_progress(req):
+    return logic.get_rescore_progress()
+
+
+@route('GET', '/api/jobs', auth='admin')
+def list_jobs(req):
+    limit = int(req.query['limit']) if req.query.get('limit', '').isdigit() else 50
+    return logic.list_jobs(limit, req.query.get('status'))
+
+
+@route('GET', '/api/jobs/{job_id}', auth='user')
+def get_job(req):
+    """管理员可查看全部任务，其他用户只能查看自己提交的"""
+    job = logic.get_my_job(req.user, req.params['job_id'])
+    if job is None:
+        raise HTTPError(404, "任务不存在")
+    return job
+
+
+@route('GET', '/api/strategy/history')
+def strategy_history(req):
+    return logic.get_strategy_history()
+
+
+@route('GET', '/api/stats')
+def get_stats(req):
+    return logic.get_stats()
+
+
+@route('GET', '/api/stats/data')
+def stats_data(req):
+    return {'value': logic.get_stats_data(req.query.get('type', ''), _date_arg(req, 'start'), _date_arg(req, 'end'))}
+
+
+@route('GET', '/api/stats/export')
+def stats_export(req):
+    csv_text = logic.export_stats_csv(req.query.get('type', ''), _date_arg(req, 'start'), _date_arg(req, 'end'))
+    return Stream(csv_text, 'text/csv; charset=utf-8', 'stats.csv')
+
+
+# ─── HTTP 协议处理 ────────────────────────────────────────
+
+def _match(method: str, path: str):
+    allowed = False
+    for m, regex, func, auth, slow in ROUTES:
+        found = regex.match(path)
+        if found:
+            if m == method:
+                return func, auth, slow, found.groupdict()
+            allowed = True
+    raise HTTPError(405 if allowed else 404, "不支持的请求方法" if allowed else "接口不存在")
+
+
+def _authorize(req, auth: str):
+    header = req.headers.get('authorization', '')
+    if header.lower().startswith('bearer '):
+        req.user = tokens.resolve(header.split(None, 1)[1])
+    if auth and req.user is None:
+        raise HTTPError(401, "需要登录")
+    if auth == 'admin' and req.user.role != 'admin':
+        raise HTTPError(403, "需要管理员权限")
+
+
+async def _dispatch(req):
+    func, auth, slow, params = _match(req.method, req.path)
+    req.params = {k: int(v) if v.isdigit() else unquote(v) for k, v in params.items()}
+    _authorize(req, auth)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_analysis_pool if slow else _query_pool, func, req)
+
+
+def _error_status(e: Exception) -> int:
+    if isinstance(e, HTTPError):
+        return e.status
+    if isinstance(e, PermissionError):
+        return 403
+    if isinstance(e, ConcurrencyError):
+        return 409
+    if isinstance(e, LookupError):
+        return 400 if isinstance(e, KeyError) else 404
+    if isinstance(e, (ValueError, TypeError)):
+        return 400
+    return 500
+
+
+async def _read_request(reader):
+    line = await asyncio.wait_for(reader.readline(), config.API_IDLE_TIMEOUT)
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, "请求行格式错误")
+    headers = {}
+    while True:
+        h = await reader.readline()
+        if h in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = h.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length') or 0)
+    if length > config.API_MAX_BODY_BYTES:
+        raise HTTPError(413, "请求体过大")
+    body = await reader.readexactly(length) if length else b''
+    url = urlsplit(target)
+    query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+    req = Request(method.upper(), url.path.rstrip('/') or '/', query, headers, body)
+    req.keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close')
+    return req
+
+
+def _head(status: int, headers: dict) -> bytes:
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+async def _write_json(writer, status: int, data, keep_alive: bool):
+    body = json.dumps(data, ensure_ascii=False, default=_default).encode('utf-8')
+    writer.write(_head(status, {
+        'Content-Type': 'application/json; charset=utf-8',
+        'Content-Length': len(body),
+        'Connection': 'keep-alive' if keep_alive else 'close',
+    }) + body)
+    await writer.drain()
+
+
+async def _write_stream(writer, stream: Stream, keep_alive: bool):
+    headers = {
+        'Content-Type': stream.content_type,
+        'Transfer-Encoding': 'chunked',
+        'Connection': 'keep-alive' if keep_alive else 'close',
+    }
+    if stream.filename:
+        headers['Content-Disposition'] = f'attachment; filename="{stream.filename}"'
+    headers.update(stream.headers)
+    writer.write(_head(200, headers))
+    try:
+        for chunk in stream.chunks():
+            writer.write(b'%x\r\n' % len(chunk) + chunk + b'\r\n')
+            await writer.drain()
+    finally:
+        stream.close()
+    writer.write(b'0\r\n\r\n')
+    await writer.drain()
+
+
+async def handle_client(reader, writer):
+    try:
+        while True:
+            try:
+                req = await _read_request(reader)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                break
+            except HTTPError as e:
+                await _write_json(writer, e.status, {'error': 'HTTPError', 'message': str(e)}, False)
+                break
+            if req is None:
+                break
+            try:
+                result = await _dispatch(req)
+            except Exception as e:
+                status = _error_status(e)
+                message = str(e) if status != 500 else f"服务器内部错误：{e}"
+                await _write_json(writer, status, {'error': type(e).__name__, 'message': message}, req.keep_alive)
+            else:
+                if isinstance(result, Stream):
+                    await _write_stream(writer, result, req.keep_alive)
+                else:
+                    await _write_json(writer, 200, result, req.keep_alive)
+            if not req.keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def serve(host: str = None, port: int = None):
+    server = await asyncio.start_server(handle_client, host or config.API_HOST, port or config.API_PORT,
+                                        backlog=1024)
+    addrs = ', '.join(str(s.getsockname()) for s in server.sockets)
+    print(f"API 服务已启动：{addrs}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Algorithm Repository Manager HTTP API 服务")
+    parser.add_argument('--host', default=config.API_HOST)
+    parser.add_argument('--port', type=int, default=config.API_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _query_pool.shutdown(wait=False)
+        _analysis_pool.shutdown(wait=False)
+
+
+if __name__ == '__main__':
+    main()
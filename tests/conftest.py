@@ -0,0 +1,30 @@
+# tests/conftest.py
+"""
+测试在临时 SQLite 数据库上运行，不需要 MySQL：
+导入 dao 之前把 models 的引擎与会话工厂换成 SQLite（dao 导入时建表）。
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models  # noqa: E402
+
+models.engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='arm-test-'), 'arm.sqlite3')}")
+models.SessionLocal.configure(bind=models.engine)
+
+import dao  # noqa: E402,F401
+
+
+@pytest.fixture
+def session():
+    """独立于被测 DAO 的会话，用于构造状态与核对结果"""
+    s = models.SessionLocal()
+    try:
+        yield s
+    finally:
+        s.close()
@@ -0,0 +1,148 @@
+# tests/test_errors.py
+"""乐观锁检查与瞬时错误重试：errors.check_version、dao.retry_transient（SQLite）"""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+
+import config
+import dao
+import models
+from dao import ScoringStrategyDAO, UserDAO, retry_transient
+from errors import ConcurrencyError, check_version, is_transient, retry_delay
+from models import ScoringStrategy
+
+
+def _db_error(cls, *args):
+    return cls("UPDATE algorithms SET ...", {}, Exception(*args))
+
+
+# ─── check_version ─────────────────────────────────────
+
+def test_check_version_accepts_matching_or_unread_version():
+    check_version(SimpleNamespace(row_version=3), 3, "算法 1 ")
+    check_version(SimpleNamespace(row_version=3), None, "算法 1 ")
+
+
+def test_check_version_rejects_stale_version():
+    with pytest.raises(ConcurrencyError, match="版本 2 → 3"):
+        check_version(SimpleNamespace(row_version=3), 2, "算法 1 ")
+
+
+def test_check_version_on_missing_record():
+    with pytest.raises(ConcurrencyError, match="已被删除"):
+        check_version(None, 2, "算法 1 ")
+    with pytest.raises(ValueError, match="不存在"):
+        check_version(None, None, "算法 1 ")
+
+
+# ─── retry_transient ───────────────────────────────────
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waited = []
+    monkeypatch.setattr(dao.time, 'sleep', waited.append)
+    return waited
+
+
+def _flaky(failures: list):
+    """依次抛出 failures 中的异常，之后返回调用次数"""
+    calls = []
+
+    @retry_transient
+    def write():
+        calls.append(None)
+        if len(calls) <= len(failures):
+            raise failures[len(calls) - 1]
+        return len(calls)
+    return write, calls
+
+
+def test_deadlock_is_retried_until_success(sleeps):
+    write, calls = _flaky([_db_error(OperationalError, 1213, "Deadlock found"),
+                           _db_error(OperationalError, 1205, "Lock wait timeout exceeded")])
+    assert write() == 3
+    assert len(sleeps) == 2
+
+
+def test_deadlock_retry_is_bounded(sleeps):
+    write, calls = _flaky([_db_error(OperationalError, 1213, "Deadlock found")] * 100)
+    with pytest.raises(OperationalError):
+        write()
+    assert len(calls) == config.DB_RETRY_ATTEMPTS
+    assert len(sleeps) == config.DB_RETRY_ATTEMPTS - 1
+    assert all(0 < s <= config.DB_RETRY_MAX_DELAY for s in sleeps)
+
+
+def test_sqlite_lock_is_transient(sleeps):
+    write, calls = _flaky([_db_error(OperationalError, "database is locked")])
+    assert write() == 2
+
+
+def test_other_errors_are_not_retried(sleeps):
+    write, calls = _flaky([_db_error(IntegrityError, 1062, "Duplicate entry")])
+    with pytest.raises(IntegrityError):
+        write()
+    assert len(calls) == 1
+    assert not sleeps
+    assert not is_transient(_db_error(IntegrityError, 1062, "Duplicate entry"))
+
+
+def test_stale_data_becomes_concurrency_error_without_retry(sleeps):
+    write, calls = _flaky([StaleDataError("UPDATE statement on table 'algorithms' expected to update 1 row(s)")] * 2)
+    with pytest.raises(ConcurrencyError):
+        write()
+    assert len(calls) == 1
+    assert not sleeps
+
+
+def test_retry_delay_grows_and_is_capped():
+    for attempt in range(10):
+        cap = min(config.DB_RETRY_MAX_DELAY, config.DB_RETRY_BASE_DELAY * 2 ** attempt)
+        assert cap / 2 <= retry_delay(attempt) <= cap
+
+
+# ─── 经由 DAO 的乐观锁 ─────────────────────────────────
+
+@pytest.fixture
+def strategy(session):
+    strat = session.get(ScoringStrategy, 1)
+    if strat is None:
+        session.add(ScoringStrategy(id=1, func_weight=10, comment_weight=1))
+        session.commit()
+    admin = session.query(models.User).filter_by(username='errors-admin').first() \
+        or UserDAO.create_user('errors-admin', 'admin123', 'admin')
+    return admin.id, ScoringStrategyDAO.get_strategy().row_version
+
+
+def test_update_with_stale_row_version_is_rejected(strategy):
+    admin_id, version = strategy
+    ScoringStrategyDAO.update(admin_id, 20, 2, row_version=version)
+    with pytest.raises(ConcurrencyError):
+        ScoringStrategyDAO.update(admin_id, 30, 3, row_version=version)
+    strat = ScoringStrategyDAO.get_strategy()
+    assert (strat.func_weight, strat.comment_weight, strat.row_version) == (20, 2, version + 1)
+
+
+def test_concurrent_write_between_read_and_commit_raises_concurrency_error(strategy, sleeps):
+    """读取并通过版本检查之后、提交之前被其他会话修改：UPDATE … WHERE row_version 匹配 0 行"""
+    admin_id, version = strategy
+    flushes = []
+
+    def rival_update(session, flush_context, instances):
+        flushes.append(None)
+        with models.engine.begin() as conn:
+            conn.execute(ScoringStrategy.__table__.update().where(ScoringStrategy.id == 1)
+                         .values(func_weight=99, row_version=ScoringStrategy.row_version + 1))
+
+    event.listen(models.SessionLocal, 'before_flush', rival_update)
+    try:
+        with pytest.raises(ConcurrencyError):
+            ScoringStrategyDAO.update(admin_id, 40, 4, row_version=version)
+    finally:
+        event.remove(models.SessionLocal, 'before_flush', rival_update)
+    assert len(flushes) == 1
+    strat = ScoringStrategyDAO.get_strategy()
+    assert (strat.func_weight, strat.row_version) == (99, version + 1)
@@ -0,0 +1,106 @@
+# tests/test_jobs.py
+"""JobDAO 的领取、租约与重试（SQLite）"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import config
+import models
+from dao import JobDAO
+from models import Job
+
+
+@pytest.fixture(autouse=True)
+def empty_queue():
+    with models.engine.begin() as conn:
+        conn.execute(Job.__table__.delete())
+
+
+def _update(job_id: int, **values):
+    with models.engine.begin() as conn:
+        conn.execute(Job.__table__.update().where(Job.id == job_id).values(**values))
+
+
+def _job(session, job_id: int) -> Job:
+    session.expire_all()
+    return session.get(Job, job_id)
+
+
+def test_claim_takes_highest_priority_then_oldest():
+    low = JobDAO.enqueue('noop', priority=0)
+    high = JobDAO.enqueue('noop', priority=5)
+    later = JobDAO.enqueue('noop', priority=5)
+    assert [JobDAO.claim(o).id for o in ('a', 'b', 'c')] == [high.id, later.id, low.id]
+    assert JobDAO.claim('d') is None
+
+
+def test_running_job_is_not_claimed_while_lease_holds():
+    job = JobDAO.enqueue('noop')
+    claimed = JobDAO.claim('a')
+    assert (claimed.id, claimed.status, claimed.attempts, claimed.lease_owner) == (job.id, 'running', 1, 'a')
+    assert JobDAO.claim('b') is None
+
+
+def test_expired_lease_is_reclaimed_and_old_owner_cannot_finish(session):
+    job = JobDAO.enqueue('noop')
+    JobDAO.claim('a')
+    _update(job.id, lease_expires=datetime.utcnow() - timedelta(seconds=1))
+
+    again = JobDAO.claim('b')
+    assert (again.id, again.lease_owner, again.attempts) == (job.id, 'b', 2)
+    assert JobDAO.heartbeat([job.id], 'a') == 0
+    assert JobDAO.finish(job.id, 'a', 1.0, result={'by': 'a'}) == 'running'
+    assert JobDAO.finish(job.id, 'b', 1.0, result={'by': 'b'}) == 'done'
+    assert _job(session, job.id).result == '{"by": "b"}'
+
+
+def test_expired_lease_without_attempts_left_fails(session):
+    job = JobDAO.enqueue('noop', max_attempts=1)
+    JobDAO.claim('a')
+    _update(job.id, lease_expires=datetime.utcnow() - timedelta(seconds=1))
+
+    assert JobDAO.claim('b') is None
+    row = _job(session, job.id)
+    assert row.status == 'failed'
+    assert row.lease_owner is None
+    assert '租约过期（a）' in row.error
+
+
+def test_claim_lost_to_concurrent_worker():
+    """读出候选任务之后、带原状态条件的 UPDATE 之前被另一 worker 领走：本次 UPDATE 影响 0 行，不会重复领取"""
+    job = JobDAO.enqueue('noop')
+    rival = {}
+
+    def steal(state):
+        if state.is_update and 'job' not in rival:
+            rival['job'] = None                 # 先占位：另一 worker 自己的 UPDATE 也会经过这里
+            rival['job'] = JobDAO.claim('b')
+
+    event.listen(models.SessionLocal, 'do_orm_execute', steal)
+    try:
+        assert JobDAO.claim('a') is None
+    finally:
+        event.remove(models.SessionLocal, 'do_orm_execute', steal)
+    assert (rival['job'].id, rival['job'].lease_owner, rival['job'].attempts) == (job.id, 'b', 1)
+
+
+def test_failure_backs_off_then_fails_after_max_attempts(session):
+    job = JobDAO.enqueue('noop', max_attempts=3)
+    for attempt in (1, 2):
+        assert JobDAO.claim('a').attempts == attempt
+        before = datetime.utcnow()
+        assert JobDAO.finish(job.id, 'a', 0.5, error=f"第 {attempt} 次失败") == 'queued'
+        row = _job(session, job.id)
+        delay = config.JOB_RETRY_DELAY_SECONDS * 2 ** (attempt - 1)
+        assert before + timedelta(seconds=delay - 1) <= row.run_after <= datetime.utcnow() + timedelta(seconds=delay)
+        assert (row.lease_owner, row.error) == (None, f"第 {attempt} 次失败")
+        assert JobDAO.claim('a') is None   # 退避期内不可领取
+        _update(job.id, run_after=datetime.utcnow() - timedelta(seconds=1))
+
+    assert JobDAO.claim('a').attempts == 3
+    assert JobDAO.finish(job.id, 'a', 0.5, error="第 3 次失败") == 'failed'
+    row = _job(session, job.id)
+    assert (row.status, row.error) == ('failed', "第 3 次失败")
+    assert row.finished_at is not None
+    assert JobDAO.claim('a') is None
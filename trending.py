@@ -0,0 +1,77 @@
+# trending.py
+"""
+热度（随时间指数衰减的下载数与评论数）的增量计算。
+某算法在时刻 now 的热度为 Σ wᵢ·exp(-λ(now - tᵢ))，λ = ln2 / 半衰期。
+因子 exp(-λ·now) 对所有算法相同，不影响排序，因此只需保存与 now 无关的
+    log_score = log Σ wᵢ·exp(λ(tᵢ - EPOCH))
+新事件到达时以 log-sum-exp 累加（logaddexp），数值稳定且无需重算历史；
+按 log_score 降序即为当前热度排序，查询时不做任何聚合或衰减计算。
+写库时以单条 upsert（upsert()）在数据库中累加，同一算法的首个事件并发到达时也不会主键冲突。
+"""
+import math
+from datetime import datetime
+
+import config
+
+EPOCH = datetime(2024, 1, 1)
+
+DECAY = math.log(2) / (config.TRENDING_HALF_LIFE_HOURS * 3600)   # λ，单位 1/秒
+
+# 事件类型 -> 权重
+WEIGHTS = {
+    'download': 1.0,
+    'comment':  config.TRENDING_COMMENT_WEIGHT,
+}
+
+
+def logaddexp(a: float, b: float) -> float:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    hi, lo = (a, b) if a >= b else (b, a)
+    return hi + math.log1p(math.exp(lo - hi))
+
+
+def event_log_weight(kind: str, when: datetime, count: int = 1) -> float:
+    """count 个同时刻事件对 log_score 的贡献"""
+    return math.log(WEIGHTS[kind] * count) + DECAY * (when - EPOCH).total_seconds()
+
+
+def current(log_score: float, now: datetime = None) -> float:
+    """log_score 换算为 now 时刻的热度值（用于展示）"""
+    if log_score is None:
+        return 0.0
+    now = now or datetime.utcnow()
+    return math.exp(log_score - DECAY * (now - EPOCH).total_seconds())
+
+
+def _sql_logaddexp(a, b):
+    """SQL 表达式版的 logaddexp：max(a, b) + ln(1 + exp(-|a - b|))"""
+    from sqlalchemy import case, func
+    return case((a >= b, a), else_=b) + func.ln(1 + func.exp(-func.abs(a - b)))
+
+
+def upsert(dialect: str, deltas: dict, now: datetime):
+    """
+    累加热度的 upsert 语句：deltas 为 {algo_id: 本次事件合计的 log 权重}，不存在的行直接插入，
+    已存在的行在数据库中以 log-sum-exp 累加。按算法 ID 排序插入，多个事务按相同顺序加锁。
+    dialect 为 'mysql'（INSERT … ON DUPLICATE KEY UPDATE）或 'sqlite'（INSERT … ON CONFLICT DO UPDATE）
+    """
+    from models import AlgorithmTrending
+    table = AlgorithmTrending.__table__
+    rows = [{'algorithm_id': aid, 'log_score': deltas[aid], 'updated_at': now} for aid in sorted(deltas)]
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(rows)
+        return stmt.on_duplicate_key_update(
+            log_score=_sql_logaddexp(table.c.log_score, stmt.inserted.log_score),
+            updated_at=stmt.inserted.updated_at)
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.algorithm_id],
+            set_={'log_score': _sql_logaddexp(table.c.log_score, stmt.excluded.log_score),
+                  'updated_at': stmt.excluded.updated_at})
+    raise ValueError(f"不支持的数据库方言：{dialect}")
@@ -0,0 +1,51 @@
+# versioning.py
+"""
+算法版本历史的增量存储：
+- 最新版本的完整源码保存在 algorithms.code
+- 每个旧版本保存为相对其下一版本的反向增量（按行），并经 zlib 压缩
+- 还原某个版本时，只需从最新版本沿增量链回退到目标版本
+"""
+import difflib
+import json
+import zlib
+
+
+def make_delta(newer: str, older: str) -> bytes:
+    """
+    计算从 newer 还原出 older 的增量。
+    增量由两种指令组成：["c", i1, i2] 复制 newer 的第 i1..i2 行；["i", [行...]] 插入新行。
+    """
+    new_lines = newer.splitlines(keepends=True)
+    old_lines = older.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, new_lines, old_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(['c', i1, i2])
+        elif j2 > j1:
+            ops.append(['i', old_lines[j1:j2]])
+    payload = json.dumps(ops, ensure_ascii=False, separators=(',', ':'))
+    return zlib.compress(payload.encode('utf-8'), 9)
+
+
+def apply_delta(newer: str, delta: bytes) -> str:
+    """用 make_delta 产生的增量由 newer 还原出 older"""
+    new_lines = newer.splitlines(keepends=True)
+    ops = json.loads(zlib.decompress(delta).decode('utf-8'))
+    out = []
+    for op in ops:
+        if op[0] == 'c':
+            out.extend(new_lines[op[1]:op[2]])
+        else:
+            out.extend(op[1])
+    return ''.join(out)
+
+
+def diff_texts(old: str, new: str, old_label: str, new_label: str) -> str:
+    """生成两个版本之间的 unified diff 文本"""
+    return ''.join(difflib.unified_diff(
+        old.splitlines(keepends=True),
+        new.splitlines(keepends=True),
+        fromfile=old_label,
+        tofile=new_label
+    ))
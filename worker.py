@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# worker.py
+"""
+后台任务 worker：python -m worker [--concurrency N] [--kind 任务名 ...] [--once]
+从 jobs 表按优先级领取任务，在子进程池中执行（见 jobs.py），记录结果、错误与耗时。
+- 同时持有的任务数不超过子进程数，空闲时每 JOB_POLL_SECONDS 秒轮询一次
+- 每隔租约时长的三分之一为执行中的任务续约；worker 崩溃后租约过期，任务由其他 worker 重新领取
+- 收到 SIGINT / SIGTERM 后不再领取新任务，等待执行中的任务结束后退出
+可同时运行多个 worker（多台机器也可以），同一任务只会被一个 worker 领取。
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import get_context
+
+import config
+import jobs
+from dao import JobDAO
+
+
+def _log(**fields):
+    print(json.dumps(fields, ensure_ascii=False, default=str), flush=True)
+
+
+def run(concurrency: int = None, kinds: list = None, once: bool = False):
+    concurrency = concurrency or config.JOB_WORKERS
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    running = {}   # future -> (job, 开始时间)
+    last_beat = time.monotonic()
+    with ProcessPoolExecutor(concurrency, mp_context=get_context('spawn')) as pool:
+        _log(event='started', owner=owner, concurrency=concurrency, kinds=kinds)
+        while running or not stopping:
+            # 1. 有空闲子进程时领取任务
+            while not stopping and len(running) < concurrency:
+                job = JobDAO.claim(owner, kinds)
+                if job is None:
+                    break
+                _log(event='claimed', job=job.id, kind=job.kind, attempt=job.attempts)
+                future = pool.submit(jobs.execute, job.kind, json.loads(job.payload or '{}'))
+                running[future] = (job, time.perf_counter())
+            if once and not running:
+                break
+
+            # 2. 等待任务完成或到下一次轮询
+            done, _ = wait(list(running), timeout=config.JOB_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            if not running:
+                time.sleep(config.JOB_POLL_SECONDS)
+            for future in done:
+                job, started = running.pop(future)
+                try:
+                    result, seconds = future.result()
+                    status = JobDAO.finish(job.id, owner, seconds, result=result)
+                    _log(event='finished', job=job.id, kind=job.kind, status=status, seconds=round(seconds, 3))
+                except Exception as e:
+                    seconds = time.perf_counter() - started
+                    error = ''.join(traceback.format_exception_only(type(e), e)).strip()
+                    status = JobDAO.finish(job.id, owner, seconds, error=error)
+                    _log(event='failed', job=job.id, kind=job.kind, status=status, seconds=round(seconds, 3),
+                         error=error)
+
+            # 3. 续约
+            if running and time.monotonic() - last_beat >= config.JOB_LEASE_SECONDS / 3:
+                JobDAO.heartbeat([job.id for job, _ in running.values()], owner)
+                last_beat = time.monotonic()
+    _log(event='stopped', owner=owner)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Algorithm Repository Manager 后台任务 worker")
+    parser.add_argument('--concurrency', type=int, default=config.JOB_WORKERS, help="并发执行的子进程数")
+    parser.add_argument('--kind', action='append', choices=sorted(jobs.KINDS), help="只领取这些类型的任务，可重复")
+    parser.add_argument('--once', action='store_true', help="处理完当前可执行的任务后退出")
+    args = parser.parse_args()
+    run(args.concurrency, args.kind, args.once)
+
+
+if __name__ == '__main__':
+    main()